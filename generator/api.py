@@ -0,0 +1,131 @@
+"""
+Library API of MSTG: generate the artifacts of an architecture in memory.
+"""
+
+import io
+import os
+import sys
+import threading
+import contextlib
+import dataclasses
+
+import utils
+import artifacts
+import constants
+import k8s_exporter
+import architecture
+import config_parser
+import compose_exporter
+import containerlab_exporter
+
+# the options are stored in the environment and the counters of the addresses are
+# global, so the generations are serialized
+GENERATION_LOCK = threading.Lock()
+
+
+@dataclasses.dataclass
+class Options:
+    """Options of a generation, equivalent to the command line flags."""
+
+    ip: int = 6
+    kubernetes: bool = False
+    containerlab: bool = False
+    netns: bool = False
+    single_exec: bool = False
+    phases: bool = False
+    batch_files: bool = False
+    https: bool = False
+    jaeger: bool = False
+    ioam: bool = False
+    clt: bool = False
+    compose_format: str = "yaml"
+    k8s_layout: str = "files"
+    k8s_placement: str = "scheduler"
+
+    def args(self) -> list[str]:
+        """Return the command line arguments equivalent to the options."""
+
+        args = [
+            "--ip",
+            str(self.ip),
+            "--compose-format",
+            self.compose_format,
+            "--k8s-layout",
+            self.k8s_layout,
+            "--k8s-placement",
+            self.k8s_placement,
+        ]
+        flags = [
+            "kubernetes",
+            "containerlab",
+            "netns",
+            "single_exec",
+            "phases",
+            "batch_files",
+            "https",
+            "jaeger",
+            "ioam",
+            "clt",
+        ]
+        for flag in flags:
+            if getattr(self, flag):
+                args.append(f"--{flag.replace('_', '-')}")
+        return args
+
+
+@contextlib.contextmanager
+def isolated_environment():
+    """Restore the environment of the process, where the options are stored."""
+
+    environment = dict(os.environ)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(environment)
+
+
+def generate(
+    config, options: Options | None = None, verbose=False
+) -> artifacts.Artifacts:
+    """
+    Generate the artifacts of an architecture without touching the disk.
+    The artifacts can then be written by a sink (see `sinks`).
+    The options do not leak into the environment of the process, and concurrent
+    calls are run one at a time.
+
+    :param config: Loaded configuration, or path towards a configuration file.
+    :param options: Options of the generation (default = IPv6 for Docker Compose).
+    :param verbose: Whether to print the progress of the generation.
+    :raises RuntimeError: If the options or the configuration are invalid.
+    """
+
+    options = options or Options()
+    log = io.StringIO()
+    with (
+        GENERATION_LOCK,
+        isolated_environment(),
+        contextlib.redirect_stdout(sys.stdout if verbose else log),
+        contextlib.redirect_stderr(sys.stderr if verbose else log),
+    ):
+        conf_file = ""
+        if isinstance(config, (str, os.PathLike)):
+            conf_file = os.fspath(config)
+            config = config_parser.parse_config(conf_file)
+
+        try:
+            utils.check_arguments(["--config", conf_file, *options.args()])
+        except SystemExit as err:
+            raise RuntimeError(f"Invalid options {options}") from err
+
+        architecture.reset_counters()
+        arch = architecture.Architecture(conf_file, config)
+        if utils.output_is_compose():
+            exporter = compose_exporter.ComposeExporter(arch, constants.COMPOSE_FILE)
+        elif utils.output_is_containerlab():
+            exporter = containerlab_exporter.ContainerlabExporter(
+                arch, constants.CONTAINERLAB_FILE
+            )
+        else:
+            exporter = k8s_exporter.K8SExporter(arch)
+        return exporter.export()
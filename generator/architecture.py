@@ -2,7 +2,10 @@
 Represent the architecture.
 """
 
+import os
 import copy
+import networkx as nx
+import matplotlib.pyplot as plt
 
 import utils
 import router
@@ -12,30 +15,56 @@ import entities
 import services
 import firewall
 import constants
+import traces
+import partition
 import kubernetes
 import config_parser
 
 
+def reset_counters() -> None:
+    """
+    Reset the counters used to assign identifiers to entities, networks, and ports.
+    Required to get the same addressing when building an architecture multiple times.
+    """
+    entities.Entity.ioam_counter = 0
+    network.Network.network_counter = 2
+    kubernetes.Kubernetes.node_port_next = kubernetes.Kubernetes.node_port_min
+
+
 class Architecture:
     """Represent the architecture."""
 
-    def __init__(self, conf_file: str, config):
+    def __init__(self, conf_file: str, config, only_base=False):
         """
         Create the architecture.
 
         :param conf_file: Path towards config file.
         :param config: Loaded YAML configuration file.
+        :param only_base: Generate only the part of the architecture independent of
+        the flags. The complete architectures are obtained with `derive`.
         """
         self.filename = conf_file
         self.config = config
         self.entities: list[entities.Entity] = []
         self.networks: list[network.Network] = []
-        self.kubernetes = kubernetes.Kubernetes() if utils.output_is_k8s() else None
-        self.generate_architecture()
+        self.kubernetes: kubernetes.Kubernetes | None = None
+        self.generate_base_architecture()
+        if not only_base:
+            self.generate_variant_architecture()
 
-    def generate_architecture(self):
+    def derive(self) -> "Architecture":
         """
-        Generate the architecture based on the given config.
+        Generate a complete architecture with the current flags from a base
+        architecture (see `only_base`), without checking the config again.
+        """
+        arch = copy.deepcopy(self)
+        arch.generate_variant_architecture()
+        return arch
+
+    def generate_base_architecture(self):
+        """
+        Generate the part of the architecture which does not depend on the flags
+        (IP version, telemetry, output).
         """
         # Check if the given configuration is valid
         print("Checking validity of configuration...")
@@ -58,11 +87,35 @@ class Architecture:
         self.parse_e2e_connections()
         utils.print_info("Parsed network connections")
 
+    def generate_variant_architecture(self):
+        """
+        Generate the part of the architecture depending on the flags.
+        """
+        if utils.output_is_k8s():
+            if any(isinstance(e, switch.Switch) for e in self.entities):
+                raise RuntimeError("Switches cannot be exported to Kubernetes")
+            self.kubernetes = kubernetes.Kubernetes()
+
+        for entity in self.entities:
+            if isinstance(entity, services.Service) and not entity.external:
+                entity.image_name = (
+                    "mstg_service_clt" if utils.is_using_clt() else "mstg_service"
+                )
+
         # Generate networks and connect to entities
         print("\nCreating networks...")
         self.generate_networks()
         utils.print_info("Generated networks")
 
+        if len(utils.hosts()) > 0:
+            print("\nPartitioning the architecture across the hosts...")
+            self.partition_hosts()
+            utils.print_info("Partitioned architecture")
+        elif utils.output_is_k8s() and utils.k8s_placement() == "topology":
+            print("\nPlacing the pods on the nodes...")
+            self.place_pods()
+            utils.print_info("Placed pods")
+
         # Generating ip route cmd
         print("\nGenerating ip route commands...")
         self.generate_ip_route_cmds()
@@ -83,6 +136,18 @@ class Architecture:
         self.generate_additional_cmds()
         utils.print_info("Generated additional commands")
 
+    def export_graph(self, filename: str) -> None:
+        """Draw the graph of the architecture in the given `filename`."""
+        plt.clf()
+        nx.draw_spring(
+            self.graph,
+            node_color="deepskyblue",
+            edge_color="dimgray",
+            arrows=True,
+            with_labels=True,
+        )
+        plt.savefig(filename)
+
     def print(self):
         """Print the architecture"""
         for net in self.networks:
@@ -129,6 +194,52 @@ class Architecture:
             else:
                 raise RuntimeError(f"Entity {entity} has unexpected type {entity_type}")
 
+    def partition_hosts(self) -> None:
+        """
+        Assign each entity to one of the hosts, minimizing the number of links
+        crossing two hosts while keeping the same number of entities on each host.
+        """
+
+        hosts = partition.partition(
+            partition.link_graph(self.graph, self.networks), len(utils.hosts())
+        )
+        for entity in self.entities:
+            entity.host = hosts[entity.name]
+        partition.assign_vnis(self.networks)
+
+    def place_pods(self) -> None:
+        """
+        Place the pod of each entity on a node of the cluster, minimizing the number
+        of links crossing two nodes while keeping the same number of pods per node.
+        """
+
+        nodes = kubernetes.Kubernetes.get_schedulable_nodes()
+        if len(nodes) == 0:
+            raise RuntimeError("No node of the cluster can run the pods")
+
+        parts = partition.partition(
+            partition.link_graph(self.graph, self.networks), len(nodes)
+        )
+        for entity in self.entities:
+            entity.node = nodes[parts[entity.name]]
+        self.kubernetes.nodes = nodes
+
+    def partition_report(self) -> dict:
+        """
+        Return the quality of the partition across the hosts, or across the nodes
+        of the cluster (see `partition`).
+        """
+
+        if self.kubernetes is not None:
+            hosts = self.kubernetes.nodes
+            parts = {entity.name: hosts.index(entity.node) for entity in self.entities}
+        else:
+            hosts = utils.hosts()
+            parts = {entity.name: entity.host for entity in self.entities}
+        return partition.report(
+            partition.link_graph(self.graph, self.networks), parts, hosts
+        )
+
     def find_entity(self, name: str) -> entities.Entity | None:
         """Find an entity in the architecture with the given `name`. If not found, return None."""
         return next((entity for entity in self.entities if entity.name == name), None)
@@ -155,14 +266,16 @@ class Architecture:
                 continue
 
             conns = config_parser.extract_connections(entity.config)
-            entity.e2e_conns.update([f"{entity.name}->" + conn for conn in conns])
+            entity.e2e_conns.update(
+                dict.fromkeys(f"{entity.name}->" + conn for conn in conns)
+            )
 
             for conn in conns:
                 hops = conn.split("->")
                 for hop in hops:
                     e = self.find_entity(hop)
                     if e is not None:
-                        e.e2e_conns.add(f"{entity.name}->" + conn)
+                        e.e2e_conns[f"{entity.name}->" + conn] = None
 
     def get_interface_id(self, source: str, dest: str) -> int:
         """
@@ -175,6 +288,7 @@ class Architecture:
             raise RuntimeError(f"Cannot find entity {source} in get_interface_id")
 
         # we need to add 1 for k8s because eth0 is assigned to default cni
+        # (and to the management network with containerlab)
 
         for i, net in enumerate(source_entity.attached_networks):
             if net.get_shared_interface(source, dest) is not None:
@@ -287,9 +401,9 @@ class Architecture:
 
             for connection in connections:
                 if "->" in connection:  # connection is a path
-                    entity.depends_on.update(connection.split("->"))
+                    entity.depends_on.update(dict.fromkeys(connection.split("->")))
                 else:  # connection is direct
-                    entity.depends_on.add(connection)
+                    entity.depends_on[connection] = None
 
     def get_shared_network(self, begin: str | None, end: str | None):
         """
@@ -444,7 +558,7 @@ class Architecture:
                         )
                 elif utils.topology_is_ipv4():
                     cmd = constants.IP4_ROUTE_PATH_VANILLA.format(dest_ip_subnet, ip)
-                curr_entity.add_command(cmd)
+                curr_entity.add_setting(f"route {dest_ip_subnet}", cmd)
 
             # towards source
             if i != 0:
@@ -487,7 +601,7 @@ class Architecture:
                 else:
                     cmd = constants.IP6_ROUTE_PATH_VANILLA.format(source_ip_subnet, ip)
 
-                curr_entity.add_command(cmd)
+                curr_entity.add_setting(f"route {source_ip_subnet}", cmd)
 
     def ip_route_direct_connection(
         self, source_entity: services.Service, dest: str
@@ -523,13 +637,14 @@ class Architecture:
         if ip is None:
             raise RuntimeError(f"Cannot get ip of {dest}")
 
-        source_entity.add_command(
+        source_entity.add_setting(
+            f"route {ip}",
             constants.IP6_ROUTE_DIRECT_IOAM.format(
                 ip,
                 ioam_trace_hex,
                 size_ioam_data,
                 utils.get_interface_name(if_id, source_entity.name),
-            )
+            ),
         )
 
     def generate_networks(self) -> None:
@@ -620,27 +735,28 @@ class Architecture:
         """Generate extra commands to configure the entities of the architecture."""
         for entity in self.entities:
             cmds = self.generate_traffic_impairments(entity, entity.config)
-            for cmd in cmds:
-                entity.add_command(cmd)
+            for key, cmd in cmds.items():
+                entity.add_setting(key, cmd)
             self.generate_timers(entity, entity.config)
+            self.generate_traces(entity, entity.config)
 
     def generate_traffic_impairments(
         self, entity: entities.Entity, entity_config
-    ) -> list:
+    ) -> dict[str, str]:
         """
-        Generate the list of commands to impair the traffic
-        of `entity` with the given `entity_config`.
+        Generate the commands to impair the traffic of `entity` with the given
+        `entity_config`, indexed by the setting they apply (e.g. "mtu <interface>").
         """
-        connections = config_parser.extract_connections(entity_config)
-        commands = []
+        connections = config_parser.extract_connection_specs(entity_config)
+        commands = {}
 
-        for conn in connections:
+        for path, conn in connections.items():
             if not any(
                 impairment in conn for impairment in constants.CONNECTION_IMPAIRMENTS
             ):
                 continue
 
-            first_hop = conn.split("->")[0] if "->" in conn else conn
+            first_hop = path.split("->")[0]
 
             if_id = self.get_interface_id(entity.name, first_hop)
             if if_id is None:
@@ -656,20 +772,22 @@ class Architecture:
                     raise RuntimeError("MTU must be an integer")
                 if utils.topology_is_ipv6() and conn["mtu"] < 1280:
                     raise RuntimeError(f"MTU cannot be smaller than 1280 for IPv6")
-                commands.append(constants.MTU_OPTION.format(ifname, conn["mtu"]))
+                commands[f"mtu {ifname}"] = constants.MTU_OPTION.format(
+                    ifname, conn["mtu"]
+                )
 
             # modify buffer size
             if "buffer_size" in conn:
                 if not isinstance(conn["buffer_size"], int):
                     raise RuntimeError("Buffer size must be an integer")
-                commands.append(
-                    constants.BUFFER_SIZE_OPTION.format(ifname, conn["buffer_size"])
+                commands[f"txqueuelen {ifname}"] = constants.BUFFER_SIZE_OPTION.format(
+                    ifname, conn["buffer_size"]
                 )
 
             # impairments with tc command
             cmd = self.generate_tc_command(entity, ifname, conn)
             if len(cmd) > 0:
-                commands.append(cmd)
+                commands[f"netem {ifname}"] = cmd
 
         return commands
 
@@ -769,13 +887,13 @@ class Architecture:
     def generate_timers(self, entity: entities.Entity, entity_config) -> None:
         """Generate commands to handle the timers."""
 
-        connections = config_parser.extract_connections(entity_config)
+        connections = config_parser.extract_connection_specs(entity_config)
 
-        for conn in connections:
+        for path, conn in connections.items():
             if "timers" not in conn or conn["timers"] is None:
                 continue
 
-            first_hop = conn.split("->")[0] if "->" in conn else conn
+            first_hop = path.split("->")[0]
             if_id = self.get_interface_id(entity.name, first_hop)
             if if_id is None:
                 raise RuntimeError(
@@ -803,7 +921,7 @@ class Architecture:
                 command = next(
                     (
                         cmd
-                        for cmd in cmds
+                        for cmd in cmds.values()
                         if utils.filter_cmd(timer["option"], cmd, if_name)
                     ),
                     None,
@@ -815,23 +933,15 @@ class Architecture:
 
                 # generate new command
                 if "mtu" in command:
-                    cmd_modify = constants.MODIFY_IMPAIRMENT.format(
-                        timer["start"],
-                        constants.MTU_OPTION.format(if_name, timer["newValue"]),
-                    )
+                    cmd_modify = constants.MTU_OPTION.format(if_name, timer["newValue"])
                 elif "txqueuelen" in command:
-                    cmd_modify = constants.MODIFY_IMPAIRMENT.format(
-                        timer["start"],
-                        constants.BUFFER_SIZE_OPTION.format(if_name, timer["newValue"]),
-                    )
+                    cmd_modify = constants.BUFFER_SIZE_OPTION.format(if_name, timer["newValue"])
                 else:
                     connection = copy.deepcopy(conn)
                     connection[timer["option"]] = timer["newValue"]
                     cmd = self.generate_tc_command(entity, if_name, connection)
-                    cmd_modify = constants.MODIFY_IMPAIRMENT_DELETE_TC.format(
-                        timer["start"], if_name, cmd
-                    )
-                entity.add_command(cmd_modify, background=True)
+                    cmd_modify = constants.REPLACE_IMPAIRMENT.format(if_name, cmd)
+                entity.add_timer(timer["start"], cmd_modify)
 
                 # generate command to restore original value for impairment
                 if "duration" in timer:
@@ -841,7 +951,7 @@ class Architecture:
                     command = next(
                         (
                             cmd
-                            for cmd in cmds_reset
+                            for cmd in cmds_reset.values()
                             if utils.filter_cmd(timer["option"], cmd, if_name)
                         ),
                         None,
@@ -852,11 +962,46 @@ class Architecture:
                         )
 
                     if "tc" in command:
-                        cmd_reset = constants.MODIFY_IMPAIRMENT_DELETE_TC.format(
-                            timer["start"] + timer["duration"], if_name, command
-                        )
+                        cmd_reset = constants.REPLACE_IMPAIRMENT.format(if_name, command)
                     else:
-                        cmd_reset = constants.MODIFY_IMPAIRMENT.format(
-                            timer["start"] + timer["duration"], command
-                        )
-                    entity.add_command(cmd_reset, background=True)
+                        cmd_reset = command
+                    entity.add_timer(timer["start"] + timer["duration"], cmd_reset)
+
+    def generate_traces(self, entity: entities.Entity, entity_config) -> None:
+        """Generate the commands replaying the traces of the connections."""
+
+        connections = config_parser.extract_connection_specs(entity_config)
+
+        for path, conn in connections.items():
+            if "trace" not in conn:
+                continue
+
+            first_hop = path.split("->")[0]
+            if_id = self.get_interface_id(entity.name, first_hop)
+            if if_id is None:
+                raise RuntimeError(
+                    f"Unable to find interface for {entity.name} and {first_hop}"
+                )
+            if_name = utils.get_interface_name(if_id, entity.name)
+
+            # the path of the trace is relative to the configuration file
+            trace = conn["trace"]
+            trace_file = os.path.join(os.path.dirname(self.filename), trace["file"])
+            events = traces.playback(trace_file, conn, float(trace.get("step", 0)))
+            if len(events) > constants.TRACE_WARNING_EVENTS:
+                utils.print_warning(
+                    f"Trace {trace_file} of {entity.name} changes the impairments "
+                    f"{len(events)} times, it can be downsampled with a step"
+                )
+
+            # each change replaces the netem qdisc of the interface
+            for offset, connection in events:
+                cmd = self.generate_tc_command(entity, if_name, connection)
+                cmd_replace = cmd.replace(
+                    constants.IMPAIRMENT_OPTION.format(if_name),
+                    constants.TRACE_IMPAIRMENT.format(if_name),
+                    1,
+                )
+                entity.add_timer(
+                    round(float(trace.get("start", 0)) + offset, 3), cmd_replace
+                )
@@ -0,0 +1,95 @@
+"""
+Artifacts generated for an architecture, kept in memory until written by a sink.
+"""
+
+import io
+import os
+
+import constants
+
+
+def file_entity(filename: str) -> str:
+    """Return the entity owning a generated file named `<entity>_<kind>.yaml`."""
+    return os.path.splitext(filename)[0].rpartition("_")[0]
+
+
+def file_kind(filename: str) -> str:
+    """Return the kind of a generated file named `<entity>_<kind>.yaml`."""
+    return os.path.splitext(filename)[0].rpartition("_")[2]
+
+
+class Buffer(io.StringIO):
+    """In-memory file which stays readable after being closed."""
+
+    def close(self) -> None:
+        # exporters write artifacts inside `with` blocks: keep the content
+        pass
+
+
+class Artifacts:
+    """Generated files, indexed by their path relative to the output directory."""
+
+    def __init__(self) -> None:
+        self.files: dict[str, Buffer] = {}
+        # commands of each entity or network, in the order of the commands file
+        self.commands: dict[str, list[str]] = {}
+        # directories entirely owned by the generator (stale files are removed)
+        self.directories: set[str] = set()
+        # entities whose files are generated inside these directories
+        self.entities: set[str] = set()
+
+    def open(self, path: str, mode="w") -> Buffer:
+        """
+        Open the artifact at `path`.
+
+        :param path: Path of the artifact, relative to the output directory.
+        :param mode: "w" to replace the content of the artifact, "a" to append to it.
+        """
+
+        path = os.path.normpath(path)
+        if mode == "w" or path not in self.files:
+            self.files[path] = Buffer()
+        return self.files[path]
+
+    def add_commands(self, name: str, commands: list[str]) -> None:
+        """Record the `commands` written to configure the entity or network `name`."""
+        self.commands.setdefault(name, []).extend(commands)
+
+    def add_directory(self, path: str) -> None:
+        """Mark the directory at `path` as entirely generated."""
+        self.directories.add(os.path.normpath(path))
+
+    def add_entity(self, name: str) -> None:
+        """Mark the entity `name` as existing: its stale files are kept."""
+        self.entities.add(name)
+
+    def get(self, path: str) -> str | None:
+        """Return the content of the artifact at `path`, None if not generated."""
+
+        buffer = self.files.get(os.path.normpath(path))
+        return buffer.getvalue() if buffer is not None else None
+
+    def items(self) -> list[tuple[str, str]]:
+        """Return the path and the content of every artifact."""
+        return [(path, buffer.getvalue()) for path, buffer in self.files.items()]
+
+    @property
+    def compose(self) -> str | None:
+        """Docker Compose document, None if not generated."""
+        return self.get(constants.COMPOSE_FILE)
+
+    @property
+    def containerlab(self) -> str | None:
+        """containerlab topology, None if not generated."""
+        return self.get(constants.CONTAINERLAB_FILE)
+
+    @property
+    def manifests(self) -> dict[str, str]:
+        """Kubernetes manifests, indexed by their filename."""
+
+        folder = os.path.normpath(constants.K8S_EXPORT_FOLDER)
+        return {
+            os.path.basename(path): content
+            for path, content in self.items()
+            if os.path.dirname(path) == folder
+        }
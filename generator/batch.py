@@ -0,0 +1,180 @@
+"""
+Generate the configuration files of many architectures in parallel.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import traceback
+import contextlib
+import concurrent.futures
+
+import utils
+import generator
+import constants
+
+
+def check_arguments(args):
+    """
+    Check the arguments of the batch mode.
+    Unknown arguments are given to the generator for every configuration file.
+    """
+
+    parser = argparse.ArgumentParser(
+        epilog="Other arguments are given to the generator (e.g. --ip 6 --jaeger)."
+    )
+    parser.add_argument(
+        "configs", nargs="+", help="Paths or glob patterns of configuration files"
+    )
+    parser.add_argument(
+        "--output",
+        required=True,
+        help="Root directory in which one directory per configuration is created",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of configurations generated in parallel (default = number of cores)",
+    )
+
+    args, gen_args = parser.parse_known_args(args)
+
+    if "--watch" in gen_args:
+        parser.error("--watch cannot be used in batch mode")
+    if "--config" in gen_args:
+        parser.error("configuration files must be given as positional arguments")
+    if any(arg.startswith("--output-dir") for arg in gen_args):
+        parser.error("--output-dir is set by --output for every configuration")
+    if args.jobs <= 0:
+        parser.error("--jobs must be positive")
+
+    return args, gen_args
+
+
+def find_configs(patterns: list[str]) -> list[str]:
+    """Return the absolute paths of the configuration files matching `patterns`."""
+
+    configs = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if len(matches) == 0:
+            utils.print_warning(f'No configuration file matches "{pattern}"')
+        for match in matches:
+            path = os.path.abspath(match)
+            if path not in configs:
+                configs.append(path)
+    return configs
+
+
+def output_dirs(configs: list[str], root: str) -> list[str]:
+    """Return a unique output directory inside `root` for every configuration file."""
+
+    dirs: list[str] = []
+    for config in configs:
+        name = os.path.splitext(os.path.basename(config))[0]
+        path = os.path.join(root, name)
+        i = 1
+        while path in dirs:
+            path = os.path.join(root, f"{name}_{i}")
+            i += 1
+        dirs.append(path)
+    return dirs
+
+
+def generate_config(conf_file: str, output: str, gen_args: list[str]) -> dict:
+    """
+    Generate the configuration files for `conf_file` inside the `output` directory.
+    Executed in a worker process. Errors are caught and returned in the result.
+    """
+
+    result = {"config": conf_file, "output": output, "success": False, "error": None}
+    start = time.perf_counter()
+
+    os.makedirs(output, exist_ok=True)
+    log_file = os.path.join(output, constants.BATCH_LOG_FILE)
+
+    with open(log_file, "w", encoding="utf-8") as log:
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            try:
+                ret = generator.gen_config_files(
+                    ["--config", conf_file, "--output-dir", output, *gen_args]
+                )
+                result["success"] = ret == os.EX_OK
+                if not result["success"]:
+                    result["error"] = f"Generator returned {ret}"
+            except SystemExit as err:
+                result["error"] = f"Invalid arguments (exit code {err.code})"
+            except Exception as err:
+                traceback.print_exc()
+                result["error"] = f"{type(err).__name__}: {err}"
+
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def gen_batch(args=None) -> int:
+    """Generate configuration files for many configurations in parallel."""
+
+    print(constants.ASCII_ART)
+    print(f"MicroServices Topology Generator v{constants.VERSION} - batch mode\n\n")
+
+    args, gen_args = check_arguments(args)
+    configs = find_configs(args.configs)
+    if len(configs) == 0:
+        utils.print_error("No configuration file to generate")
+        return 1
+
+    root = os.path.abspath(args.output)
+    outputs = output_dirs(configs, root)
+    os.makedirs(root, exist_ok=True)
+
+    jobs = min(args.jobs, len(configs))
+    utils.print_info(
+        f"Generating {len(configs)} configuration(s) with {jobs} process(es)"
+    )
+
+    start = time.perf_counter()
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(generate_config, config, output, gen_args): (config, output)
+            for config, output in zip(configs, outputs)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            config, output = futures[future]
+            try:
+                res = future.result()
+            except Exception as err:
+                # worker crashed: do not abort the other configurations
+                res = {
+                    "config": config,
+                    "output": output,
+                    "success": False,
+                    "error": f"{type(err).__name__}: {err}",
+                    "time": 0.0,
+                }
+
+            if res["success"]:
+                utils.print_info(f"Generated {config} in {res['time']:.3f}s")
+            else:
+                utils.print_error(f"Failed to generate {config}: {res['error']}")
+            results.append(res)
+
+    results.sort(key=lambda res: configs.index(res["config"]))
+    utils.print_summary(results, "config")
+
+    summary = {"time": time.perf_counter() - start, "results": results}
+    path = os.path.join(root, constants.BATCH_SUMMARY_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    utils.print_info(f"Wrote summary to {path}")
+
+    return os.EX_OK if all(res["success"] for res in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(gen_batch(sys.argv[1:]))
@@ -2,88 +2,347 @@
 Export the architecture to the configuration file for Docker Compose.
 """
 
+import re
+import copy
+import json
+import math
+import yaml
+
 import utils
 import router
 import switch
 import exporter
 import services
 import firewall
+import manifest
+import artifacts
 import constants
 import architecture
 
+# printable strings written without quotes, unless they start with an indicator of
+# YAML, contain a comment or a key, or YAML resolves them to another type
+PLAIN_SCALAR = re.compile(r"(?![-?:,\[\]{}#&*!|>'\"%@`])[!-~]([ -~]*[!-~])?")
+# types resolved from the plain scalars, indexed by their first character
+IMPLICIT_RESOLVERS = yaml.resolver.Resolver.yaml_implicit_resolvers
+
+
+def to_scalar(value, scalars: dict) -> str:
+    """
+    Return the YAML representation of the scalar `value`. The representations of the
+    strings are cached in `scalars`.
+    """
+
+    kind = type(value)
+    if kind is str:
+        text = value
+        if (
+            PLAIN_SCALAR.fullmatch(value) is None
+            or ": " in value
+            or " #" in value
+            or value[-1] == ":"
+        ):
+            # a JSON string is a double-quoted YAML scalar
+            text = json.encoder.encode_basestring_ascii(value)
+        else:
+            resolvers = IMPLICIT_RESOLVERS.get(value[0])
+            if resolvers and any(regexp.match(value) for _, regexp in resolvers):
+                text = json.encoder.encode_basestring_ascii(value)
+        scalars[value] = text
+        return text
+    if value is None:
+        return "null"
+    if kind is bool:
+        return "true" if value else "false"
+    if kind is float:
+        if value != value:
+            return ".nan"
+        if value in (math.inf, -math.inf):
+            return ".inf" if value > 0 else "-.inf"
+        # YAML 1.1 only resolves the floats with a dot
+        text = repr(value)
+        return text if "." in text else text.replace("e", ".0e", 1)
+    if kind is dict or kind is list:
+        # empty collection
+        return "{}" if kind is dict else "[]"
+    return str(value)
+
+
+def write_mapping(data: dict, indent: str, scalars: dict, lines: list) -> None:
+    """
+    Append the lines of the mapping `data` of the Docker Compose document (dicts,
+    lists, and scalars) in block style to `lines`.
+    """
+
+    get = scalars.get
+    for key, value in data.items():
+        kind = type(value)
+        if kind is str:
+            lines.append(
+                f"{indent}{get(key) or to_scalar(key, scalars)}: "
+                f"{get(value) or to_scalar(value, scalars)}\n"
+            )
+        elif (kind is dict or kind is list) and value:
+            lines.append(f"{indent}{get(key) or to_scalar(key, scalars)}:\n")
+            if kind is dict:
+                write_mapping(value, indent + "  ", scalars, lines)
+            else:
+                write_sequence(value, indent + "  ", scalars, lines)
+        else:
+            lines.append(
+                f"{indent}{get(key) or to_scalar(key, scalars)}: "
+                f"{to_scalar(value, scalars)}\n"
+            )
+
+
+def write_sequence(data: list, indent: str, scalars: dict, lines: list) -> None:
+    """Append the lines of the sequence `data` in block style to `lines`."""
+
+    get = scalars.get
+    for value in data:
+        kind = type(value)
+        if kind is str:
+            lines.append(f"{indent}- {get(value) or to_scalar(value, scalars)}\n")
+        elif (kind is dict or kind is list) and value:
+            # the first line of the collection is written after the dash
+            start = len(lines)
+            if kind is dict:
+                write_mapping(value, indent + "  ", scalars, lines)
+            else:
+                write_sequence(value, indent + "  ", scalars, lines)
+            lines[start] = f"{indent}- {lines[start][len(indent) + 2 :]}"
+        else:
+            lines.append(f"{indent}- {to_scalar(value, scalars)}\n")
+
+
+def to_yaml(document: dict) -> str:
+    """
+    Return the Docker Compose `document` (dicts, lists, and scalars) in YAML, in block
+    style. The lines are written directly: PyYAML, even with libyaml, resolves the
+    type of every scalar in Python, which is several times slower.
+    """
+
+    lines: list = []
+    write_mapping(document, "", {}, lines)
+    return "".join(lines)
+
 
 class ComposeExporter(exporter.Exporter):
     """Export architecture to a Docker Compose configuration."""
 
-    def __init__(self, arch: architecture.Architecture, filename: str) -> None:
+    def __init__(
+        self, arch: architecture.Architecture, filename: str, host: int | None = None
+    ) -> None:
         """
         Export the architecture in the given file.
 
         :param arch: Architecture to export.
-        :param filename: Filename in which to write the architecture.
+        :param filename: Path of the artifact in which to write the architecture.
+        :param host: Index of the host whose entities are exported, None to export
+        every entity if the architecture is not partitioned (see `partition`).
         """
         super().__init__(arch)
         self.filename = filename
+        self.host = host
+
+    def on_host(self, entity) -> bool:
+        """True if the entity (entities.Entity) runs on the exported host."""
+        return self.host is None or entity.host == self.host
 
-    def write_entity_type(self, file, type) -> None:
-        """Write entities with the given `type` inside the given docker compose `file`."""
+    def write_entity_type(self, containers: dict, type) -> None:
+        """Add entities with the given `type` to the `containers` of the document."""
 
         for entity in self.arch.entities:
-            if isinstance(entity, type):
-                entity.export_compose(file)
-                file.write("\n")
+            if isinstance(entity, type) and self.on_host(entity):
+                entity.export_compose(containers, self.artifacts)
+                self.write_healthcheck(containers, entity)
+
+    def write_healthcheck(self, containers: dict, entity) -> None:
+        """Add the health check of the entity (entities.Entity) to its container."""
+
+        cmd = entity.health_command()
+        if entity.name in containers and cmd is not None:
+            containers[entity.name]["healthcheck"] = {
+                "test": ["CMD-SHELL", cmd],
+                **constants.COMPOSE_HEALTHCHECK,
+            }
+
+    def write_namespaces(self) -> None:
+        """Write the commands creating the intermediaries as network namespaces."""
+        utils.print_info("Writing network namespaces...")
+
+        with self.artifacts.open(constants.NETNS_CLEANUP_FILE) as f:
+            f.write("#!/bin/sh\n\n")
+        for entity in self.arch.entities:
+            if entity.netns() is not None:
+                entity.export_netns(self.artifacts, constants.NETNS_FORWARDING_SYSCTLS)
+
+    def write_pids(self) -> None:
+        """
+        Write the commands looking up the PIDs of the containers into which the veth
+        pairs are moved, once for every network.
+        """
 
-    def write_networks(self, file) -> None:
+        names: list[str] = []
+        for network in self.arch.networks:
+            for name in network.veth_containers(self.host):
+                if name not in names:
+                    names.append(name)
+        if len(names) == 0:
+            return
+
+        with self.artifacts.open(constants.COMMANDS_FILE, "a") as f:
+            f.write("\n# looking up the containers #\n")
+            for line in utils.lookup_pids(names):
+                f.write(f"{line}\n")
+
+    def write_networks(self, document: dict) -> None:
         """Write all the networks."""
         utils.print_info("Writing networks...")
-        if utils.is_using_jaeger() or self.arch.count_l3_networks() > 0:
-            file.write("networks:\n")
+        networks = {}
 
         if utils.topology_is_ipv4() and utils.is_using_jaeger():
-            file.write(constants.TELEMETRY_IPV4_NETWORK)
+            networks.update(copy.deepcopy(constants.TELEMETRY_IPV4_NETWORK))
         elif utils.is_using_jaeger():
-            file.write(constants.TELEMETRY_IPV6_NETWORK)
+            networks.update(copy.deepcopy(constants.TELEMETRY_IPV6_NETWORK))
 
         for network in self.arch.networks:
-            network.export_compose(file)
-            file.write("\n")
+            if any(self.on_host(iface.entity) for iface in network.interfaces):
+                network.export_compose(networks, self.artifacts, self.host)
+
+        # L2 networks only generate commands
+        if len(networks) > 0:
+            document["networks"] = networks
 
-    def write_containers(self, file) -> None:
+    def write_containers(self, document: dict) -> None:
         """Write the containers."""
         utils.print_info("Writing all the containers...")
-        file.write("services:\n")
+        containers = document.setdefault("services", {})
 
         # write jaeger if used
         if utils.is_using_jaeger():
-            file.write(constants.JAEGER_SERVICE)
+            containers.update(copy.deepcopy(constants.JAEGER_SERVICE))
             if utils.topology_is_ipv4():
-                file.write(constants.COMPOSE_JAEGER_IPV4)
+                address = constants.COMPOSE_JAEGER_IPV4
             else:
-                file.write(constants.COMPOSE_JAEGER_IPV6)
-            file.write("\n")
+                address = constants.COMPOSE_JAEGER_IPV6
+            containers["jaeger"]["networks"]["network_telemetry"] = dict(address)
 
         # write ioam collector if clt
         if utils.is_using_clt():
-            file.write(constants.IOAM_COLLECTOR_SERVICE)
+            containers.update(copy.deepcopy(constants.IOAM_COLLECTOR_SERVICE))
 
         # write other entities
-        file.write("\n")
         utils.print_info("Writing switches...")
-        self.write_entity_type(file, switch.Switch)
+        self.write_entity_type(containers, switch.Switch)
         utils.print_info("Writing routers...")
-        self.write_entity_type(file, router.Router)
+        self.write_entity_type(containers, router.Router)
         utils.print_info("Writing firewalls...")
-        self.write_entity_type(file, firewall.Firewall)
+        self.write_entity_type(containers, firewall.Firewall)
         utils.print_info("Writing services...")
-        self.write_entity_type(file, services.Service)
+        self.write_entity_type(containers, services.Service)
+
+        # namespaces are not containers: they are created by the commands file,
+        # and the containers of the other hosts are in other documents
+        if utils.is_using_netns() or self.host is not None:
+            for service in containers.values():
+                if "depends_on" not in service:
+                    continue
+                service["depends_on"] = [
+                    name for name in service["depends_on"] if name in containers
+                ]
+                if len(service["depends_on"]) == 0:
+                    del service["depends_on"]
+
+    def write_phase(self, name: str) -> None:
+        """
+        Start the phase `name` of the commands file (see `--phases`): its blocks run
+        once the blocks of the previous phases are done.
+        """
+
+        if utils.is_using_phases():
+            with self.artifacts.open(constants.COMMANDS_FILE, "a") as f:
+                f.write(f"\n{constants.PHASE_HEADER.format(name)}\n")
+
+    def write_impairments(self) -> None:
+        """Write the commands impairing the links, once every route is configured."""
+        utils.print_info("Writing impairments...")
+
+        self.write_phase("impairments")
+        for entity in self.arch.entities:
+            if self.on_host(entity):
+                entity.generate_impairments_file(self.artifacts)
+
+    def write_timelines(self) -> None:
+        """
+        Write the commands starting the timelines of the entities, once every entity
+        is configured, with a start shared by all of them.
+        """
+
+        entities = [e for e in self.arch.entities if self.on_host(e) and e.timers]
+        if len(entities) == 0:
+            return
+
+        self.write_phase("timers")
+        delay = 1 + len(entities) // constants.TIMELINE_START_RATE
+        with self.artifacts.open(constants.COMMANDS_FILE, "a") as f:
+            f.write("\n# starting the timelines #\n")
+            f.write(f"{constants.TIMELINE_START.format(delay)}\n")
+            for entity in entities:
+                f.write(f"{entity.start_timeline()}\n")
+
+    def write_wait_ready(self) -> None:
+        """
+        Write the script waiting until every entity is ready, by running the health
+        checks of the containers and namespaces until they pass.
+        """
 
-    def export(self):
+        with self.artifacts.open(constants.WAIT_READY_FILE) as f:
+            f.write("#!/bin/sh\n\n")
+            f.write(
+                f"{constants.WAIT_READY_START.format(constants.WAIT_READY_TIMEOUT)}\n"
+            )
+            f.write(f"{constants.WAIT_READY_FUNCTION}\n\n")
+            for entity in self.arch.entities:
+                cmd = entity.health_command()
+                if not self.on_host(entity) or cmd is None:
+                    continue
+                check = utils.generate_command(cmd, entity.name, False, entity.netns())
+                f.write(f"{constants.WAIT_READY_CHECK.format(entity.name, check)}\n")
+            f.write('echo "All entities are ready"\n')
+
+    def export(self) -> artifacts.Artifacts:
         # empty commands file
-        with open(constants.COMMANDS_FILE, "w", encoding="utf-8") as f:
+        with self.artifacts.open(constants.COMMANDS_FILE) as f:
             f.write("#!/bin/sh\n\n")
 
-        with open(self.filename, "w", encoding="utf-8") as f:
-            # need to export networks first because will add interfaces inside containers
-            # if interfaces are not added first, ip route command will fail in other entities
-            self.write_networks(f)
-            self.write_containers(f)
+        # namespaces are created before the networks in which they are moved
+        if utils.is_using_netns():
+            self.write_phase("namespaces")
+            self.write_namespaces()
+
+        # need to export networks first because will add interfaces inside containers
+        # if interfaces are not added first, ip route command will fail in other entities
+        document: dict = {}
+        self.write_phase("links")
+        if not utils.is_using_phases():
+            self.write_pids()
+        self.write_networks(document)
+        self.write_phase("routes")
+        self.write_containers(document)
+        if utils.is_using_phases():
+            self.write_impairments()
+        self.write_timelines()
+        self.write_wait_ready()
+
+        with self.artifacts.open(self.filename) as f:
+            if utils.compose_is_json():
+                # not indented: the C encoder of json is only used without indentation
+                f.write(json.dumps(document))
+                f.write("\n")
+            else:
+                f.write(to_yaml(document))
+
+        self.export_manifest(
+            manifest.compose_manifest(document, self.artifacts, self.arch)
+        )
+        return self.artifacts
@@ -2,6 +2,7 @@
 Configuration parser for MSTG.
 """
 
+import os
 import re
 import yaml
 import networkx as nx
@@ -330,6 +331,63 @@ def check_timers(entity, connection, field) -> bool:
     return True
 
 
+def check_trace(entity, connection, field) -> bool:
+    """Check the trace of a connection (its values are checked when it is read)."""
+
+    if field != "trace":
+        return True
+
+    trace = connection["trace"]
+    if not isinstance(trace, dict):
+        utils.print_error(
+            f"Trace of connection {connection} for {entity} must be a mapping"
+        )
+        return False
+
+    for expected_field in constants.TRACE_EXPECTED_FIELDS:
+        if expected_field not in trace:
+            utils.print_error(
+                f"Missing field {expected_field} for trace {trace} for connection {connection} of {entity}"
+            )
+            return False
+
+    for trace_field in trace:
+        if (
+            trace_field not in constants.TRACE_EXPECTED_FIELDS
+            and trace_field not in constants.TRACE_OPTIONAL_FIELDS
+        ):
+            utils.print_error(
+                f"Unexpected field {trace_field} for trace {trace} of connection {connection} for {entity}"
+            )
+            return False
+
+        if (
+            trace_field in constants.TRACE_OPTIONAL_FIELDS
+            and re.search(constants.TIMER_TIME_REGEX, str(trace[trace_field])) is None
+        ):
+            utils.print_error(
+                f"{trace_field} must be specified as an integer/float "
+                f"amount of seconds for trace {trace} of connection {connection} for {entity}"
+            )
+            return False
+
+    if os.path.splitext(str(trace["file"]))[1] not in constants.TRACE_FORMATS:
+        utils.print_error(
+            f"File of trace {trace} of connection {connection} for {entity} "
+            f"must be one of {', '.join(constants.TRACE_FORMATS)}"
+        )
+        return False
+
+    # both would replace the netem qdisc of the interface
+    if connection.get("timers") is not None:
+        utils.print_error(
+            f"Connection {connection} of {entity} cannot have both timers and a trace"
+        )
+        return False
+
+    return True
+
+
 def check_connection_specifications(name: str, entity, connections: list) -> bool:
     """
     Check the `connections` specified for the `entity` with the given `name`.
@@ -371,6 +429,9 @@ def check_connection_specifications(name: str, entity, connections: list) -> boo
                     )
                     return False
 
+                if not check_trace(entity, connection, field):
+                    return False
+
             # Check all impairments
             if not check_impairments(entity, connection, field):
                 return False
@@ -553,7 +614,9 @@ def extract_connections(entity_config) -> list:
 
     entity_type = entity_config["type"]
 
-    if entity_type in ("router", "external", "firewall", "switch"):
+    if entity_type == "external":
+        return [conn["path"] for conn in entity_config.get("connections") or []]
+    if entity_type in ("router", "firewall", "switch"):
         if "neighbors" in entity_config:
             conns = entity_config["neighbors"]
             if conns:
@@ -570,6 +633,121 @@ def extract_connections(entity_config) -> list:
     return []
 
 
+def extract_connection_specs(entity_config) -> dict[str, Any]:
+    """
+    Extract the specifications of the connections from the given `entity_config`.
+    Return dict mapping the path (or next hop) of each connection to its specification.
+    """
+
+    specs: dict[str, Any] = {}
+    entity_type = entity_config["type"]
+
+    if entity_type in ("router", "external", "firewall", "switch"):
+        key = "connections" if entity_type == "external" else "neighbors"
+        for conn in entity_config.get(key) or []:
+            if isinstance(conn, dict):
+                specs[conn["hop"] if "hop" in conn else conn["path"]] = conn
+            else:
+                specs[conn] = {}
+    elif entity_type == "service":
+        for endpoint in entity_config["endpoints"]:
+            for conn in endpoint.get("connections") or []:
+                specs[conn["path"]] = conn
+
+    return specs
+
+
+def strip_connections(entity_config) -> dict[str, Any]:
+    """Return the given `entity_config` without the fields describing connections."""
+
+    fields = ("neighbors", "connections")
+    stripped = {k: v for k, v in entity_config.items() if k not in fields}
+    if "endpoints" in stripped:
+        stripped["endpoints"] = [
+            {k: v for k, v in endpoint.items() if k != "connections"}
+            for endpoint in stripped["endpoints"]
+        ]
+    return stripped
+
+
+def strip_impairments(entity_config, fields: list[str]) -> dict[str, Any]:
+    """Return the given `entity_config` without the `fields` of its connections."""
+
+    def strip(conn):
+        if not isinstance(conn, dict):
+            return conn
+        return {k: v for k, v in conn.items() if k not in fields}
+
+    stripped = dict(entity_config)
+    for key in ("neighbors", "connections"):
+        if isinstance(stripped.get(key), list):
+            stripped[key] = [strip(conn) for conn in stripped[key]]
+    if "endpoints" in stripped:
+        stripped["endpoints"] = [
+            {
+                k: [strip(conn) for conn in v] if k == "connections" and v else v
+                for k, v in endpoint.items()
+            }
+            for endpoint in stripped["endpoints"]
+        ]
+    return stripped
+
+
+class ConfigDiff:
+    """Represent the differences between two configurations."""
+
+    def __init__(self, old, new):
+        """
+        Compute the differences between the configurations `old` and `new`.
+
+        :param old: Previously loaded YAML configuration.
+        :param new: Newly loaded YAML configuration.
+        """
+        self.added = [name for name in new if name not in old]
+        self.removed = [name for name in old if name not in new]
+        # entities whose properties (other than connections) changed
+        self.modified: list[str] = []
+        # connections that changed for each entity
+        self.connections: dict[str, list[str]] = {}
+
+        for name in new:
+            if name not in old or old[name] == new[name]:
+                continue
+
+            old_specs = extract_connection_specs(old[name])
+            new_specs = extract_connection_specs(new[name])
+            changed = [
+                conn
+                for conn in {**old_specs, **new_specs}
+                if old_specs.get(conn) != new_specs.get(conn)
+            ]
+            if changed:
+                self.connections[name] = changed
+
+            if (
+                strip_connections(old[name]) != strip_connections(new[name])
+                or not changed
+            ):
+                self.modified.append(name)
+
+    def is_empty(self) -> bool:
+        """True if both configurations are identical."""
+        return not (self.added or self.removed or self.modified or self.connections)
+
+    def string(self, separator) -> str:
+        """String representation of the differences."""
+        lines = []
+        lines.extend(f"added entity {name}" for name in self.added)
+        lines.extend(f"removed entity {name}" for name in self.removed)
+        lines.extend(f"modified entity {name}" for name in self.modified)
+        for name, conns in self.connections.items():
+            lines.extend(f"modified connection {conn} of {name}" for conn in conns)
+        return separator.join(lines)
+
+    def __str__(self) -> str:
+        return self.string(" - ")
+
+
 # From https://gist.github.com/pypt/94d747fe5180851196eb
 # Check that keys are unique when loading yaml
 class UniqueKeyLoader(yaml.SafeLoader):
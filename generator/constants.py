@@ -3,9 +3,16 @@ Constants used in MSTG.
 """
 
 import os
+import yaml
 from pathlib import Path
 from string import Template
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader
+
 
 def read_file(path: str) -> str:
     """Read file at given `path`."""
@@ -13,6 +20,11 @@ def read_file(path: str) -> str:
         return f.read()
 
 
+def read_yaml(path: str):
+    """Read the YAML document in the file at given `path`."""
+    return yaml.load(read_file(path), Loader=YamlLoader)
+
+
 # --------------------------------------------------------------------------------------------------
 
 VERSION = "0.0.11"
@@ -20,6 +32,74 @@ VERSION = "0.0.11"
 DEFAULT_CONFIG_FILE = "./config.yaml"
 
 COMMANDS_FILE = "./commands.sh"
+# with --phases, the blocks of the commands file are grouped in phases separated by
+# barriers, in which they can be run in parallel (see `runner`)
+COMMANDS_PHASES = ["namespaces", "links", "routes", "impairments", "timers"]
+PHASE_HEADER = "# phase {} #"
+# settings impairing the links of an entity, applied in the last phase with the timers
+IMPAIRMENT_SETTINGS = ["mtu", "txqueuelen", "netem"]
+# timings of the blocks run by the runner
+RUNNER_LOG_FILE = "./commands_timings.json"
+# with --batch-files, the commands of `ip` and `tc` of each entity are written in a
+# batch file per tool, run by a single invocation of the tool
+BATCH_FILES_FOLDER = "./batch_files"
+# removes the network namespaces and OVS bridges created by the commands file
+NETNS_CLEANUP_FILE = "./netns_cleanup.sh"
+# waits until the health check of every entity passes, once the commands file is run
+WAIT_READY_FILE = "./wait_ready.sh"
+
+# containerlab topology: containers linked by veth pairs instead of Docker networks
+CONTAINERLAB_FILE = "./topology.clab.yaml"
+CONTAINERLAB_LAB_NAME = "mstg"
+
+COMPOSE_FILE = "./docker-compose.yaml"
+# with --hosts, the files of each host are generated in a directory per host
+HOST_FOLDER = "./host_{}"
+# quality of the partition of the architecture across the hosts (see `partition`)
+PARTITION_FILE = "./partition.json"
+# formats of the Docker Compose file (JSON is a subset of YAML, parsed faster)
+COMPOSE_FORMATS = ["yaml", "json"]
+
+ARCHITECTURE_GRAPH_FILE = "./architecture.svg"
+# units generated with the hash of their content (see `manifest`)
+MANIFEST_FILE = "./manifest.json"
+# incremented when the content of the snapshots changes (see `snapshot`)
+SNAPSHOT_FORMAT = 5
+# commands updating a running topology (see `delta`)
+LIVE_UPDATE_FILE = "./live_update.sh"
+
+# interval (in seconds) between two checks of the config file in watch mode
+WATCH_INTERVAL = 1
+
+# output of the generator for each configuration in batch mode
+BATCH_LOG_FILE = "generator.log"
+BATCH_SUMMARY_FILE = "summary.json"
+
+# variants of flags generated in matrix mode (same as targets of the Makefile)
+MATRIX_VARIANTS = {
+    "ipv4": ["--ip", "4"],
+    "ipv4_https": ["--ip", "4", "--https"],
+    "ipv4_jaeger": ["--ip", "4", "--jaeger"],
+    "ipv4_jaeger_https": ["--ip", "4", "--jaeger", "--https"],
+    "ipv6": ["--ip", "6"],
+    "ipv6_https": ["--ip", "6", "--https"],
+    "ipv6_jaeger": ["--ip", "6", "--jaeger"],
+    "ipv6_jaeger_https": ["--ip", "6", "--jaeger", "--https"],
+    "ipv6_ioam": ["--ip", "6", "--ioam"],
+    "ipv6_ioam_jaeger": ["--ip", "6", "--ioam", "--jaeger"],
+    "clt": ["--ip", "6", "--clt", "--jaeger"],
+    "clt_https": ["--ip", "6", "--clt", "--jaeger", "--https"],
+    "k8s_ipv4": ["--ip", "4", "--kubernetes"],
+    "k8s_ipv4_https": ["--ip", "4", "--kubernetes", "--https"],
+    "k8s_ipv4_jaeger": ["--ip", "4", "--kubernetes", "--jaeger"],
+    "k8s_ipv4_jaeger_https": ["--ip", "4", "--kubernetes", "--jaeger", "--https"],
+    "k8s_ipv6": ["--ip", "6", "--kubernetes"],
+    "k8s_ipv6_https": ["--ip", "6", "--kubernetes", "--https"],
+    "k8s_ipv6_jaeger": ["--ip", "6", "--kubernetes", "--jaeger"],
+    "k8s_ipv6_jaeger_https": ["--ip", "6", "--kubernetes", "--jaeger", "--https"],
+    "k8s_clt": ["--ip", "6", "--kubernetes", "--clt", "--jaeger"],
+    "k8s_clt_https": ["--ip", "6", "--kubernetes", "--clt", "--jaeger", "--https"],
+}
 
 # ------------------------------------ IOAM TRACE TYPE CONFIGURATION -------------------------------
 
@@ -47,6 +127,10 @@ IOAM_BIT22 = False
 # --------------------------------------- ENV. VARIABLES -------------------------------------------
 
 DEBUG_VAR_ENV = "DEBUG"
+WATCH_ENV = "WATCH"
+MATRIX_ENV = "MATRIX"
+MATRIX_VARIANTS_ENV = "MATRIX_VARIANTS"
+OUTPUT_DIR_ENV = "OUTPUT_DIR"
 HTTP_VER_ENV = "HTTP_VER"
 K8S_OUT_ENV = "K8S_OUT_ENV"
 CLT_ENABLE_ENV = "CLT_ENABLE"
@@ -54,7 +138,29 @@ IP_VERSION_ENV = "IP_VERSION"
 IOAM_ENABLE_ENV = "IOAM_OUT_ENV"
 JAEGER_ENABLE_ENV = "JAEGER_ENABLE"
 COMPOSE_OUT_ENV = "COMPOSE_OUT_ENV"
+CLAB_OUT_ENV = "CLAB_OUT_ENV"
+NETNS_ENV = "NETNS"
+HOSTS_ENV = "HOSTS"
+SINGLE_EXEC_ENV = "SINGLE_EXEC"
+PHASES_ENV = "PHASES"
+BATCH_FILES_ENV = "BATCH_FILES"
 OUTPUT_FORMAT_ENV = "OUTPUT_FORMAT_ENV"
+COMPOSE_FORMAT_ENV = "COMPOSE_FORMAT"
+K8S_LAYOUT_ENV = "K8S_LAYOUT"
+K8S_PLACEMENT_ENV = "K8S_PLACEMENT"
+SNAPSHOT_ENV = "SNAPSHOT"
+FROM_SNAPSHOT_ENV = "FROM_SNAPSHOT"
+LIVE_UPDATE_ENV = "LIVE_UPDATE"
+# flags used to build the architecture, the other ones are only used by the exporters
+SNAPSHOT_FLAGS = [
+    IP_VERSION_ENV,
+    OUTPUT_FORMAT_ENV,
+    IOAM_ENABLE_ENV,
+    CLT_ENABLE_ENV,
+    NETNS_ENV,
+    HOSTS_ENV,
+    K8S_PLACEMENT_ENV,
+]
 
 # --------------------------------------- TEMPLATES -----------------------------------------------
 
@@ -67,45 +173,101 @@ SWITCH_NET_NAME = "network_switch_{}"
 
 DOCKER_CMD = "docker exec {} sh -c '{}'"
 DOCKER_CMD_BACKGROUND = "docker exec -d {} sh -c '{}'"
+# intermediaries created as network namespaces (or in the host namespace for switches)
+NETNS_CMD = "ip netns exec {} sh -c '{}'"
+NETNS_CMD_BACKGROUND = "ip netns exec {} sh -c '{}' &"
+HOST_CMD_BACKGROUND = "sh -c '{}' &"
+# containerlab runs the `exec` commands of a node without a shell
+CLAB_EXEC_CMD = "sh -c '{}'"
+CLAB_BACKGROUND_CMD = "{} > /dev/null 2>&1 &"
 KUBECTL_CMD = "kubectl exec {} -- bash -c '{}'"
+# the commands of a pod wait for the interfaces created by meshnet cni, polled every
+# K8S_INTERFACES_POLL seconds during at most K8S_INTERFACES_TIMEOUT seconds
+K8S_INTERFACE_READY = "[ -e /sys/class/net/{} ]"
+K8S_WAIT_INTERFACES = (
+    "i=0; until {0} || [ $i -ge {1} ]; do sleep {2}; i=$((i + 1)); done; "
+    '[ $i -lt {1} ] || echo "interfaces {3} not ready after {4}s" >&2;'
+)
+K8S_INTERFACES_POLL = 0.1
+K8S_INTERFACES_TIMEOUT = 60
+# with --single-exec, the commands of an entity are run by a single script read
+# from a here-document, which stops at the first failing command and reports it
+DOCKER_SCRIPT_CMD = "docker exec -i {} sh -s <<'{}'"
+NETNS_SCRIPT_CMD = "ip netns exec {} sh -s <<'{}'"
+SCRIPT_END = "MSTG_EOF"
+SCRIPT_CHECKED_CMD = "{} || {{ status=$?; echo {} >&2; exit $status; }}"
 CMD_INLINE_SYSCTL = """for sInterface in /proc/sys/net/ipv6/conf/*; do name=$(basename $sInterface); sysctl -q -w net.ipv6.conf.$name.ioam6_enabled=1; sysctl -q -w net.ipv6.conf.$name.ioam6_id={}; done"""
 
+# -- health checks --
+
+# an entity is ready once its routes are installed, and a service once it answers
+IPV6_ROUTE_CHECK = "ip -6 r show {} | grep -q ."
+IPV4_ROUTE_CHECK = "ip r show {} | grep -q ."
+HTTP_PROBE = "wget -q -T 2 -O /dev/null {}{}://localhost:{}{}"
+HTTPS_PROBE_FLAG = "--no-check-certificate "
+# the routes are installed by the commands file once the containers are started:
+# checked often until then, and rarely afterwards since probes go through the links
+COMPOSE_HEALTHCHECK = {
+    "interval": "30s",
+    "timeout": "5s",
+    "retries": 3,
+    "start_period": "5m",
+    "start_interval": "1s",
+}
+# seconds to wait for the entities, unless given as argument of the script
+WAIT_READY_TIMEOUT = 120
+WAIT_READY_START = "timeout=${{1:-{}}}"
+WAIT_READY_FUNCTION = """end=$(($(date +%s) + timeout))
+ready() {
+    name=$1
+    shift
+    until "$@" > /dev/null 2>&1; do
+        if [ "$(date +%s)" -ge "$end" ]; then
+            echo "$name is not ready after ${timeout}s" >&2
+            exit 1
+        fi
+        sleep 0.2
+    done
+}"""
+WAIT_READY_CHECK = "ready {} {}"
+
 # -- compose --
 
+# structured templates: ${placeholders} are substituted by utils.fill_template
 TEMPLATE_COMPOSE_FOLDER = os.path.join(Path(__file__).parent, "templates/compose")
-ROUTER_TEMPLATE = Template(
-    read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "router-template.yaml"))
+ROUTER_TEMPLATE = read_yaml(
+    os.path.join(TEMPLATE_COMPOSE_FOLDER, "router-template.yaml")
 )
-SERVICE_TEMPLATE = Template(
-    read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "service-template.yaml"))
+SERVICE_TEMPLATE = read_yaml(
+    os.path.join(TEMPLATE_COMPOSE_FOLDER, "service-template.yaml")
 )
-EXTERNAL_TEMPLATE = Template(
-    read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "external-template.yaml"))
+EXTERNAL_TEMPLATE = read_yaml(
+    os.path.join(TEMPLATE_COMPOSE_FOLDER, "external-template.yaml")
 )
-FIREWALL_TEMPLATE = Template(
-    read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "firewall-template.yaml"))
+FIREWALL_TEMPLATE = read_yaml(
+    os.path.join(TEMPLATE_COMPOSE_FOLDER, "firewall-template.yaml")
 )
-SWITCH_TEMPLATE = Template(
-    read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "switch-template.yaml"))
+SWITCH_TEMPLATE = read_yaml(
+    os.path.join(TEMPLATE_COMPOSE_FOLDER, "switch-template.yaml")
 )
-JAEGER_SERVICE = read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "jaeger-service.yaml"))
-IOAM_COLLECTOR_SERVICE = read_file(
+JAEGER_SERVICE = read_yaml(os.path.join(TEMPLATE_COMPOSE_FOLDER, "jaeger-service.yaml"))
+IOAM_COLLECTOR_SERVICE = read_yaml(
     os.path.join(TEMPLATE_COMPOSE_FOLDER, "ioam-collector-ipv6.yaml")
 )
 
 # ipv4
-NETWORK_IPV4_TEMPLATE = Template(
-    read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "network-template-ipv4.yaml"))
+NETWORK_IPV4_TEMPLATE = read_yaml(
+    os.path.join(TEMPLATE_COMPOSE_FOLDER, "network-template-ipv4.yaml")
 )
-TELEMETRY_IPV4_NETWORK = read_file(
+TELEMETRY_IPV4_NETWORK = read_yaml(
     os.path.join(TEMPLATE_COMPOSE_FOLDER, "telemetry-network-ipv4.yaml")
 )
 
 # ipv6
-NETWORK_IPV6_TEMPLATE = Template(
-    read_file(os.path.join(TEMPLATE_COMPOSE_FOLDER, "network-template-ipv6.yaml"))
+NETWORK_IPV6_TEMPLATE = read_yaml(
+    os.path.join(TEMPLATE_COMPOSE_FOLDER, "network-template-ipv6.yaml")
 )
-TELEMETRY_IPV6_NETWORK = read_file(
+TELEMETRY_IPV6_NETWORK = read_yaml(
     os.path.join(TEMPLATE_COMPOSE_FOLDER, "telemetry-network-ipv6.yaml")
 )
 
@@ -138,13 +300,13 @@ TEMPLATE_MESHNET_INTERFACE = Template(
 # --------------------------------------- SYSCTL ---------------------------------------------------
 
 # IOAM/CLT in docker compose
-COMPOSE_SYSCTL_DEFAULTS = """
-      - net.ipv6.ioam6_id=${ioam_id}
-      - net.ipv6.conf.all.ioam6_id=${ioam_id}
-      - net.ipv6.conf.default.ioam6_id=${ioam_id}
-      - net.ipv6.conf.all.ioam6_enabled=1
-      - net.ipv6.conf.default.ioam6_enabled=1
-"""
+COMPOSE_SYSCTL_DEFAULTS = [
+    "net.ipv6.ioam6_id=${ioam_id}",
+    "net.ipv6.conf.all.ioam6_id=${ioam_id}",
+    "net.ipv6.conf.default.ioam6_id=${ioam_id}",
+    "net.ipv6.conf.all.ioam6_enabled=1",
+    "net.ipv6.conf.default.ioam6_enabled=1",
+]
 
 # IOAM/CLT in k8s
 K8S_SYSCTL_DEFAULTS = """
@@ -197,15 +359,51 @@ LAUNCH_BACKGROUND_PROCESS = "tail -f /dev/null"
 OVS_CHECK_CMD = "lsmod | awk '{print $1}' | grep -i openvswitch"
 OVS_ENABLE_SERVICE = "service openvswitch-switch start"
 OVS_ADD_BRIDGE = "ovs-vsctl add-br {}"
-OVS_ADD_PORT = "ovs-vsctl add-port {} {}"
-OVS_ADD_PORT_VLAN = "ovs-vsctl add-port {} {} tag={}"
+OVS_DELETE_BRIDGE = "ovs-vsctl --if-exists del-br {}"
+# the bridge of a switch, its ports and their VLAN tags are created by a single
+# transaction of OVSDB, once every link is created
+OVS_TRANSACTION = "ovs-vsctl {}"
+OVS_TRANSACTION_SEPARATOR = " -- "
+OVS_MAY_ADD_BRIDGE = "--may-exist add-br {}"
+OVS_ADD_PORT = "add-port {} {}"
+OVS_ADD_PORT_VLAN = "add-port {} {} tag={}"
 
 LINUX_CREATE_VETH = "ip link add {} type veth peer name {}"
-LINUX_MOVE_VETH_TO_NS = "ip link set {} netns $pid"
+# links crossing two hosts, encapsulated in UDP between the addresses of the hosts
+LINUX_CREATE_VXLAN = "ip link add {} type vxlan id {} remote {} dstport {}"
+VXLAN_PORT = 4789
+LINUX_MOVE_VETH_TO_NS = "ip link set {} netns ${}"
 LINUX_SET_LINK_UP = "ip link set {} up"
 LINUX_SET_IP_ADDRESS = "ip addr add {} dev {}"
-
-DOCKER_GET_PID = Template("""docker inspect -f '{{.State.Pid}}' ${name}""")
+LINUX_SET_MAC_ADDRESS = "ip link set dev {} address {}"
+LINUX_MOVE_VETH_TO_NETNS = "ip link set {} netns {}"
+LINUX_ADD_NETNS = "ip netns add {}"
+LINUX_DELETE_NETNS = "ip netns del {}"
+# `ip netns exec` mounts the files of /etc/netns/<name> over the ones of /etc
+NETNS_CREATE_HOSTS = "mkdir -p /etc/netns/{0} && : > /etc/netns/{0}/hosts"
+NETNS_ADD_HOST = 'echo "{} {}" >> /etc/netns/{}/hosts'
+NETNS_DELETE_CONFIG = "rm -rf /etc/netns/{}"
+LINUX_SET_SYSCTL = "sysctl -q -w {}"
+NETNS_FORWARDING_SYSCTLS = [
+    "net.ipv6.conf.all.forwarding=1",
+    "net.ipv4.conf.all.forwarding=1",
+]
+LINUX_ADD_HOST = 'echo "{} {}" >> /etc/hosts'
+
+# the PIDs of the containers are looked up by a single `docker inspect`, and stored in
+# a variable per container
+DOCKER_GET_PIDS = "docker inspect -f '{{{{.Name}}}} {{{{.State.Pid}}}}' {}"
+PID_LOOKUP_START = "while read -r name pid; do case $name in"
+PID_LOOKUP_CASE = "/{}) {}=$pid ;;"
+PID_LOOKUP_END = "esac; done <<{}"
+# batch files are given on the standard input of the containers, and read by the tools
+# in the network namespaces, which go on after a failing command
+BATCH_TOOLS = ["ip", "tc"]
+DOCKER_BATCH_CMD = "docker exec -i {} {} -force -batch - < {}"
+NETNS_BATCH_CMD = "ip netns exec {} {} -force -batch {}"
+HOST_BATCH_CMD = "{} -force -batch {}"
+# host commands of `ip` run by a single process, which goes on after a failing one
+IP_BATCH_CMD = "ip -force -batch - <<{}"
 
 # --------------------------------------- FOR PARSING THE CONFIG -----------------------------------
 
@@ -264,7 +462,7 @@ CONNECTION_IMPAIRMENTS = [
     "reorder",
     "timers",
 ]
-CONNECTION_OPTIONAL_FIELDS = ["hop", "vlan"]
+CONNECTION_OPTIONAL_FIELDS = ["hop", "vlan", "trace"]
 CONNECTION_OPTIONAL_FIELDS.extend(CONNECTION_IMPAIRMENTS)
 
 # -- options and timers --
@@ -274,7 +472,35 @@ MTU_OPTION = "ip link set dev {} mtu {}"
 BUFFER_SIZE_OPTION = "ip link set dev {} txqueuelen {}"
 IMPAIRMENT_OPTION = "tc qdisc add dev {} root netem"
 MODIFY_IMPAIRMENT = "sleep {} && {}"
-MODIFY_IMPAIRMENT_DELETE_TC = "sleep {} && tc qdisc del dev {} root && {}"
+REPLACE_IMPAIRMENT = "tc qdisc del dev {} root && {}"
+# with Docker Compose, the timers of an entity are run by a single scheduler, at their
+# offset from a start shared by every entity, each one logged with its time
+TIMELINES_FOLDER = "./timelines"
+TIMELINE_FILE = "/tmp/mstg_timeline.sh"
+TIMELINE_LOG = "/tmp/mstg_timeline_{}.log"
+TIMELINE_FUNCTION = """at() {
+    offset=$1
+    now=$(date +%s.%N)
+    sleep "$(awk -v start="$start" -v offset="$offset" -v now="$now" 'BEGIN { d = start + offset - now; printf "%.3f", (d > 0 ? d : 0) }')"
+    sh -c "$2"
+    status=$?
+    echo "$(date +%s.%N) $offset $status $2" >> "$log"
+}"""
+TIMELINE_EVENT = "at {} {}"
+DOCKER_COPY_TIMELINE = "docker exec -i {} sh -c 'cat > {}' < {}"
+# the start is given by the commands file, once every timeline is copied
+TIMELINE_START = "start=$(($(date +%s) + {}))"
+# timelines started per second, to leave the time to start all of them before the start
+TIMELINE_START_RATE = 10
+DOCKER_TIMELINE_CMD = "docker exec -d {} sh {} $start"
+NETNS_TIMELINE_CMD = "ip netns exec {} sh {} $start &"
+HOST_TIMELINE_CMD = "sh {} $start &"
+# commands to modify the properties of the connections of a running container
+CHANGE_IMPAIRMENT = "tc qdisc change dev {} root netem"
+DELETE_IMPAIRMENT = "tc qdisc del dev {} root"
+# properties of the interfaces when not set in the connections
+DEFAULT_MTU = 1500
+DEFAULT_TXQUEUELEN = 1000
 
 # regex to match iproute2 `tc` specifications
 TC_PERCENTAGE_REGEX = r"\A([0-9]{1,2}|100)%\Z"
@@ -286,6 +512,25 @@ TIMER_EXPECTED_FIELDS = ["option", "start", "newValue"]
 TIMER_OPTIONAL_FIELDS = ["duration"]
 TIMER_TIME_REGEX = r"\A(?=.)(([0-9]*)(\.([0-9]+))?)\Z"
 
+# traces: time series of the netem impairments of a connection, in CSV or Parquet
+TRACE_EXPECTED_FIELDS = ["file"]
+TRACE_OPTIONAL_FIELDS = ["start", "step"]
+TRACE_TIME_COLUMN = "time"
+TRACE_IMPAIRMENTS = [
+    "rate",
+    "delay",
+    "jitter",
+    "loss",
+    "corrupt",
+    "duplicate",
+    "reorder",
+]
+TRACE_FORMATS = [".csv", ".parquet"]
+# the netem qdisc is replaced in a single operation, even if it does not exist yet
+TRACE_IMPAIRMENT = "tc qdisc replace dev {} root netem"
+# events of a trace above which it should be downsampled with `step`
+TRACE_WARNING_EVENTS = 10000
+
 # --------------------------------------- HTTPS ----------------------------------------------------
 
 PATH_CERTIFICATE = "/server.crt"
@@ -293,28 +538,47 @@ PATH_KEY_FILE = "/server.key"
 
 # --------------------------------------- COMPOSE --------------------------------------------------
 
-COMPOSE_IPV4_NET_SPEC = Template("""
-      ${net_name}:
-        ipv4_address: ${ip}
-        mac_address: ${mac}
-        interface_name: ${ifname}
-""")
+COMPOSE_IPV4_NET_SPEC = {
+    "ipv4_address": "${ip}",
+    "mac_address": "${mac}",
+    "interface_name": "${ifname}",
+}
 
-COMPOSE_IPV6_NET_SPEC = Template("""
-      ${net_name}:
-        ipv6_address: ${ip}
-        mac_address: ${mac}
-        interface_name: ${ifname}
-""")
+COMPOSE_IPV6_NET_SPEC = {
+    "ipv6_address": "${ip}",
+    "mac_address": "${mac}",
+    "interface_name": "${ifname}",
+}
 
-COMPOSE_JAEGER_IPV4 = """        ipv4_address: 0.0.4.2"""
-COMPOSE_JAEGER_IPV6 = """        ipv6_address: ::1:0:0:0:2"""
+COMPOSE_JAEGER_IPV4 = {"ipv4_address": "0.0.4.2"}
+COMPOSE_JAEGER_IPV6 = {"ipv6_address": "::1:0:0:0:2"}
 
 # --------------------------------------- KUBERNETES -----------------------------------------------
 
 K8S_DEFAULT_NODE_PORT_MIN = 30000
 K8S_DEFAULT_NODE_PORT_MAX = 32767
 K8S_EXPORT_FOLDER = "./k8s_configs"  # do NOT put a '/' at the end
+# layouts of the manifests: one file per object, a single multi-document file, or
+# one file per object listed in order by a kustomization
+K8S_LAYOUTS = ["files", "bundle", "kustomize"]
+# placement of the pods: by the scheduler, or on the node of their group of
+# entities in the partition of the architecture (see `partition`)
+K8S_PLACEMENTS = ["scheduler", "topology"]
+# node affinity of a pod placed by the generator (inside the spec of the pod)
+K8S_POD_AFFINITY = """  affinity:
+    nodeAffinity:
+      requiredDuringSchedulingIgnoredDuringExecution:
+        nodeSelectorTerms:
+          - matchExpressions:
+              - key: kubernetes.io/hostname
+                operator: In
+                values:
+                  - ${node}
+"""
+K8S_BUNDLE_FILE = "bundle.yaml"
+K8S_KUSTOMIZATION_FILE = "kustomization.yaml"
+# kinds of manifests, in the order in which they must be applied
+K8S_MANIFEST_KINDS = ["meshnet", "pod", "service"]
 
 K8S_GET_SERVICE_IP_RANGE_CMD = (
     "kubectl cluster-info dump | grep -m 1 service-cluster-ip-range | "
@@ -329,6 +593,13 @@ K8S_KUBECTL_CHECK_EXEC = "which kubectl"
 K8S_KUBECTL_GET_CONFIG = "kubectl config view"
 K8S_KUBECTL_GET_CLUSTER_INFO = "kubectl cluster-info"
 K8S_KUBECTL_GET_NODES_COUNT = "kubectl get nodes | wc -l"
+# name, unschedulable, and taints of each node, one node per line
+K8S_KUBECTL_GET_NODES = (
+    "kubectl get nodes -o jsonpath='{range .items[*]}{.metadata.name} "
+    '{.spec.unschedulable} {.spec.taints[*].effect}{"\\n"}{end}\''
+)
+# nodes with these taints do not run the pods
+K8S_UNSCHEDULABLE_TAINTS = ["NoSchedule", "NoExecute"]
 
 K8S_JAEGER_HOSTNAME = "jaeger-pod.jaeger-svc.default.svc.cluster.local"
 K8S_COLLECTOR_HOSTNAME = (
@@ -0,0 +1,153 @@
+"""
+Export the architecture to a containerlab topology file.
+"""
+
+import copy
+
+import utils
+import network
+import exporter
+import manifest
+import artifacts
+import constants
+import architecture
+from compose_exporter import to_yaml
+
+
+def containerlab_node(service: dict) -> dict:
+    """Convert the `service` of a Docker Compose document to a containerlab node."""
+
+    node = {"kind": "linux", "image": service["image"]}
+    if "command" in service:
+        node["cmd"] = service["command"]
+    if "environment" in service:
+        node["env"] = dict(var.split("=", 1) for var in service["environment"])
+    if "sysctls" in service:
+        node["sysctls"] = dict(sysctl.split("=", 1) for sysctl in service["sysctls"])
+    if "ports" in service:
+        node["ports"] = list(service["ports"])
+    return node
+
+
+class ContainerlabExporter(exporter.Exporter):
+    """Export architecture to a containerlab topology."""
+
+    def __init__(self, arch: architecture.Architecture, filename: str) -> None:
+        """
+        Export the architecture in the given file.
+
+        :param arch: Architecture to export.
+        :param filename: Path of the artifact in which to write the topology.
+        """
+        super().__init__(arch)
+        self.filename = filename
+        # commands run in each node once its links are created
+        self.exec: dict[str, list[str]] = {}
+
+    def add_exec(self, name: str, cmd: str) -> None:
+        """Run the command `cmd` in the node `name` once its links are created."""
+        self.exec.setdefault(name, []).append(cmd)
+
+    def write_links(self, links: list) -> None:
+        """Write the veth pairs replacing the networks, and configure their ends."""
+        utils.print_info("Writing links...")
+
+        for net in self.arch.networks:
+            if net.type == network.NetworkType.L3_NET:
+                self.write_l3_link(links, net)
+            else:
+                self.write_l2_links(links, net)
+
+    def write_l3_link(self, links: list, net: network.Network) -> None:
+        """Write the veth pair of the L3 network `net`, between its two entities."""
+
+        endpoints = []
+        for iface in net.interfaces:
+            entity = iface.entity
+            ifname = utils.get_interface_name(
+                entity.get_network_pos(net.name) + 1, entity.name
+            )
+            endpoints.append({"node": entity.name, "interface": ifname})
+            if iface.mac != "":
+                endpoints[-1]["mac"] = iface.mac
+            self.add_exec(
+                entity.name,
+                constants.LINUX_SET_IP_ADDRESS.format(
+                    f"{iface.ip}/{net.network.prefixlen}", ifname
+                ),
+            )
+        links.append({"endpoints": endpoints})
+
+    def write_l2_links(self, links: list, net: network.Network) -> None:
+        """
+        Write a veth pair between each entity of the L2 network `net` and its next
+        hop, named as the interfaces created by the commands of Docker Compose.
+        """
+
+        for iface in net.interfaces:
+            if iface.entity is None or iface.next_hop is None:
+                continue
+
+            ends = [(iface.entity, iface.next_hop), (iface.next_hop, iface.entity)]
+            endpoints = []
+            for local, remote in ends:
+                ifname = f"{local.name}_{remote.name}"
+                endpoints.append({"node": local.name, "interface": ifname})
+
+                ip = net.get_entity_ip(local.name)
+                if ip is not None:
+                    self.add_exec(
+                        local.name,
+                        constants.LINUX_SET_IP_ADDRESS.format(
+                            f"{ip}/{net.network.prefixlen}", ifname
+                        ),
+                    )
+            links.append({"endpoints": endpoints})
+
+    def write_nodes(self, nodes: dict) -> None:
+        """Write a node for each container, started as with Docker Compose."""
+        utils.print_info("Writing nodes...")
+
+        # the containers of Docker Compose, without their networks and commands file
+        services: dict = {}
+        if utils.is_using_jaeger():
+            services.update(copy.deepcopy(constants.JAEGER_SERVICE))
+        if utils.is_using_clt():
+            services.update(copy.deepcopy(constants.IOAM_COLLECTOR_SERVICE))
+        commands_file = artifacts.Artifacts()
+        for entity in self.arch.entities:
+            entity.export_compose(services, commands_file)
+
+        for name, service in services.items():
+            node = containerlab_node(service)
+
+            # names resolve to the addresses of the topology, not of the management
+            # network, which is still used to reach jaeger and the ioam collector
+            for host in service.get("extra_hosts", []):
+                host, _, ip = host.partition(":")
+                self.add_exec(name, constants.LINUX_ADD_HOST.format(ip, host))
+
+            commands = self.exec.get(name, []) + commands_file.commands.get(name, [])
+            if len(commands) > 0:
+                node["exec"] = [constants.CLAB_EXEC_CMD.format(cmd) for cmd in commands]
+                self.artifacts.add_commands(name, commands)
+            nodes[name] = node
+
+    def export(self) -> artifacts.Artifacts:
+        # links first: the addresses of the interfaces are configured before the routes
+        links: list = []
+        self.write_links(links)
+        nodes: dict = {}
+        self.write_nodes(nodes)
+
+        document = {
+            "name": constants.CONTAINERLAB_LAB_NAME,
+            # containers are named as with Docker Compose (e.g. for `docker exec`)
+            "prefix": "",
+            "topology": {"nodes": nodes, "links": links},
+        }
+        with self.artifacts.open(self.filename) as f:
+            f.write(to_yaml(document))
+
+        self.export_manifest(manifest.containerlab_manifest(document))
+        return self.artifacts
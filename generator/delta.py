@@ -0,0 +1,135 @@
+"""
+Compare the architecture of a running topology with a new one, and generate the
+commands updating the running containers or pods without restarting them.
+"""
+
+import re
+
+import utils
+import constants
+import architecture
+import config_parser
+
+# fields of the connections which can be changed in a running container
+LIVE_FIELDS = [field for field in constants.CONNECTION_IMPAIRMENTS if field != "timers"]
+
+ROUTE_ADD_REGEX = re.compile(r"\A(ip (?:-6 )?r) a ")
+
+
+def update_setting(key: str, old: str | None, new: str | None) -> str | None:
+    """
+    Return the command changing the setting `key` from the command `old` to the
+    command `new` (None if the setting is not applied), None if it did not change.
+    """
+
+    if old == new:
+        return None
+
+    kind, _, target = key.partition(" ")
+    if kind == "route":
+        if new is None:
+            match = ROUTE_ADD_REGEX.match(old or "")
+            if match is None:
+                raise RuntimeError(f"Unexpected route command {old}")
+            return f"{match.group(1)} d {target}"
+        return ROUTE_ADD_REGEX.sub(r"\1 replace ", new)
+    if kind == "netem":
+        if new is None:
+            return constants.DELETE_IMPAIRMENT.format(target)
+        if old is None:
+            return new
+        return new.replace(
+            constants.IMPAIRMENT_OPTION.format(target),
+            constants.CHANGE_IMPAIRMENT.format(target),
+            1,
+        )
+    if kind == "mtu":
+        return new or constants.MTU_OPTION.format(target, constants.DEFAULT_MTU)
+    if kind == "txqueuelen":
+        return new or constants.BUFFER_SIZE_OPTION.format(
+            target, constants.DEFAULT_TXQUEUELEN
+        )
+
+    raise RuntimeError(f"Unknown setting {key}")
+
+
+def static_state(entity: architecture.entities.Entity) -> tuple:
+    """Return the state of `entity` which cannot be changed while it is running."""
+
+    config = config_parser.strip_impairments(entity.config, LIVE_FIELDS)
+
+    networks = [
+        (net.name, net.subnet, net.get_entity_ip(entity.name))
+        for net in entity.attached_networks
+    ]
+
+    settings = {
+        utils.generate_command(cmd, entity.name, netns=entity.netns())
+        for cmd in entity.settings.values()
+    }
+    commands = [cmd for cmd in entity.commands if cmd not in settings]
+
+    return type(entity).__name__, config, networks, commands
+
+
+def exec_command(name: str, cmd: str, netns: str | None = None) -> str:
+    """
+    Return the command executing `cmd` in the running entity `name`, created in
+    the network namespace `netns` with `--netns` (see `Entity.netns`).
+    """
+
+    if utils.output_is_k8s():
+        return constants.KUBECTL_CMD.format(f"{name}-pod", cmd)
+    if netns is not None:
+        return utils.generate_command(cmd, name, netns=netns)
+    # containerlab nodes are named as the containers of Docker Compose
+    return constants.DOCKER_CMD.format(name, cmd)
+
+
+class LiveUpdate:
+    """Update of a running topology from an old architecture to a new one."""
+
+    def __init__(
+        self, old: architecture.Architecture, new: architecture.Architecture
+    ) -> None:
+        """
+        Compare the architectures `old` and `new`, built with the same flags.
+        Must be called before exporting `new`, which adds commands to its entities.
+        """
+
+        # commands to run in each entity
+        self.commands: dict[str, list[str]] = {}
+        # network namespace of the entities with commands (see `Entity.netns`)
+        self.netns: dict[str, str | None] = {}
+        # entities which cannot be updated without being (re)created or removed
+        self.recreate: list[str] = []
+
+        old_entities = {entity.name: entity for entity in old.entities}
+        for entity in new.entities:
+            previous = old_entities.pop(entity.name, None)
+            if previous is None or static_state(previous) != static_state(entity):
+                self.recreate.append(entity.name)
+                continue
+
+            commands = []
+            for key in sorted(previous.settings.keys() | entity.settings.keys()):
+                cmd = update_setting(
+                    key, previous.settings.get(key), entity.settings.get(key)
+                )
+                if cmd is not None:
+                    commands.append(cmd)
+            if len(commands) > 0:
+                self.commands[entity.name] = commands
+                self.netns[entity.name] = entity.netns()
+
+        self.recreate.extend(old_entities)
+
+    def script(self) -> str:
+        """Return the shell script applying the update, stopping at the first error."""
+
+        lines = ["#!/bin/sh", "set -e", ""]
+        for name, commands in self.commands.items():
+            lines.append(f"# updating {name} #")
+            lines.extend(exec_command(name, cmd, self.netns[name]) for cmd in commands)
+            lines.append("")
+        return "\n".join(lines)
@@ -2,11 +2,15 @@
 Entities generated by MSTG.
 """
 
+import os
+import shlex
 import ipaddress
+from string import Template
 from abc import ABC, abstractmethod
 
 import utils
 import network
+import artifacts
 import constants
 
 
@@ -25,18 +29,30 @@ class Entity(ABC):
 
         # networks to which the entity is attached
         self.attached_networks: list[network.Network] = []
-        # list of names of entities on which the current one depends
+        # names of entities on which the current one depends, in insertion order
         # used by docker compose to start the containers in the appropriate order
-        self.depends_on: set[str] = set()
+        self.depends_on: dict[str, None] = {}
         # hosts to which the entity is connected to in end-to-end connections
         # used for dns configuration
         self.extra_hosts: dict[str, ipaddress.IPv4Address | ipaddress.IPv6Address] = (
             dict()
         )
         # end-to-end connections
-        self.e2e_conns: set[str] = set()
-        # list of commands to execute to configure the entity
-        self.commands: set[str] = set()
+        # dicts are used as ordered sets: the output does not depend on the hash seed
+        self.e2e_conns: dict[str, None] = {}
+        # commands to execute to configure the entity, in the order they were added,
+        # mapped to the command run inside the entity (None if run in background)
+        self.commands: dict[str, str | None] = {}
+        # settings which can be changed in a running container (routes, mtu, etc.),
+        # indexed by what they configure (e.g. "route <subnet>", "netem <interface>")
+        self.settings: dict[str, str] = {}
+        # commands run at an offset (in seconds) from the start of the timers
+        self.timers: list[tuple[float, str]] = []
+        # index of the host on which the entity runs with `--hosts` (see `partition`)
+        self.host: int | None = None
+        # Kubernetes node on which the pod of the entity is placed, None to let the
+        # scheduler place it (see `partition`)
+        self.node: str | None = None
 
     def string(self, separator) -> str:
         """String representation of entity."""
@@ -46,8 +62,8 @@ class Entity(ABC):
             f"{separator}- ioam_id: {self.ioam_id}"
             f"{separator}- k8s IP: {self.kubernetes_ip}"
             f"{separator}- networks: {', '.join(net.name for net in self.attached_networks)}"
-            f"{separator}- e2e-connections: {self.e2e_conns}"
-            f"{separator}- depends-on: {self.depends_on}"
+            f"{separator}- e2e-connections: {list(self.e2e_conns)}"
+            f"{separator}- depends-on: {list(self.depends_on)}"
             f"{separator}- extra-hosts: {self.extra_hosts}"
             f"{separator}- commands: {' | '.join(map(str, self.commands))}"
         )
@@ -66,16 +82,285 @@ class Entity(ABC):
         :param cmd: Command to run.
         :param background: Whether to run the command as a background process.
         """
-        self.commands.add(utils.generate_command(cmd, self.name, background))
+        wrapped = utils.generate_command(cmd, self.name, background, self.netns())
+        self.commands[wrapped] = None if background else cmd
 
-    def generate_commands_file(self) -> None:
-        """Write the commands inside the commands file."""
+    def add_setting(self, key: str, cmd: str) -> None:
+        """
+        Add the command `cmd` applying the setting `key` to the entity.
+        Settings can be updated without restarting the entity (see `delta`).
+        """
+        self.settings[key] = cmd
+        self.add_command(cmd)
+
+    def add_timer(self, offset: float, cmd: str) -> None:
+        """
+        Add the command `cmd` run `offset` seconds after the start of the timers.
+        With Docker Compose, the timers are run by the timeline of the entity (see
+        `export_timeline`), otherwise by a command run in background.
+        """
+        self.timers.append((offset, cmd))
+        self.add_command(constants.MODIFY_IMPAIRMENT.format(offset, cmd), True)
+
+    def timer_commands(self) -> set[str]:
+        """Return the commands running the timers of the entity in background."""
+
+        return {
+            utils.generate_command(
+                constants.MODIFY_IMPAIRMENT.format(offset, cmd),
+                self.name,
+                True,
+                self.netns(),
+            )
+            for offset, cmd in self.timers
+        }
+
+    def netns(self) -> str | None:
+        """
+        Network namespace in which the entity is created with `--netns` ("" for the
+        host namespace), None if the entity is a container.
+        """
+        return None
+
+    def export_netns(self, output: artifacts.Artifacts, sysctls: list[str]) -> None:
+        """
+        Write the commands creating the network namespace of the entity, with the
+        given `sysctls`, in the commands file of `output`.
+        """
+
+        commands = [
+            constants.LINUX_ADD_NETNS.format(self.name),
+            utils.generate_command(
+                constants.LINUX_SET_LINK_UP.format("lo"), self.name, netns=self.name
+            ),
+        ]
+        if utils.is_using_clt() or utils.is_using_ioam_only():
+            sysctls = sysctls + utils.fill_template(
+                constants.COMPOSE_SYSCTL_DEFAULTS, {"ioam_id": self.ioam_id}
+            )
+        for sysctl in sysctls:
+            commands.append(
+                utils.generate_command(
+                    constants.LINUX_SET_SYSCTL.format(sysctl),
+                    self.name,
+                    netns=self.name,
+                )
+            )
+        # names resolved inside the namespace (e.g. by the rules of a firewall)
+        if len(self.extra_hosts) > 0:
+            commands.append(constants.NETNS_CREATE_HOSTS.format(self.name))
+            for host, ip in self.extra_hosts.items():
+                commands.append(constants.NETNS_ADD_HOST.format(ip, host, self.name))
+
+        output.add_commands(self.name, commands)
+        with output.open(constants.COMMANDS_FILE, "a") as f:
+            f.write(f"\n# creating {self.name} #\n")
+            for cmd in commands:
+                f.write(f"{cmd}\n")
+        with output.open(constants.NETNS_CLEANUP_FILE, "a") as f:
+            f.write(constants.LINUX_DELETE_NETNS.format(self.name) + "\n")
+            f.write(constants.NETNS_DELETE_CONFIG.format(self.name) + "\n")
+
+    def generate_commands_file(self, output: artifacts.Artifacts) -> None:
+        """Write the commands inside the commands file of `output`."""
 
-        with open(constants.COMMANDS_FILE, "a", encoding="utf-8") as f:
-            f.write(f"\n# configuring {self.name} #\n")
-            for cmd in self.commands:
+        commands = self.commands
+        # the links are impaired once the routes of every entity are configured
+        if utils.is_using_phases():
+            commands = self.split_impairments()[0]
+        self.write_commands(output, "configuring", commands)
+
+    def generate_impairments_file(self, output: artifacts.Artifacts) -> None:
+        """
+        Write the commands impairing the links of the entity inside the commands file
+        of `output`, in the last phase of `--phases`.
+        """
+
+        commands = self.split_impairments()[1]
+        if len(commands) > 0:
+            self.write_commands(output, "impairing", commands)
+
+    def split_impairments(
+        self,
+    ) -> tuple[dict[str, str | None], dict[str, str | None]]:
+        """
+        Split the commands of the entity between the ones configuring it (addresses,
+        routes, ...), and the ones impairing its links (settings and timers).
+        """
+
+        impairments = {
+            cmd
+            for key, cmd in self.settings.items()
+            if key.split()[0] in constants.IMPAIRMENT_SETTINGS
+        }
+        timers = self.timer_commands()
+        config: dict[str, str | None] = {}
+        impair: dict[str, str | None] = {}
+        for cmd, inside in self.commands.items():
+            if cmd in timers or inside in impairments:
+                impair[cmd] = inside
+            else:
+                config[cmd] = inside
+        return config, impair
+
+    def write_commands(
+        self, output: artifacts.Artifacts, action: str, commands: dict[str, str | None]
+    ) -> None:
+        """
+        Write a block of `commands` of the entity inside the commands file, whose
+        header gives the `action` of the block ("configuring" or "impairing").
+        """
+
+        # the timers are replaced by the timeline of the entity
+        timers = self.timer_commands()
+        if utils.output_is_compose() and any(cmd in timers for cmd in commands):
+            commands = {
+                cmd: inside for cmd, inside in commands.items() if cmd not in timers
+            }
+            copy = self.export_timeline(output)
+            if copy is not None:
+                # run from the host, after the commands run inside the entity
+                commands[copy] = None
+
+        lines = list(commands)
+        # the entities in the host namespace do not need an exec
+        if utils.is_using_single_exec() and self.netns() != "":
+            lines = self.script_commands(commands)
+        elif utils.is_using_batch_files():
+            name = self.name if action == "configuring" else f"{self.name}.impairments"
+            lines = self.batch_commands(output, commands, name)
+        output.add_commands(self.name, lines)
+        with output.open(constants.COMMANDS_FILE, "a") as f:
+            f.write(f"\n# {action} {self.name} #\n")
+            for cmd in lines:
                 f.write(f"{cmd}\n")
 
+    def timeline_path(self) -> str:
+        """Return the path of the artifact of the timeline of the entity."""
+        return os.path.join(constants.TIMELINES_FOLDER, f"{self.name}.sh")
+
+    def export_timeline(self, output: artifacts.Artifacts) -> str | None:
+        """
+        Write the timeline of the entity in `output`: a script running its timers,
+        sorted by their offset from the start given as argument. Return the command
+        copying it into the container, None if it is run from the host.
+        """
+
+        events = [
+            constants.TIMELINE_EVENT.format(offset, shlex.quote(cmd))
+            for offset, cmd in sorted(self.timers, key=lambda timer: float(timer[0]))
+        ]
+        # the events configure the entity too (see `manifest`)
+        output.add_commands(self.name, events)
+
+        path = self.timeline_path()
+        log = shlex.quote(constants.TIMELINE_LOG.format(self.name))
+        with output.open(path) as f:
+            f.write("#!/bin/sh\n")
+            f.write(f"# timers of {self.name}, with the time of each one logged\n")
+            f.write(f"start=$1\nlog={log}\n")
+            f.write(f"{constants.TIMELINE_FUNCTION}\n\n")
+            for event in events:
+                f.write(f"{event}\n")
+
+        if self.netns() is not None:
+            return None
+        return constants.DOCKER_COPY_TIMELINE.format(
+            self.name, constants.TIMELINE_FILE, path
+        )
+
+    def start_timeline(self) -> str:
+        """
+        Return the command starting the timeline of the entity at `$start` (see
+        `export_timeline`).
+        """
+
+        netns = self.netns()
+        if netns == "":
+            return constants.HOST_TIMELINE_CMD.format(self.timeline_path())
+        if netns is not None:
+            return constants.NETNS_TIMELINE_CMD.format(netns, self.timeline_path())
+        return constants.DOCKER_TIMELINE_CMD.format(self.name, constants.TIMELINE_FILE)
+
+    def batch_commands(
+        self, output: artifacts.Artifacts, commands: dict[str, str | None], name: str
+    ) -> list[str]:
+        """
+        Return the `commands` of the entity, whose commands of `ip` and `tc` are
+        written in a batch file of `output` per tool, `name`.<tool>, each one run by
+        a single invocation of the tool before the other commands.
+        """
+
+        batches: dict[str, list[str]] = {}
+        others = []
+        for cmd, inside in commands.items():
+            tool = None if inside is None else utils.batch_tool(inside)
+            if tool is None:
+                others.append(cmd)
+            else:
+                batches.setdefault(tool, []).append(inside.removeprefix(tool).strip())
+
+        lines = []
+        for tool, cmds in batches.items():
+            # e.g. r1.ip6 for the commands of "ip -6"
+            suffix = tool.replace(" ", "").replace("-", "")
+            path = os.path.join(constants.BATCH_FILES_FOLDER, f"{name}.{suffix}")
+            with output.open(path) as f:
+                for cmd in cmds:
+                    f.write(f"{cmd}\n")
+            # the content of the batch files configures the entity too (see `manifest`)
+            output.add_commands(self.name, cmds)
+            lines.append(
+                utils.generate_batch_command(tool, path, self.name, self.netns())
+            )
+        return lines + others
+
+    def script_commands(self, commands: dict[str, str | None]) -> list[str]:
+        """
+        Return the `commands` of the entity as a single script (see `--single-exec`),
+        followed by the commands run in background.
+        """
+
+        script = [cmd for cmd in commands.values() if cmd is not None]
+        background = [cmd for cmd, inside in commands.items() if inside is None]
+        if len(script) == 0:
+            return background
+        return utils.generate_script(script, self.name, self.netns()) + background
+
+    def health_command(self) -> str | None:
+        """
+        Return the command checking that the entity is ready: every route installed
+        by the commands file. None if there is nothing to check.
+        """
+
+        if utils.topology_is_ipv6():
+            route_check = constants.IPV6_ROUTE_CHECK
+        else:
+            route_check = constants.IPV4_ROUTE_CHECK
+        checks = [
+            route_check.format(key.removeprefix("route "))
+            for key in self.settings
+            if key.startswith("route ")
+        ]
+        return " && ".join(checks) if len(checks) > 0 else None
+
+    def combine_commands(self) -> str:
+        """
+        Combine the commands of the entity in a single one, running them in parallel.
+        With Kubernetes, they first wait for the interfaces of the entity created by
+        meshnet cni (eth0 is the default interface of the pod).
+        """
+
+        cmd = utils.combine_commands(list(self.commands), "&")
+        if not utils.output_is_k8s() or len(self.attached_networks) == 0:
+            return cmd
+
+        ifnames = [
+            utils.get_interface_name(i + 1, self.name)
+            for i in range(len(self.attached_networks))
+        ]
+        return utils.wait_interfaces(ifnames) + cmd
+
     def get_network_pos(self, name: str) -> int | None:
         """
         Get id of attached network with given `name`.
@@ -96,10 +381,42 @@ class Entity(ABC):
             if net.type == network.NetworkType.L3_NET
         )
 
+    def compose_networks(self) -> dict[str, dict]:
+        """Return the L3 networks to which the entity is attached in Docker compose."""
+
+        networks = {}
+        for i, net in enumerate(self.attached_networks):
+            # do not attach L2 network. Will be configured with veth
+            if net.uses_veth():
+                continue
+
+            mappings = {
+                "ip": net.get_entity_ip(self.name),
+                "mac": net.get_entity_mac(self.name),
+                "ifname": utils.get_interface_name(i, self.name),
+            }
+            if utils.topology_is_ipv4():
+                spec = constants.COMPOSE_IPV4_NET_SPEC
+            else:
+                spec = constants.COMPOSE_IPV6_NET_SPEC
+            networks[net.name] = utils.fill_template(spec, mappings)
+
+        return networks
+
     @abstractmethod
-    def export_compose(self, file) -> None:
-        """Export the entity in the given Docker Compose `file`."""
+    def export_compose(self, services: dict, output: artifacts.Artifacts) -> None:
+        """
+        Add the entity to the `services` of the Docker Compose document.
+        Its commands are written in the commands file of `output`.
+        """
+
+    def k8s_affinity(self) -> str:
+        """Return the affinity of the pod of the entity to its node, if placed."""
+
+        if self.node is None:
+            return ""
+        return Template(constants.K8S_POD_AFFINITY).substitute({"node": self.node})
 
     @abstractmethod
-    def export_k8s(self) -> None:
-        """Export the entity to Kubernetes configuration files."""
+    def export_k8s(self, output: artifacts.Artifacts) -> None:
+        """Export the entity to Kubernetes configuration files in `output`."""
@@ -2,8 +2,11 @@
 Exporter of the architecture.
 """
 
+import json
 from abc import ABC, abstractmethod
 
+import artifacts
+import constants
 import architecture
 
 
@@ -14,7 +17,15 @@ class Exporter(ABC):
     def __init__(self, arch: architecture.Architecture) -> None:
         """Create an exporter for the architecture `arch`."""
         self.arch = arch
+        # generated files, written by a sink
+        self.artifacts = artifacts.Artifacts()
 
     @abstractmethod
-    def export(self):
-        """Export the architecture."""
+    def export(self) -> artifacts.Artifacts:
+        """Export the architecture and return the generated artifacts."""
+
+    def export_manifest(self, manifest: dict) -> None:
+        """Write the `manifest` of the generated units (see `manifest`)."""
+        with self.artifacts.open(constants.MANIFEST_FILE) as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+            f.write("\n")
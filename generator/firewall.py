@@ -9,6 +9,7 @@ from string import Template
 import utils
 import network
 import entities
+import artifacts
 import constants
 import kubernetes
 
@@ -146,6 +147,9 @@ class Firewall(entities.Entity):
             for rule in self.config["rules"]:
                 self.rules.append(parse_rule(rule))
 
+    def netns(self) -> str | None:
+        return self.name if utils.is_using_netns() else None
+
     def export_commands(self) -> str:
         """Generate all commands required to configure the firewall."""
         if utils.output_is_k8s():
@@ -163,38 +167,29 @@ class Firewall(entities.Entity):
         for rule in self.rules:
             self.add_command(rule.export_rule())
 
-        self.add_command(constants.DELETE_DEFAULT_IPV4_ROUTE)
-        self.add_command(constants.DELETE_DEFAULT_IPV6_ROUTE)
+        # a new namespace has no default route
+        if self.netns() is None:
+            self.add_command(constants.DELETE_DEFAULT_IPV4_ROUTE)
+            self.add_command(constants.DELETE_DEFAULT_IPV6_ROUTE)
 
-        return utils.combine_commands(list(self.commands), "&")
+        return self.combine_commands()
 
-    def export_compose_networks(self, file) -> None:
+    def export_compose_networks(self) -> dict | None:
         """Export network settings in Docker compose."""
 
         if self.count_l3_networks() == 0:
-            return
-
-        file.write("    networks:\n")
-
-        for i, net in enumerate(self.attached_networks):
-            # do not attach L2 network. Will be configured with veth
-            if net.type == network.NetworkType.L2_NET:
-                continue
+            return None
 
-            name = net.name
-            ip = net.get_entity_ip(self.name)
-            mac = net.get_entity_mac(self.name)
-            ifname = utils.get_interface_name(i, self.name)
+        return self.compose_networks()
 
-            mappings = {"net_name": name, "ip": ip, "mac": mac, "ifname": ifname}
+    def export_compose(self, services: dict, output: artifacts.Artifacts) -> None:
+        """Add the firewall to the `services` of the Docker Compose document."""
 
-            if utils.topology_is_ipv4():
-                file.write(constants.COMPOSE_IPV4_NET_SPEC.substitute(mappings))
-            else:
-                file.write(constants.COMPOSE_IPV6_NET_SPEC.substitute(mappings))
-
-    def export_compose(self, file) -> None:
-        """Export the firewall in the given docker compose file."""
+        # created as a namespace by the commands file (see `export_netns`)
+        if self.netns() is not None:
+            self.export_commands()
+            self.generate_commands_file(output)
+            return
 
         mappings = {
             "name": self.name,
@@ -203,35 +198,36 @@ class Firewall(entities.Entity):
                 constants.LAUNCH_BACKGROUND_PROCESS
             ),
         }
-        file.write(constants.FIREWALL_TEMPLATE.substitute(mappings))
+        services.update(utils.fill_template(constants.FIREWALL_TEMPLATE, mappings))
+        service = services[self.name]
 
         # depends on
         if len(self.depends_on) > 0:
-            file.write("    depends_on:\n")
-            for dependency in self.depends_on:
-                file.write(f"      - {dependency}\n")
+            service["depends_on"] = list(self.depends_on)
 
-        # write networks
-        self.export_compose_networks(file)
+        # networks
+        networks = self.export_compose_networks()
+        if networks is not None:
+            service["networks"] = networks
 
-        # write extra hosts to prevent conflict in dns
+        # extra hosts to prevent conflict in dns
         if len(self.extra_hosts) > 0:
-            file.write("    extra_hosts:\n")
-            for host, ip in self.extra_hosts.items():
-                file.write(f'      - "{host}:{ip}"\n')
+            service["extra_hosts"] = [
+                f"{host}:{ip}" for host, ip in self.extra_hosts.items()
+            ]
 
         # exporting commands
         self.export_commands()
-        self.generate_commands_file()
+        self.generate_commands_file(output)
 
-    def export_k8s(self) -> None:
+    def export_k8s(self, output: artifacts.Artifacts) -> None:
         """Export the firewall to Kubernetes configuration files."""
 
         port = kubernetes.Kubernetes.next_node_port()
-        self.export_k8s_pod(port)
-        self.export_k8s_service(port)
+        self.export_k8s_pod(output, port)
+        self.export_k8s_service(output, port)
 
-    def export_k8s_pod(self, port: int):
+    def export_k8s_pod(self, output: artifacts.Artifacts, port: int):
         """Export the firewall to a Kubernetes pod using the given `port`."""
 
         cmd = (
@@ -255,14 +251,13 @@ class Firewall(entities.Entity):
             "KEY_FILE": "empty",
             "IP_VERSION": f'"{os.environ[constants.IP_VERSION_ENV]}"',
             "ports": Template(constants.K8S_POD_PORT).substitute({"port": port}),
+            "affinity": self.k8s_affinity(),
         }
         pod = constants.TEMPLATE_K8S_POD.substitute(pod_config)
 
         # output file
-        with open(
-            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_pod.yaml"),
-            "w",
-            encoding="utf-8",
+        with output.open(
+            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_pod.yaml")
         ) as f:
             f.write(pod)
 
@@ -275,7 +270,7 @@ class Firewall(entities.Entity):
       hostnames:
       - \"{host}\"""")
 
-    def export_k8s_service(self, port: int):
+    def export_k8s_service(self, output: artifacts.Artifacts, port: int):
         """Export the router to a Kubernetes service using the given `port`."""
 
         service_config = {
@@ -287,10 +282,8 @@ class Firewall(entities.Entity):
         }
         service = constants.TEMPLATE_K8S_SERVICE.substitute(service_config)
 
-        with open(
-            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_service.yaml"),
-            "w",
-            encoding="utf-8",
+        with output.open(
+            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_service.yaml")
         ) as f:
             f.write(service)
             f.close()
@@ -4,18 +4,36 @@ Main file for MSTG.
 
 import os
 import sys
+import json
 import time
-import networkx as nx
-import matplotlib.pyplot as plt
 
+import sinks
+import delta
 import utils
+import matrix
+import watcher
+import snapshot
+import constants
 import k8s_exporter
 import architecture
 import config_parser
 import compose_exporter
+import containerlab_exporter
 from constants import ASCII_ART, VERSION
 
 
+def write_partition_report(arch: architecture.Architecture) -> None:
+    """Write the quality of the partition of `arch` across the hosts or nodes."""
+
+    report = arch.partition_report()
+    path = utils.output_path(constants.PARTITION_FILE)
+    sinks.write_atomically({path: json.dumps(report, indent=2) + "\n"})
+    utils.print_info(
+        f"{report['cross_host_links']} of {report['links']} links cross "
+        f"{len(report['hosts'])} hosts, balance {report['balance']} (1 is perfect)"
+    )
+
+
 def gen_config_files(args=None):
     """Generate configuration files to deploy topology."""
 
@@ -30,21 +48,42 @@ def gen_config_files(args=None):
     utils.print_info(f'Got configuration file "{conf_file}"')
     utils.print_success("Checked command line arguments.")
 
-    print("\nParsing the configuration file...")
-    config = config_parser.parse_config(conf_file)
-    utils.print_success("Extracted config.")
+    if utils.live_update_input():
+        # loaded first: the new architecture may be saved to the same snapshot
+        architecture.reset_counters()
+        running = snapshot.load(utils.live_update_input(), derive=False)
+
+    if utils.snapshot_input():
+        print("\nLoading the architecture from the snapshot...\n")
+        architecture.reset_counters()
+        arch = snapshot.load(utils.snapshot_input())
+        utils.print_success("Loaded architecture.")
+    else:
+        print("\nParsing the configuration file...")
+        config = config_parser.parse_config(conf_file)
+        utils.print_success("Extracted config.")
+
+        if utils.is_generating_matrix():
+            return matrix.gen_matrix(conf_file, config)
+
+        print("\nBuilding the architecture based on the configuration file...\n")
+        architecture.reset_counters()
+        if utils.snapshot_output():
+            # the base is kept to derive the architecture with other flags
+            base = architecture.Architecture(conf_file, config, only_base=True)
+            arch = base.derive()
+            snapshot.save(utils.snapshot_output(), base, arch)
+            utils.print_info(f"Saved snapshot to {utils.snapshot_output()}")
+        else:
+            arch = architecture.Architecture(conf_file, config)
+
+    if utils.live_update_input():
+        # compared before the export, which adds commands to the entities
+        update = delta.LiveUpdate(running, arch)
 
-    print("\nBuilding the architecture based on the configuration file...\n")
-    arch = architecture.Architecture(conf_file, config)
+    os.makedirs(utils.output_path("."), exist_ok=True)
     if "--time" not in sys.argv:
-        nx.draw_spring(
-            arch.graph,
-            node_color="deepskyblue",
-            edge_color="dimgray",
-            arrows=True,
-            with_labels=True,
-        )
-        plt.savefig("architecture.svg")
+        arch.export_graph(utils.output_path(constants.ARCHITECTURE_GRAPH_FILE))
     utils.print_success("Built architecture.")
 
     if not utils.is_measuring_time() and utils.debug_mode_is_on():
@@ -52,21 +91,70 @@ def gen_config_files(args=None):
         arch.pretty_print()
         utils.print_success("Displayed internal state")
 
-    if utils.output_is_compose():
+    if utils.output_is_compose() and len(utils.hosts()) > 0:
+        print("\nWriting architecture to a Docker Compose file per host...")
+        for host, address in enumerate(utils.hosts()):
+            exporter = compose_exporter.ComposeExporter(
+                arch, constants.COMPOSE_FILE, host
+            )
+            folder = utils.output_path(constants.HOST_FOLDER.format(host))
+            sinks.DirectorySink(folder).write(exporter.export())
+            utils.print_info(f"Wrote the files of host {address} to {folder}")
+        write_partition_report(arch)
+        utils.print_success("Wrote architecture to Docker Compose files.")
+    elif utils.output_is_compose():
         print("\nWriting architecture to Docker Compose file...")
-        exporter = compose_exporter.ComposeExporter(arch, "docker-compose.yaml")
-        exporter.export()
+        exporter = compose_exporter.ComposeExporter(arch, constants.COMPOSE_FILE)
+        sinks.DirectorySink(utils.output_path(".")).write(exporter.export())
         utils.print_success("Wrote architecture to Docker Compose file.")
     elif utils.output_is_k8s():
         print("\nWriting architecture to Kubernetes files...")
         exporter = k8s_exporter.K8SExporter(arch)
-        exporter.export()
+        sink = sinks.DirectorySink(utils.output_path("."))
+        output = exporter.export()
+        sink.write(output)
+        utils.print_info(
+            f"{len(sink.written)} files written, "
+            f"{len(output.files) - len(sink.written)} unchanged, "
+            f"{len(sink.removed)} removed"
+        )
+        if utils.k8s_placement() == "topology":
+            write_partition_report(arch)
         utils.print_success("Wrote architecture to Kubernetes files.")
+    elif utils.output_is_containerlab():
+        print("\nWriting architecture to containerlab topology...")
+        exporter = containerlab_exporter.ContainerlabExporter(
+            arch, constants.CONTAINERLAB_FILE
+        )
+        sinks.DirectorySink(utils.output_path(".")).write(exporter.export())
+        utils.print_success("Wrote architecture to containerlab topology.")
+
+    if utils.live_update_input():
+        print("\nWriting the live update script...")
+        path = utils.output_path(constants.LIVE_UPDATE_FILE)
+        sinks.write_atomically({path: update.script()})
+        utils.print_info(
+            f"{sum(len(cmds) for cmds in update.commands.values())} commands "
+            f"to update {len(update.commands)} entities"
+        )
+        if len(update.recreate) > 0:
+            utils.print_warning(
+                "Entities to create, recreate or remove (cannot be updated live): "
+                + ", ".join(update.recreate)
+            )
+        utils.print_success(f"Wrote live update script to {path}.")
 
     if utils.is_measuring_time():
         end = time.process_time_ns()
         print(f"Generated configuration file(s) in {end - start} ns.")
 
+    if utils.is_watching():
+        print(f'\nWatching "{conf_file}" for modifications (Ctrl+C to stop)...')
+        try:
+            watcher.Watcher(conf_file, config, arch).run()
+        except KeyboardInterrupt:
+            utils.print_info("Stopped watching the configuration file")
+
     return os.EX_OK
 
 
@@ -4,12 +4,15 @@ for Kubernetes.
 """
 
 import os
+import yaml
 
 import utils
 import router
 import services
 import exporter
 import firewall
+import manifest
+import artifacts
 import constants
 import kubernetes
 import architecture
@@ -26,20 +29,16 @@ class K8SExporter(exporter.Exporter):
         """
         super().__init__(arch)
 
-    def export(self):
+    def export(self) -> artifacts.Artifacts:
         """Export the architecture to Kubernetes configuration files."""
         # empty commands file
-        with open(constants.COMMANDS_FILE, "w", encoding="utf-8") as f:
+        with self.artifacts.open(constants.COMMANDS_FILE) as f:
             f.write("#!/bin/bash\n\n")
 
-        # remove existing files to prevent port collisions
-        if os.path.exists(constants.K8S_EXPORT_FOLDER):
-            files = os.listdir(constants.K8S_EXPORT_FOLDER)
-            files = [f for f in files if f.endswith(".yaml")]
-            for f in files:
-                os.remove(os.path.join(constants.K8S_EXPORT_FOLDER, f))
-        else:
-            os.makedirs(constants.K8S_EXPORT_FOLDER)
+        # files of removed entities are removed by the sink to prevent port collisions
+        self.artifacts.add_directory(constants.K8S_EXPORT_FOLDER)
+        for entity in self.arch.entities:
+            self.artifacts.add_entity(entity.name)
 
         utils.print_info("Generating configuration for Meshnet...")
         self.generate_meshnet_config()
@@ -53,18 +52,81 @@ class K8SExporter(exporter.Exporter):
 
         if utils.is_using_jaeger():
             utils.print_info("Exporting Jaeger...")
+            self.artifacts.add_entity("jaeger")
             self.export_jaeger()
 
         if utils.is_using_clt():
             utils.print_info("Exporting IOAM collector...")
+            self.artifacts.add_entity("ioam_collector")
             self.export_ioam_collector()
 
+        # before bundling: the manifest parses every Kubernetes object
+        self.export_manifest(manifest.k8s_manifest(self.artifacts, self.arch))
+
+        if utils.k8s_layout() == "bundle":
+            utils.print_info("Bundling manifests...")
+            self.export_bundle()
+        elif utils.k8s_layout() == "kustomize":
+            utils.print_info("Generating kustomization...")
+            self.export_kustomization()
+
+        return self.artifacts
+
     def export_entities_type(self, type) -> None:
         """Export entities with the given `type`."""
         for entity in self.arch.entities:
             if isinstance(entity, type):
                 utils.print_info(f"Exporting entity {entity.name}...")
-                entity.export_k8s()
+                entity.export_k8s(self.artifacts)
+                self.artifacts.add_commands(entity.name, list(entity.commands))
+
+    def ordered_manifests(self) -> list[str]:
+        """
+        Return the paths of the generated manifests in the order in which they must
+        be applied: meshnet topologies, then pods, then services.
+        """
+
+        folder = os.path.normpath(constants.K8S_EXPORT_FOLDER)
+        manifests = [
+            path for path in self.artifacts.files if os.path.dirname(path) == folder
+        ]
+        # sort is stable: the order of generation is kept for each kind
+        return sorted(
+            manifests,
+            key=lambda path: constants.K8S_MANIFEST_KINDS.index(
+                artifacts.file_kind(path)
+            ),
+        )
+
+    def export_bundle(self) -> None:
+        """Replace the manifests by a single multi-document file."""
+
+        path = os.path.join(constants.K8S_EXPORT_FOLDER, constants.K8S_BUNDLE_FILE)
+        manifests = self.ordered_manifests()
+        with self.artifacts.open(path) as f:
+            for manifest in manifests:
+                content = self.artifacts.files.pop(manifest).getvalue()
+                f.write("---\n")
+                f.write(content if content.endswith("\n") else content + "\n")
+
+        # manifests of existing entities are not generated anymore: remove them
+        self.artifacts.entities.clear()
+
+    def export_kustomization(self) -> None:
+        """List the manifests in a kustomization, applied in the listed order."""
+
+        kustomization = {
+            "apiVersion": "kustomize.config.k8s.io/v1beta1",
+            "kind": "Kustomization",
+            "resources": [os.path.basename(path) for path in self.ordered_manifests()],
+            # keep the order of the resources instead of sorting them by kind
+            "sortOptions": {"order": "fifo"},
+        }
+        path = os.path.join(
+            constants.K8S_EXPORT_FOLDER, constants.K8S_KUSTOMIZATION_FILE
+        )
+        with self.artifacts.open(path) as f:
+            yaml.safe_dump(kustomization, f, sort_keys=False)
 
     def export_jaeger(self) -> None:
         """Export Jaeger into Kubernetes pod and service."""
@@ -72,14 +134,14 @@ class K8SExporter(exporter.Exporter):
 
         # pod
         path = os.path.join(constants.K8S_EXPORT_FOLDER, "jaeger_pod.yaml")
-        with open(path, "w", encoding="utf-8") as f:
+        with self.artifacts.open(path) as f:
             f.write(constants.K8S_JAEGER_POD)
 
         # service
         mapping = {"nodePort": kubernetes.Kubernetes.next_node_port()}
         service = constants.K8S_JAEGER_SERVICE.substitute(mapping)
         path = os.path.join(constants.K8S_EXPORT_FOLDER, "jaeger_service.yaml")
-        with open(path, "w", encoding="utf-8") as f:
+        with self.artifacts.open(path) as f:
             f.write(service)
 
     def export_ioam_collector(self):
@@ -88,14 +150,14 @@ class K8SExporter(exporter.Exporter):
 
         # pod
         path = os.path.join(constants.K8S_EXPORT_FOLDER, "ioam_collector_pod.yaml")
-        with open(path, "w", encoding="utf-8") as f:
+        with self.artifacts.open(path) as f:
             f.write(constants.K8S_COLLECTOR_POD)
 
         # service
         mapping = {"nodePort": kubernetes.Kubernetes.next_node_port()}
         service = constants.K8S_COLLECTOR_SERVICE.substitute(mapping)
         path = os.path.join(constants.K8S_EXPORT_FOLDER, "ioam_collector_service.yaml")
-        with open(path, "w", encoding="utf-8") as f:
+        with self.artifacts.open(path) as f:
             f.write(service)
 
     def generate_meshnet_config(self):
@@ -134,7 +196,7 @@ class K8SExporter(exporter.Exporter):
 
             # write meshnet config for entity into file
             path = os.path.join(constants.K8S_EXPORT_FOLDER, f"{e.name}_meshnet.yaml")
-            with open(path, "w", encoding="utf-8") as f:
+            with self.artifacts.open(path) as f:
                 f.write(constants.TEMPLATE_MESHNET_CONFIG.substitute({"pod_name": f'{e.name}-pod'}))
                 for iface in interfaces:
                     f.write(iface)
@@ -38,6 +38,18 @@ class Kubernetes:
         )
         # iterator for IPs of pods
         self.pods_ips = iter(self.pods_net.hosts())
+        # nodes on which the pods are placed by the generator (see `partition`)
+        self.nodes: list[str] = []
+
+    def __getstate__(self) -> dict:
+        # the iterator over the addresses cannot be pickled (see `snapshot`)
+        state = self.__dict__.copy()
+        del state["pods_ips"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.pods_ips = iter(self.pods_net.hosts())
 
     def __str__(self) -> str:
         return self.string(" - ")
@@ -171,3 +183,27 @@ class Kubernetes:
 
         # -1 to remove header
         return int(check_nodes.stdout.decode("utf-8")) - 1
+
+    @staticmethod
+    def get_schedulable_nodes() -> list[str]:
+        """Return the names of the nodes of the cluster which can run the pods."""
+
+        res = subprocess.run(
+            constants.K8S_KUBECTL_GET_NODES,
+            shell=True,
+            stdout=subprocess.PIPE,
+            check=False,
+        )
+        if res.returncode != 0:
+            raise RuntimeError("Error when listing the nodes in the cluster")
+
+        nodes = []
+        for line in res.stdout.decode("utf-8").splitlines():
+            # cordoned nodes are "true", and the effects of the taints follow
+            name, *flags = line.split()
+            if "true" in flags or any(
+                taint in flags for taint in constants.K8S_UNSCHEDULABLE_TAINTS
+            ):
+                continue
+            nodes.append(name)
+        return nodes
@@ -0,0 +1,185 @@
+"""
+Manifest of the generated units (containers, networks, Kubernetes objects and
+blocks of commands) with a hash of their content, and comparison of two manifests
+to find the containers or pods to recreate.
+"""
+
+import sys
+import json
+import yaml
+import hashlib
+import argparse
+
+import network
+import artifacts
+import constants
+import architecture
+
+
+def content_hash(data) -> str:
+    """Return a hash of `data` which does not depend on the order of its keys."""
+
+    text = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def unit(data, targets) -> dict:
+    """Return a unit with the content `data`, recreating the containers `targets`."""
+    return {"hash": content_hash(data), "targets": sorted(targets)}
+
+
+def commands_units(
+    output: artifacts.Artifacts, arch: architecture.Architecture, suffix=""
+) -> dict:
+    """
+    Return the units of the blocks of commands. A modified block recreates its
+    entity, or every entity attached to the L2 network it configures.
+
+    :param suffix: Suffix added to the names of the entities (e.g. "-pod").
+    """
+
+    networks = {net.name: net for net in arch.networks}
+    units = {}
+    for name, commands in output.commands.items():
+        net = networks.get(name)
+        if net is not None and net.type == network.NetworkType.L2_NET:
+            targets = [iface.entity.name + suffix for iface in net.interfaces]
+        else:
+            targets = [name + suffix]
+        # commands of an entity are stored in a set: ignore their order
+        units[f"commands/{name}"] = unit(sorted(commands), targets)
+    return units
+
+
+def compose_manifest(
+    document: dict, output: artifacts.Artifacts, arch: architecture.Architecture
+) -> dict:
+    """Return the manifest of the Docker Compose `document`."""
+
+    services = document.get("services") or {}
+    units = {
+        f"service/{name}": unit(service, [name]) for name, service in services.items()
+    }
+    for name, net in (document.get("networks") or {}).items():
+        attached = [
+            s for s, service in services.items() if name in service.get("networks", {})
+        ]
+        units[f"network/{name}"] = unit(net, attached)
+    units.update(commands_units(output, arch))
+
+    return {
+        "version": constants.VERSION,
+        "output": "compose",
+        "targets": sorted(services),
+        "units": units,
+    }
+
+
+def k8s_manifest(output: artifacts.Artifacts, arch: architecture.Architecture) -> dict:
+    """Return the manifest of the Kubernetes objects of `output`."""
+
+    pods = []
+    units = {}
+    for content in output.manifests.values():
+        for doc in yaml.load_all(content, Loader=constants.YamlLoader):
+            kind = doc["kind"]
+            name = doc["metadata"]["name"]
+            if kind == "Pod":
+                pods.append(name)
+            # services are updated in place, pods are recreated with their links
+            units[f"{kind}/{name}"] = unit(doc, [] if kind == "Service" else [name])
+    units.update(commands_units(output, arch, suffix="-pod"))
+
+    return {
+        "version": constants.VERSION,
+        "output": "kubernetes",
+        "targets": sorted(pods),
+        "units": units,
+    }
+
+
+def containerlab_manifest(document: dict) -> dict:
+    """Return the manifest of the containerlab topology `document`."""
+
+    topology = document["topology"]
+    units = {
+        f"node/{name}": unit(node, [name]) for name, node in topology["nodes"].items()
+    }
+    for link in topology["links"]:
+        ends = [f"{end['node']}:{end['interface']}" for end in link["endpoints"]]
+        targets = [end["node"] for end in link["endpoints"]]
+        units[f"link/{'--'.join(ends)}"] = unit(link, targets)
+
+    return {
+        "version": constants.VERSION,
+        "output": "containerlab",
+        "targets": sorted(topology["nodes"]),
+        "units": units,
+    }
+
+
+def compare(old: dict, new: dict) -> dict[str, list[str]]:
+    """
+    Compare the manifests `old` and `new`. Return the modified units, and the
+    containers or pods to create, recreate, and remove.
+    """
+
+    if old["output"] != new["output"]:
+        raise RuntimeError(
+            f"Cannot compare {old['output']} and {new['output']} manifests"
+        )
+
+    old_units = old["units"]
+    new_units = new["units"]
+    modified = sorted(
+        name
+        for name in old_units.keys() | new_units.keys()
+        if old_units.get(name, {}).get("hash") != new_units.get(name, {}).get("hash")
+    )
+
+    targets = set()
+    for name in modified:
+        targets.update(old_units.get(name, {}).get("targets", []))
+        targets.update(new_units.get(name, {}).get("targets", []))
+
+    old_targets = set(old["targets"])
+    new_targets = set(new["targets"])
+    return {
+        "units": modified,
+        "create": sorted(new_targets - old_targets),
+        "recreate": sorted(targets & old_targets & new_targets),
+        "remove": sorted(old_targets - new_targets),
+    }
+
+
+def main(args) -> int:
+    """Print the containers or pods to recreate between two manifests."""
+
+    parser = argparse.ArgumentParser(
+        description="List the containers or pods to recreate between two manifests"
+    )
+    parser.add_argument("old", help="Manifest of the deployed architecture")
+    parser.add_argument("new", help="Manifest of the regenerated architecture")
+    parser.add_argument(
+        "--json", action="store_true", help="Print the comparison in JSON"
+    )
+    args = parser.parse_args(args)
+
+    manifests = []
+    for path in [args.old, args.new]:
+        with open(path, "r", encoding="utf-8") as f:
+            manifests.append(json.load(f))
+
+    diff = compare(*manifests)
+    if args.json:
+        print(json.dumps(diff, indent=2))
+    else:
+        for action in ["create", "recreate", "remove"]:
+            for name in diff[action]:
+                print(f"{action} {name}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
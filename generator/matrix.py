@@ -0,0 +1,141 @@
+"""
+Generate many variants of flags for a single configuration file.
+The configuration is parsed and checked, and the part of the architecture
+independent of the flags is built, only once for all the variants.
+"""
+
+import os
+import json
+import time
+import traceback
+import contextlib
+import concurrent.futures
+
+import sinks
+import utils
+import constants
+import k8s_exporter
+import architecture
+import compose_exporter
+
+# base architecture shared by the worker processes
+base_arch: architecture.Architecture | None = None
+
+
+def init_worker(arch: architecture.Architecture) -> None:
+    """Initialize a worker process with the base architecture `arch`."""
+    global base_arch
+    base_arch = arch
+
+
+def generate_variant(name: str, conf_file: str, output: str) -> dict:
+    """
+    Generate the variant `name` from the base architecture inside `output`.
+    Executed in a worker process. Errors are caught and returned in the result.
+    """
+
+    result = {"variant": name, "output": output, "success": False, "error": None}
+    start = time.perf_counter()
+
+    os.makedirs(output, exist_ok=True)
+    log_file = os.path.join(output, constants.BATCH_LOG_FILE)
+
+    with open(log_file, "w", encoding="utf-8") as log:
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            try:
+                if base_arch is None:
+                    raise RuntimeError("Worker was not initialized")
+
+                # set the flags of the variant
+                utils.check_arguments(
+                    [
+                        "--config",
+                        conf_file,
+                        "--output-dir",
+                        output,
+                        "--compose-format",
+                        os.environ[constants.COMPOSE_FORMAT_ENV],
+                        "--k8s-layout",
+                        os.environ[constants.K8S_LAYOUT_ENV],
+                        *constants.MATRIX_VARIANTS[name],
+                    ]
+                )
+
+                architecture.reset_counters()
+                arch = base_arch.derive()
+                arch.export_graph(utils.output_path(constants.ARCHITECTURE_GRAPH_FILE))
+
+                if utils.output_is_compose():
+                    exporter = compose_exporter.ComposeExporter(
+                        arch, constants.COMPOSE_FILE
+                    )
+                else:
+                    exporter = k8s_exporter.K8SExporter(arch)
+                sinks.DirectorySink(output).write(exporter.export())
+                result["success"] = True
+            except SystemExit as err:
+                result["error"] = f"Invalid arguments (exit code {err.code})"
+            except Exception as err:
+                traceback.print_exc()
+                result["error"] = f"{type(err).__name__}: {err}"
+
+    result["time"] = time.perf_counter() - start
+    return result
+
+
+def gen_matrix(conf_file: str, config) -> int:
+    """Generate all requested variants for the loaded `config`."""
+
+    start = time.perf_counter()
+    conf_file = os.path.abspath(conf_file)
+    root = os.path.abspath(utils.matrix_output())
+    variants = utils.matrix_variants()
+
+    print("\nBuilding the base architecture shared by all variants...\n")
+    base = architecture.Architecture(conf_file, config, only_base=True)
+    utils.print_success("Built base architecture.")
+
+    print(f"\nGenerating {len(variants)} variant(s) in {root}...")
+    os.makedirs(root, exist_ok=True)
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(os.cpu_count() or 1, len(variants)),
+        initializer=init_worker,
+        initargs=(base,),
+    ) as pool:
+        futures = {
+            pool.submit(
+                generate_variant, name, conf_file, os.path.join(root, name)
+            ): name
+            for name in variants
+        }
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                res = future.result()
+            except Exception as err:
+                # worker crashed: do not abort the other variants
+                res = {
+                    "variant": name,
+                    "output": os.path.join(root, name),
+                    "success": False,
+                    "error": f"{type(err).__name__}: {err}",
+                    "time": 0.0,
+                }
+
+            if res["success"]:
+                utils.print_info(f"Generated variant {name} in {res['time']:.3f}s")
+            else:
+                utils.print_error(f"Failed to generate variant {name}: {res['error']}")
+            results.append(res)
+
+    results.sort(key=lambda res: variants.index(res["variant"]))
+    utils.print_summary(results, "variant")
+
+    summary = {"time": time.perf_counter() - start, "results": results}
+    path = os.path.join(root, constants.BATCH_SUMMARY_FILE)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    utils.print_info(f"Wrote summary to {path}")
+
+    return os.EX_OK if all(res["success"] for res in results) else 1
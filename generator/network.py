@@ -2,11 +2,12 @@
 Represent a network inside MSTG.
 """
 
+import itertools
 import ipaddress
 from enum import Enum
 
 import utils
-import switch
+import artifacts
 import constants
 
 
@@ -71,6 +72,23 @@ class Network:
         self.gateway = next(self.hosts) if utils.output_is_compose() else None
         self.subnet = self.network.with_prefixlen
         self.interfaces: list[NetworkInterface] = []
+        # VXLAN identifiers of the links crossing two hosts (see `partition`),
+        # indexed by the names of their entities
+        self.vnis: dict[tuple[str, str], int] = {}
+
+    def __getstate__(self) -> dict:
+        # the iterator over the addresses cannot be pickled (see `snapshot`)
+        state = self.__dict__.copy()
+        del state["hosts"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        # skip the addresses given to the gateway and the interfaces
+        used = sum(1 for iface in self.interfaces if iface.ip is not None)
+        if self.gateway is not None:
+            used += 1
+        self.hosts = itertools.islice(self.network.hosts(), used, None)
 
     def set_l3_network(self, begin, end) -> None:
         """
@@ -143,6 +161,32 @@ class Network:
 
         return found_begin and found_end
 
+    def links(self) -> list[tuple]:
+        """
+        Return the links of the network, as pairs of entities (entity.Entity): the
+        two ends of a L3 network, or each entity and its next hop on a L2 network.
+        """
+
+        if self.type == NetworkType.L3_NET:
+            return [(self.interfaces[0].entity, self.interfaces[1].entity)]
+        return [
+            (iface.entity, iface.next_hop)
+            for iface in self.interfaces
+            if iface.entity is not None and iface.next_hop is not None
+        ]
+
+    def uses_veth(self) -> bool:
+        """
+        True if the network is made of veth pairs or VXLAN interfaces created by the
+        commands file instead of a Docker network: L2 networks, networks of a
+        namespace, and networks crossing two hosts.
+        """
+        return (
+            self.type == NetworkType.L2_NET
+            or any(iface.entity.netns() is not None for iface in self.interfaces)
+            or len(self.vnis) > 0
+        )
+
     def get_entity_ip(self, name: str):
         """Get IP of interface of entity with the given `name`."""
         return next(
@@ -212,28 +256,47 @@ class Network:
             return utils.convert_net_id_to_k8s_ipv4(self.network_id)
         if utils.output_is_k8s() and utils.topology_is_ipv6():
             return utils.convert_net_id_to_k8s_ipv6(self.network_id)
-        if utils.output_is_compose() and utils.topology_is_ipv4():
+        # containerlab links use the same subnets as the Docker networks
+        docker = utils.output_is_compose() or utils.output_is_containerlab()
+        if docker and utils.topology_is_ipv4():
             return utils.convert_net_id_to_ip4_net(self.network_id)
-        if utils.output_is_compose() and utils.topology_is_ipv6():
+        if docker and utils.topology_is_ipv6():
             return utils.convert_net_id_to_ip6_net(self.network_id)
 
         raise RuntimeError("Unexpected network configuration")
 
-    def export_compose(self, file) -> None:
-        """Export the Docker network in the given Docker Compose `file`."""
+    def export_compose(
+        self, networks: dict, output: artifacts.Artifacts, host: int | None = None
+    ) -> None:
+        """
+        Add the Docker network to the `networks` of the Docker Compose document.
+
+        :param host: Index of the host whose Docker Compose document is generated,
+        None if the architecture is not partitioned (see `partition`).
+        """
+
+        if self.type == NetworkType.L3_NET and self.uses_veth():
+            self.export_compose_veth(output, host)
+            return
 
         if self.type == NetworkType.L3_NET:
-            self.export_compose_l3(file)
+            self.export_compose_l3(networks)
             return
 
         # do not export L2 network because a docker network == l3 network
         # only need to generate the commands
         if self.type == NetworkType.L2_NET:
-            self.export_compose_l2()
+            self.export_compose_l2(output, host)
             return
 
-    def export_compose_l2(self) -> None:
-        """Generate the commands to create the L2 network."""
+    def export_compose_l2(
+        self, output: artifacts.Artifacts, host: int | None = None
+    ) -> None:
+        """
+        Generate the commands to create the L2 network. With `host`, only the ends
+        of the links on this host are created, as VXLAN interfaces for the links
+        crossing two hosts.
+        """
 
         commands = []
 
@@ -242,118 +305,183 @@ class Network:
                 continue
 
             local = iface.entity.name
-            local_switch = isinstance(iface.entity, switch.Switch)
             remote = iface.next_hop.name
-            remote_switch = isinstance(iface.next_hop, switch.Switch)
 
             local_iface_name = f"{local}_{remote}"
             remote_iface_name = f"{remote}_{local}"
 
-            commands.append(
-                constants.LINUX_CREATE_VETH.format(local_iface_name, remote_iface_name)
-            )
-
-            # move one end into container and set up
-            commands.append(
-                f"pid=$({constants.DOCKER_GET_PID.substitute({'name': local})})"
-            )
-            commands.append(
-                constants.LINUX_MOVE_VETH_TO_NS.format(local_iface_name, "$pid")
-            )
-            commands.append(
-                utils.generate_command(
-                    constants.LINUX_SET_LINK_UP.format(local_iface_name), local, False
-                )
-            )
-            # set ip in container if any
-            if iface.ip is not None:
-                ip = f"{iface.ip}/{self.network.prefixlen}"
+            ends = [
+                (iface.entity, iface.next_hop, local_iface_name, iface.ip),
+                (
+                    iface.next_hop,
+                    iface.entity,
+                    remote_iface_name,
+                    self.get_entity_ip(remote),
+                ),
+            ]
+            if (local, remote) in self.vnis:
+                # one end on each host
+                for entity, peer, ifname, ip in ends:
+                    if entity.host == host:
+                        commands.append(self.create_vxlan(ifname, entity, peer))
+                        commands.extend(self.l2_end_commands(entity, ifname, ip))
+            elif host is None or iface.entity.host == host:
                 commands.append(
-                    utils.generate_command(
-                        constants.LINUX_SET_IP_ADDRESS.format(ip, local_iface_name),
-                        local,
-                        False,
-                    )
-                )
-            # add port in ovs if it's a switch
-            if local_switch and self.get_entity_vlan(remote) is not None:
-                commands.append(
-                    utils.generate_command(
-                        constants.OVS_ADD_PORT_VLAN.format(
-                            local, local_iface_name, self.get_entity_vlan(remote)
-                        ),
-                        local,
-                        False,
-                    )
-                )
-            elif local_switch:
-                commands.append(
-                    utils.generate_command(
-                        constants.OVS_ADD_PORT.format(local, local_iface_name),
-                        local,
-                        False,
+                    constants.LINUX_CREATE_VETH.format(
+                        local_iface_name, remote_iface_name
                     )
                 )
+                for entity, peer, ifname, ip in ends:
+                    commands.extend(self.l2_end_commands(entity, ifname, ip))
 
-            # move other end into other container and set up
-            commands.append(
-                f"pid=$({constants.DOCKER_GET_PID.substitute({'name': remote})})"
-            )
+        self.write_commands(output, commands, host)
+
+    def l2_end_commands(self, entity, ifname: str, ip) -> list[str]:
+        """
+        Return the commands configuring the end `ifname` of a link of `entity`
+        (entity.Entity): moved into `entity` and set up, with the address `ip` if
+        any. The ports of the switches are added once every link is created (see
+        `Switch.export_ports`).
+        """
+
+        # move end into container and set up
+        commands = Network.move_veth(entity, ifname)
+        # set ip in container if any
+        if ip is not None:
+            ip = f"{ip}/{self.network.prefixlen}"
             commands.append(
-                constants.LINUX_MOVE_VETH_TO_NS.format(remote_iface_name, "$pid")
+                utils.generate_command(
+                    constants.LINUX_SET_IP_ADDRESS.format(ip, ifname),
+                    entity.name,
+                    False,
+                    entity.netns(),
+                )
             )
+        return commands
+
+    def export_compose_veth(
+        self, output: artifacts.Artifacts, host: int | None = None
+    ) -> None:
+        """
+        Generate the commands to create the L3 network as a veth pair. If the
+        network crosses two hosts, only the end on `host` is created, as a VXLAN
+        interface.
+        """
+
+        names = []
+        for iface in self.interfaces:
+            pos = iface.entity.get_network_pos(self.name)
+            names.append(utils.get_interface_name(pos, iface.entity.name))
+
+        commands = []
+        if len(self.vnis) == 0:
+            commands.append(constants.LINUX_CREATE_VETH.format(*names))
+        for iface, ifname in zip(self.interfaces, names):
+            if len(self.vnis) > 0 and iface.entity.host != host:
+                continue
+            if len(self.vnis) > 0:
+                peer = self.get_other_host(iface.entity.name).entity
+                commands.append(self.create_vxlan(ifname, iface.entity, peer))
+            commands.append(constants.LINUX_SET_MAC_ADDRESS.format(ifname, iface.mac))
+            commands.extend(Network.move_veth(iface.entity, ifname))
+            ip = f"{iface.ip}/{self.network.prefixlen}"
             commands.append(
                 utils.generate_command(
-                    constants.LINUX_SET_LINK_UP.format(remote_iface_name), remote, False
+                    constants.LINUX_SET_IP_ADDRESS.format(ip, ifname),
+                    iface.entity.name,
+                    False,
+                    iface.entity.netns(),
                 )
             )
-            # set ip in other container if any
-            remote_ip = self.get_entity_ip(remote)
-            if remote_ip is not None:
-                ip = f"{remote_ip}/{self.network.prefixlen}"
-                commands.append(
-                    utils.generate_command(
-                        constants.LINUX_SET_IP_ADDRESS.format(ip, remote_iface_name),
-                        remote,
-                        False,
-                    )
-                )
-            # add port in ovs if it's a switch
-            if remote_switch and self.get_entity_vlan(local) is not None:
-                commands.append(
-                    utils.generate_command(
-                        constants.OVS_ADD_PORT_VLAN.format(
-                            remote, remote_iface_name, self.get_entity_vlan(local)
-                        ),
-                        remote,
-                        False,
-                    )
-                )
-            elif remote_switch:
-                commands.append(
-                    utils.generate_command(
-                        constants.OVS_ADD_PORT.format(remote, remote_iface_name),
-                        remote,
-                        False,
-                    )
-                )
 
-            # TODO ovs add vlan
+        self.write_commands(output, commands, host)
+
+    def write_commands(
+        self, output: artifacts.Artifacts, commands: list[str], host: int | None
+    ) -> None:
+        """
+        Write the `commands` creating the network on `host` in the commands file of
+        `output`, with the ones of `ip` on the host run by a single process.
+        """
+
+        commands = utils.batch_ip_commands(commands)
+        # with --phases, the blocks run in their own shell (see `runner`): the
+        # PIDs looked up at the beginning of the commands file are not known
+        containers = self.veth_containers(host)
+        if utils.is_using_phases() and len(containers) > 0:
+            commands = utils.lookup_pids(containers) + commands
 
-        # write every command to file
-        with open(constants.COMMANDS_FILE, "a", encoding="utf-8") as f:
+        output.add_commands(self.name, commands)
+        with output.open(constants.COMMANDS_FILE, "a") as f:
             f.write(f"\n# configuring {self.name}\n\n")
             for cmd in commands:
                 f.write(f"{cmd}\n")
 
-    def export_compose_l3(self, file) -> None:
-        """Export the L3 network in the given Docker compose `file`."""
+    def veth_containers(self, host: int | None = None) -> list[str]:
+        """
+        Return the names of the containers on `host` into which the ends of the links
+        of the network are moved, if it is made of veth pairs.
+        """
+
+        if self.type == NetworkType.L3_NET and not self.uses_veth():
+            return []
+
+        names: list[str] = []
+        for iface in self.interfaces:
+            for entity in (iface.entity, iface.next_hop):
+                if entity is None or entity.netns() is not None:
+                    continue
+                if (host is None or entity.host == host) and entity.name not in names:
+                    names.append(entity.name)
+        return names
+
+    def create_vxlan(self, ifname: str, entity, peer) -> str:
+        """
+        Return the command creating, on the host of `entity`, the end `ifname` of
+        the VXLAN link between `entity` and `peer` (entity.Entity).
+        """
+
+        vni = self.vnis.get((entity.name, peer.name))
+        if vni is None:
+            vni = self.vnis[(peer.name, entity.name)]
+        return constants.LINUX_CREATE_VXLAN.format(
+            ifname, vni, utils.hosts()[peer.host], constants.VXLAN_PORT
+        )
+
+    @staticmethod
+    def move_veth(entity, ifname: str) -> list[str]:
+        """
+        Return the commands moving the end `ifname` of a veth pair into the container
+        or the network namespace of `entity` (entity.Entity), and setting it up.
+        """
+
+        netns = entity.netns()
+        commands = []
+        if netns is None:
+            # looked up once for every link (see `utils.lookup_pids`)
+            commands.append(
+                constants.LINUX_MOVE_VETH_TO_NS.format(
+                    ifname, utils.pid_variable(entity.name)
+                )
+            )
+        elif netns != "":
+            commands.append(constants.LINUX_MOVE_VETH_TO_NETNS.format(ifname, netns))
+        commands.append(
+            utils.generate_command(
+                constants.LINUX_SET_LINK_UP.format(ifname), entity.name, False, netns
+            )
+        )
+        return commands
+
+    def export_compose_l3(self, networks: dict) -> None:
+        """Add the L3 network to the `networks` of the Docker compose document."""
 
         mappings = {"name": self.name, "subnet": self.subnet, "gateway": self.gateway}
         if utils.topology_is_ipv4():
-            file.write(constants.NETWORK_IPV4_TEMPLATE.substitute(mappings))
+            template = constants.NETWORK_IPV4_TEMPLATE
         else:
-            file.write(constants.NETWORK_IPV6_TEMPLATE.substitute(mappings))
+            template = constants.NETWORK_IPV6_TEMPLATE
+        networks.update(utils.fill_template(template, mappings))
 
     @staticmethod
     def generate_l3_net_name(begin: str, end: str) -> str:
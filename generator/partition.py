@@ -0,0 +1,113 @@
+"""
+Partition the architecture across several Docker hosts. The links between entities
+on different hosts are VXLAN interfaces instead of Docker networks or veth pairs.
+"""
+
+import networkx as nx
+from networkx.algorithms import community
+
+import network
+
+
+def link_graph(graph: nx.DiGraph, networks: list[network.Network]) -> nx.Graph:
+    """
+    Return the undirected `graph` of the entities, whose edges are weighted by the
+    number of links of the `networks` between their entities.
+    """
+
+    links = nx.Graph()
+    links.add_nodes_from(graph)
+    for net in networks:
+        for entity, peer in net.links():
+            if links.has_edge(entity.name, peer.name):
+                links[entity.name][peer.name]["weight"] += 1
+            else:
+                links.add_edge(entity.name, peer.name, weight=1)
+    return links
+
+
+def bfs_order(graph: nx.Graph, nodes: list[str]) -> list[str]:
+    """Return the `nodes` in breadth-first order: neighbours are kept together."""
+
+    order: dict[str, None] = {}
+    for source in nodes:
+        if source in order:
+            continue
+        order[source] = None
+        for _, node in nx.bfs_edges(graph, source):
+            order[node] = None
+    return list(order)
+
+
+def bisect(graph: nx.Graph, nodes: list[str], parts: int) -> list[list[str]]:
+    """
+    Split the `nodes` of `graph` into `parts` balanced sets by recursive bisection,
+    each bisection minimizing the weight of the edges it cuts (Kernighan-Lin).
+    """
+
+    if parts == 1:
+        return [nodes]
+
+    # the sizes of the halves are proportional to their number of parts, and the
+    # swaps of Kernighan-Lin keep them
+    left_parts = parts // 2
+    size = len(nodes) * left_parts // parts
+    subgraph = graph.subgraph(nodes)
+    order = bfs_order(subgraph, nodes)
+    left = set(order[:size])
+    if 0 < size < len(nodes):
+        first, second = community.kernighan_lin_bisection(
+            subgraph, (left, set(order[size:])), weight="weight"
+        )
+        left = first if len(first & left) >= len(second & left) else second
+
+    return bisect(graph, [n for n in order if n in left], left_parts) + bisect(
+        graph, [n for n in order if n not in left], parts - left_parts
+    )
+
+
+def partition(graph: nx.Graph, parts: int) -> dict[str, int]:
+    """Return the part of each node of the weighted `graph` split in `parts`."""
+
+    return {
+        node: part
+        for part, nodes in enumerate(bisect(graph, list(graph), parts))
+        for node in nodes
+    }
+
+
+def assign_vnis(networks: list[network.Network]) -> None:
+    """Assign a VXLAN identifier to each link of the `networks` crossing two hosts."""
+
+    vni = 1
+    for net in networks:
+        for entity, peer in net.links():
+            if entity.host != peer.host:
+                net.vnis[(entity.name, peer.name)] = vni
+                vni += 1
+
+
+def report(graph: nx.Graph, parts: dict[str, int], hosts: list[str]) -> dict:
+    """
+    Return the quality of the partition `parts` of the weighted `graph` across the
+    `hosts` (addresses of Docker hosts, or Kubernetes nodes): the links crossing
+    hosts, and the balance of the entities per host.
+    """
+
+    sizes = [sum(1 for part in parts.values() if part == i) for i in range(len(hosts))]
+    cross = sum(
+        weight for u, v, weight in graph.edges(data="weight") if parts[u] != parts[v]
+    )
+    return {
+        "hosts": [
+            {
+                "name": name,
+                "entities": [node for node, part in parts.items() if part == i],
+            }
+            for i, name in enumerate(hosts)
+        ],
+        "links": sum(weight for _, _, weight in graph.edges(data="weight")),
+        "cross_host_links": cross,
+        # entities of the largest host compared to a perfect balance (1 is perfect)
+        "balance": round(max(sizes) * len(hosts) / max(1, len(parts)), 3),
+    }
@@ -9,6 +9,7 @@ import os
 import utils
 import network
 import entities
+import artifacts
 import constants
 import kubernetes
 
@@ -26,51 +27,49 @@ class Router(entities.Entity):
         """Indented string describing the object"""
         return f"Router: {self.name}\n\t- {super().pretty()}"
 
+    def netns(self) -> str | None:
+        return self.name if utils.is_using_netns() else None
+
     def export_commands(self) -> str:
         """Generate one line combining all commands."""
 
         if utils.is_using_ioam_only() or utils.is_using_clt():
-            self.add_command(constants.LAUNCH_INTERFACE_SCRIPT)
+            if self.netns() is None:
+                self.add_command(constants.LAUNCH_INTERFACE_SCRIPT)
+            else:
+                # the script of the image is not available in a namespace
+                self.add_command(constants.CMD_INLINE_SYSCTL.format(self.ioam_id))
             self.add_command(constants.ADD_IOAM_NAMESPACE)
 
         if utils.output_is_k8s():
             # need to drop icmp redirect (type 5) to prevent modification of the routing
             self.add_command(constants.DROP_ICMP_REDIRECT)
 
-        self.add_command(constants.DELETE_DEFAULT_IPV4_ROUTE)
-        self.add_command(constants.DELETE_DEFAULT_IPV6_ROUTE)
+        # a new namespace has no default route
+        if self.netns() is None:
+            self.add_command(constants.DELETE_DEFAULT_IPV4_ROUTE)
+            self.add_command(constants.DELETE_DEFAULT_IPV6_ROUTE)
 
-        return utils.combine_commands(list(self.commands), "&")
+        return self.combine_commands()
 
-    def export_compose_networks(self, file) -> None:
+    def export_compose_networks(self) -> dict | None:
         """Export network settings in Docker compose."""
 
         if self.count_l3_networks() == 0:
-            return
-
-        file.write("    networks:\n")
-
-        for i, net in enumerate(self.attached_networks):
-            # do not attach L2 network. Will be configured with veth
-            if net.type == network.NetworkType.L2_NET:
-                continue
+            return None
 
-            name = net.name
-            ip = net.get_entity_ip(self.name)
-            mac = net.get_entity_mac(self.name)
-            ifname = utils.get_interface_name(i, self.name)
+        return self.compose_networks()
 
-            mappings = {"net_name": name, "ip": ip, "mac": mac, "ifname": ifname}
+    def export_compose(self, services: dict, output: artifacts.Artifacts) -> None:
+        """Add the router to the `services` of the Docker Compose document."""
 
-            if utils.topology_is_ipv4():
-                file.write(constants.COMPOSE_IPV4_NET_SPEC.substitute(mappings))
-            else:
-                file.write(constants.COMPOSE_IPV6_NET_SPEC.substitute(mappings))
-
-    def export_compose(self, file) -> None:
-        """Export the router in the given docker compose file."""
+        # created as a namespace by the commands file (see `export_netns`)
+        if self.netns() is not None:
+            self.export_commands()
+            self.generate_commands_file(output)
+            return
 
-        # write template
+        # fill template
         mappings = {
             "name": self.name,
             "dockerImage": "mstg_router"
@@ -80,37 +79,38 @@ class Router(entities.Entity):
                 constants.LAUNCH_BACKGROUND_PROCESS
             ),
         }
-        file.write(constants.ROUTER_TEMPLATE.substitute(mappings))
+        services.update(utils.fill_template(constants.ROUTER_TEMPLATE, mappings))
+        service = services[self.name]
 
         # sysctl configuration
         if utils.is_using_clt() or utils.is_using_ioam_only():
-            file.write(
-                Template(constants.COMPOSE_SYSCTL_DEFAULTS).substitute(
-                    {"ioam_id": self.ioam_id}
+            service["sysctls"].extend(
+                utils.fill_template(
+                    constants.COMPOSE_SYSCTL_DEFAULTS, {"ioam_id": self.ioam_id}
                 )
             )
 
         # depends_on
         if len(self.depends_on) > 0:
-            file.write("    depends_on:\n")
-            for dependency in self.depends_on:
-                file.write(f"      - {dependency}\n")
+            service["depends_on"] = list(self.depends_on)
 
-        # write networks
-        self.export_compose_networks(file)
+        # networks
+        networks = self.export_compose_networks()
+        if networks is not None:
+            service["networks"] = networks
 
         # exporting commands
         self.export_commands()
-        self.generate_commands_file()
+        self.generate_commands_file(output)
 
-    def export_k8s(self):
+    def export_k8s(self, output: artifacts.Artifacts):
         """Export the router to Kubernetes configuration files."""
 
         port = kubernetes.Kubernetes.next_node_port()
-        self.export_k8s_pod(port)
-        self.export_k8s_service(port)
+        self.export_k8s_pod(output, port)
+        self.export_k8s_service(output, port)
 
-    def export_k8s_pod(self, port: int):
+    def export_k8s_pod(self, output: artifacts.Artifacts, port: int):
         """Export the router to a Kubernetes pod using the given `port`."""
 
         cmd = (
@@ -134,14 +134,13 @@ class Router(entities.Entity):
             "KEY_FILE": "empty",
             "IP_VERSION": f'"{os.environ[constants.IP_VERSION_ENV]}"',
             "ports": Template(constants.K8S_POD_PORT).substitute({"port": port}),
+            "affinity": self.k8s_affinity(),
         }
         pod = constants.TEMPLATE_K8S_POD.substitute(pod_config)
 
         # output file
-        with open(
-            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_pod.yaml"),
-            "w",
-            encoding="utf-8",
+        with output.open(
+            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_pod.yaml")
         ) as f:
             f.write(pod)
 
@@ -153,7 +152,7 @@ class Router(entities.Entity):
                     )
                 )
 
-    def export_k8s_service(self, port: int):
+    def export_k8s_service(self, output: artifacts.Artifacts, port: int):
         """Export the router to a Kubernetes service using the given `port`."""
 
         service_config = {
@@ -165,10 +164,8 @@ class Router(entities.Entity):
         }
         service = constants.TEMPLATE_K8S_SERVICE.substitute(service_config)
 
-        with open(
-            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_service.yaml"),
-            "w",
-            encoding="utf-8",
+        with output.open(
+            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_service.yaml")
         ) as f:
             f.write(service)
             f.close()
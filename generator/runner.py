@@ -0,0 +1,151 @@
+"""
+Run a commands file generated with `--phases`: the blocks of each phase are run in
+parallel, and a phase starts once every block of the previous phases is done.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import concurrent.futures
+
+import utils
+import constants
+
+BLOCK_HEADERS = ("# configuring ", "# impairing ", "# creating ", "# starting ")
+
+
+def check_arguments(args):
+    """Check the arguments of the runner."""
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "commands",
+        nargs="?",
+        default=constants.COMMANDS_FILE,
+        help=f"Path to the commands file (default = {constants.COMMANDS_FILE})",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of blocks run in parallel (default = number of cores)",
+    )
+    parser.add_argument(
+        "--log",
+        default=constants.RUNNER_LOG_FILE,
+        help=f"Path of the timings of the blocks (default = {constants.RUNNER_LOG_FILE})",
+    )
+
+    args = parser.parse_args(args)
+    if args.jobs <= 0:
+        parser.error("--jobs must be positive")
+    return args
+
+
+def split_phases(content: str) -> list[tuple[str, list[tuple[str, str]]]]:
+    """
+    Split the content of a commands file into its phases, each one with its blocks
+    of commands, indexed by their header (e.g. "configuring r1").
+    Commands outside of a block form a block with an empty header.
+    """
+
+    # without phases, the commands are run in order
+    blocks: list[tuple[str, list[str]]] = []
+    phases = [("", blocks)]
+    for line in content.splitlines():
+        if line.startswith("# phase "):
+            blocks = []
+            phases.append((line.removeprefix("# phase ").strip(" #"), blocks))
+        elif line.startswith(BLOCK_HEADERS):
+            blocks.append((line.removeprefix("# ").strip(" #"), []))
+        elif line != "" and not line.startswith("#!"):
+            if len(blocks) == 0:
+                blocks.append(("", []))
+            blocks[-1][1].append(line)
+
+    return [
+        (name, [(header, "\n".join(lines)) for header, lines in blocks])
+        for name, blocks in phases
+        if len(blocks) > 0
+    ]
+
+
+def run_block(phase: str, header: str, script: str) -> dict:
+    """Run the `script` of a block, and return its result and timing."""
+
+    start = time.perf_counter()
+    # not captured: the commands run in background keep the output open
+    status = subprocess.run(["sh", "-c", script], check=False).returncode
+    return {
+        "phase": phase,
+        "block": header,
+        "success": status == 0,
+        "time": time.perf_counter() - start,
+        "status": status,
+    }
+
+
+def run_phase(phase: str, blocks: list[tuple[str, str]], jobs: int) -> list[dict]:
+    """Run the `blocks` of a phase with at most `jobs` blocks at the same time."""
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(run_block, phase, header, script)
+            for header, script in blocks
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            res = future.result()
+            line = f"{res['time']:8.3f}s  {phase or 'commands'}: {res['block']}"
+            if res["success"]:
+                utils.print_info(line)
+            else:
+                utils.print_warning(f"{line} (exit status {res['status']})")
+
+    return [future.result() for future in futures]
+
+
+def run_commands(args) -> int:
+    """Run the blocks of the commands file, and write their timings."""
+
+    args = check_arguments(args)
+    with open(args.commands, "r", encoding="utf-8") as f:
+        phases = split_phases(f.read())
+    if not any(name != "" for name, _ in phases):
+        utils.print_warning(
+            f"{args.commands} has no phases (generated without --phases): "
+            "its commands are run in order"
+        )
+
+    start = time.perf_counter()
+    summary: dict = {"jobs": args.jobs, "phases": []}
+    for name, blocks in phases:
+        phase_start = time.perf_counter()
+        # the blocks of a commands file without phases depend on each other
+        jobs = args.jobs if name != "" else 1
+        results = run_phase(name, blocks, jobs)
+        elapsed = time.perf_counter() - phase_start
+        utils.print_info(f"Phase {name or 'commands'} done in {elapsed:.3f}s")
+        summary["phases"].append({"name": name, "time": elapsed, "blocks": results})
+    summary["time"] = time.perf_counter() - start
+
+    with open(args.log, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    utils.print_info(f"Ran {args.commands} in {summary['time']:.3f}s")
+    utils.print_info(f"Wrote timings to {args.log}")
+
+    failed = [
+        res
+        for phase in summary["phases"]
+        for res in phase["blocks"]
+        if not res["success"]
+    ]
+    if len(failed) > 0:
+        utils.print_warning(f"{len(failed)} block(s) returned a non-zero exit status")
+    return os.EX_OK if len(failed) == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_commands(sys.argv[1:]))
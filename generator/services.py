@@ -9,6 +9,7 @@ import os
 import utils
 import network
 import entities
+import artifacts
 import constants
 import kubernetes
 
@@ -76,16 +77,36 @@ class Service(entities.Entity):
         self.add_command(constants.DELETE_DEFAULT_IPV4_ROUTE)
         self.add_command(constants.DELETE_DEFAULT_IPV6_ROUTE)
 
-        return utils.combine_commands(list(self.commands), "&")
+        return self.combine_commands()
 
-    def export_compose(self, file) -> None:
-        """Export the service in the given docker compose file."""
+    def health_command(self) -> str | None:
+        """
+        Return the command checking that the service is ready: its routes are
+        installed, and it answers on its first entrypoint (through its connections).
+        External images may not have the tools of the probe.
+        """
+
+        cmd = super().health_command()
+        if self.external:
+            return cmd
+
+        probe = constants.HTTP_PROBE.format(
+            constants.HTTPS_PROBE_FLAG if utils.topology_is_https() else "",
+            os.environ[constants.HTTP_VER_ENV],
+            self.ports[0],
+            self.config["endpoints"][0]["entrypoint"],
+        )
+        return probe if cmd is None else f"{cmd} && {probe}"
+
+    def export_compose(self, services: dict, output: artifacts.Artifacts) -> None:
+        """Add the service to the `services` of the Docker Compose document."""
 
         if self.external:
             mappings = {"name": self.name, "dockerImage": self.image_name}
-            file.write(constants.EXTERNAL_TEMPLATE.substitute(mappings))
+            services.update(utils.fill_template(constants.EXTERNAL_TEMPLATE, mappings))
+            service = services[self.name]
         else:
-            # write template
+            # fill template
             mappings = {
                 "name": self.name,
                 "commands": utils.export_single_command(constants.LAUNCH_SERVICE),
@@ -96,97 +117,80 @@ class Service(entities.Entity):
                 "IP_VERSION": os.environ[constants.IP_VERSION_ENV],
                 "dockerImage": self.image_name,
             }
-            file.write(constants.SERVICE_TEMPLATE.substitute(mappings))
+            services.update(utils.fill_template(constants.SERVICE_TEMPLATE, mappings))
+            service = services[self.name]
 
             # if using https => add key + cert
             if utils.topology_is_https():
-                file.write(f"      - CERT_FILE={constants.PATH_CERTIFICATE}\n")
-                file.write(f"      - KEY_FILE={constants.PATH_KEY_FILE}\n")
+                service["environment"].append(f"CERT_FILE={constants.PATH_CERTIFICATE}")
+                service["environment"].append(f"KEY_FILE={constants.PATH_KEY_FILE}")
 
         if self.expose:
-            file.write("    ports:\n")
-            for port in self.ports:
-                file.write(f"     - {port}:{port}\n")
+            service["ports"] = [f"{port}:{port}" for port in self.ports]
 
         # sysctl configuration
         if utils.is_using_clt() or utils.is_using_ioam_only():
-            file.write("    sysctls:")
-            file.write(
-                Template(constants.COMPOSE_SYSCTL_DEFAULTS).substitute(
-                    {"ioam_id": self.ioam_id}
-                )
+            service["sysctls"] = utils.fill_template(
+                constants.COMPOSE_SYSCTL_DEFAULTS, {"ioam_id": self.ioam_id}
             )
 
         # depends_on
-        self.export_compose_depends_on(file)
+        depends_on = self.export_compose_depends_on()
+        if depends_on is not None:
+            service["depends_on"] = depends_on
 
-        # write networks
-        self.export_compose_networks(file)
+        # networks
+        networks = self.export_compose_networks()
+        if networks is not None:
+            service["networks"] = networks
 
-        # write extra hosts to prevent conflict in dns
+        # extra hosts to prevent conflict in dns
         if len(self.extra_hosts) > 0:
-            file.write("    extra_hosts:\n")
-            for host, ip in self.extra_hosts.items():
-                file.write(f'      - "{host}:{ip}"\n')
+            service["extra_hosts"] = [
+                f"{host}:{ip}" for host, ip in self.extra_hosts.items()
+            ]
 
         # export commands
         self.export_commands()
-        self.generate_commands_file()
+        self.generate_commands_file(output)
 
-    def export_compose_networks(self, file) -> None:
+    def export_compose_networks(self) -> dict | None:
         """Export network settings in Docker compose."""
 
-        # no network to attach
-        if self.count_l3_networks() == 0 and not utils.is_using_jaeger():
-            return
-
-        file.write("    networks:\n")
-
+        networks = {}
         if utils.is_using_jaeger():
-            file.write("      network_telemetry:\n")
-
-        for i, net in enumerate(self.attached_networks):
-            # do not attach L2 network. Will be configured with veth
-            if net.type == network.NetworkType.L2_NET:
-                continue
-
-            name = net.name
-            ip = net.get_entity_ip(self.name)
-            mac = net.get_entity_mac(self.name)
-            ifname = utils.get_interface_name(i, self.name)
+            networks["network_telemetry"] = None
+        networks.update(self.compose_networks())
 
-            mappings = {"net_name": name, "ip": ip, "mac": mac, "ifname": ifname}
-
-            if utils.topology_is_ipv4():
-                file.write(constants.COMPOSE_IPV4_NET_SPEC.substitute(mappings))
-            else:
-                file.write(constants.COMPOSE_IPV6_NET_SPEC.substitute(mappings))
+        # no network to attach
+        if len(networks) == 0:
+            return None
+        return networks
 
-    def export_compose_depends_on(self, file) -> None:
+    def export_compose_depends_on(self) -> list[str] | None:
         """Export depends on in Docker compose."""
 
         # no dependence
         if len(self.depends_on) == 0 and not (
             utils.is_using_clt() or utils.is_using_jaeger()
         ):
-            return
-
-        file.write("    depends_on:\n")
+            return None
 
+        depends_on = []
         if utils.is_using_jaeger():
-            file.write("      - jaeger\n")
+            depends_on.append("jaeger")
         if utils.is_using_clt():
-            file.write("      - ioam-collector\n")
-        for dependency in self.depends_on:
-            file.write(f"      - {dependency}\n")
+            depends_on.append("ioam-collector")
+        depends_on.extend(self.depends_on)
+        return depends_on
 
-    def export_k8s(self):
+    def export_k8s(self, output: artifacts.Artifacts):
         """Export the service to Kubernetes configuration files."""
 
-        self.export_k8s_pod()
-        self.export_k8s_service()
+        self.export_k8s_pod(output)
+        self.export_k8s_service(output)
 
-    def export_k8s_pod(self):
+    def export_k8s_pod(self, output: artifacts.Artifacts):
         """Export the service to a Kubernetes pod."""
 
         ports = ""
@@ -200,7 +204,7 @@ class Service(entities.Entity):
                 + f" & {utils.export_single_command(constants.LAUNCH_SERVICE)}"
             )
         else:
-            with open(constants.COMMANDS_FILE, "a", encoding="utf-8") as f:
+            with output.open(constants.COMMANDS_FILE, "a") as f:
                 cmds = self.export_commands()
                 f.write(constants.KUBECTL_CMD.format(f"{self.name}-pod", cmds) + " &")
                 f.write("\n")
@@ -221,6 +225,7 @@ class Service(entities.Entity):
             "KEY_FILE": "empty",
             "IP_VERSION": f'"{os.environ[constants.IP_VERSION_ENV]}"',
             "ports": ports,
+            "affinity": self.k8s_affinity(),
         }
 
         if utils.topology_is_https():
@@ -230,10 +235,8 @@ class Service(entities.Entity):
         pod = constants.TEMPLATE_K8S_POD.substitute(pod_config)
 
         # output file
-        f = open(
-            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_pod.yaml"),
-            "w",
-            encoding="utf-8",
+        f = output.open(
+            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_pod.yaml")
         )
         f.write(pod)
 
@@ -256,7 +259,7 @@ class Service(entities.Entity):
 
         f.close()
 
-    def export_k8s_service(self):
+    def export_k8s_service(self, output: artifacts.Artifacts):
         """Export the service to a Kubernetes service."""
 
         ports = ""
@@ -271,9 +274,7 @@ class Service(entities.Entity):
             "ports": ports,
         }
         service = constants.TEMPLATE_K8S_SERVICE.substitute(service_config)
-        with open(
-            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_service.yaml"),
-            "w",
-            encoding="utf-8",
+        with output.open(
+            os.path.join(constants.K8S_EXPORT_FOLDER, f"{self.name}_service.yaml")
         ) as f:
             f.write(service)
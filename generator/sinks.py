@@ -0,0 +1,175 @@
+"""
+Sinks writing the generated artifacts.
+"""
+
+import io
+import os
+import sys
+import time
+import hashlib
+import tarfile
+import tempfile
+import concurrent.futures
+from abc import ABC, abstractmethod
+
+import artifacts
+
+
+def default_mode() -> int:
+    """Return the permissions of a newly created file."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def content_hash(data: bytes) -> str:
+    """Return the hash identifying the content `data` of a file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_modified(path: str, content: str) -> bool:
+    """Return whether writing `content` to the file at `path` would modify it."""
+
+    data = content.encode("utf-8")
+    try:
+        if os.stat(path).st_size != len(data):
+            return True
+        with open(path, "rb") as f:
+            return content_hash(f.read()) != content_hash(data)
+    except FileNotFoundError:
+        return True
+
+
+def modified_files(files: dict[str, str]) -> dict[str, str]:
+    """Return the `files`, indexed by their path, whose content differs on disk."""
+
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        modified = pool.map(is_modified, files.keys(), files.values())
+        return {
+            path: content
+            for (path, content), changed in zip(files.items(), modified)
+            if changed
+        }
+
+
+def write_atomically(files: dict[str, str]) -> None:
+    """
+    Write the `files`, indexed by their path, as a single set: every file is first
+    written next to its destination, then all of them are renamed. A crash never
+    leaves a partially written file, and the previous files are kept if any write fails.
+    """
+
+    staged: list[tuple[str, str]] = []
+
+    def stage(path: str, content: str) -> None:
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(
+            dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+        )
+        staged.append((tmp, path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(content)
+
+        # keep the permissions of the existing file (e.g. executable commands)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = default_mode()
+        os.chmod(tmp, mode)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor() as pool:
+            # consume the results to raise the first error
+            list(pool.map(stage, files.keys(), files.values()))
+    except BaseException:
+        for tmp, _ in staged:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+
+    for tmp, path in staged:
+        os.replace(tmp, path)
+
+
+class Sink(ABC):
+    """Abstract class representing a destination of the artifacts."""
+
+    @abstractmethod
+    def write(self, output: artifacts.Artifacts) -> None:
+        """Write the generated artifacts `output`."""
+
+
+class DirectorySink(Sink):
+    """Write the artifacts inside a directory."""
+
+    def __init__(self, path: str) -> None:
+        """
+        Write the artifacts inside the directory at `path`.
+        The directory is created if it does not exist.
+        """
+        self.path = path
+        # paths of the files written and removed by the last write
+        self.written: list[str] = []
+        self.removed: list[str] = []
+
+    def write(self, output: artifacts.Artifacts) -> None:
+        files = {
+            os.path.join(self.path, path): content for path, content in output.items()
+        }
+
+        # unmodified files are not touched, e.g. for `kubectl apply`
+        modified = modified_files(files)
+        write_atomically(modified)
+        self.written = list(modified)
+
+        # remove files of entities which do not exist anymore to prevent port collisions
+        self.removed = []
+        for directory in output.directories:
+            directory = os.path.join(self.path, directory)
+            os.makedirs(directory, exist_ok=True)
+            for f in sorted(os.listdir(directory)):
+                path = os.path.join(directory, f)
+                if (
+                    f.endswith(".yaml")
+                    and path not in files
+                    and artifacts.file_entity(f) not in output.entities
+                ):
+                    os.remove(path)
+                    self.removed.append(path)
+
+
+class TarballSink(Sink):
+    """Write the artifacts inside a tarball, compressed if its name ends with gz."""
+
+    def __init__(self, path: str) -> None:
+        """Write the artifacts inside the tarball at `path`."""
+        self.path = path
+
+    def write(self, output: artifacts.Artifacts) -> None:
+        mode = "w:gz" if self.path.endswith(("gz", ".tgz")) else "w"
+        now = time.time()
+        with tarfile.open(self.path, mode) as tar:
+            for path, content in output.items():
+                data = content.encode("utf-8")
+                info = tarfile.TarInfo(path)
+                info.size = len(data)
+                info.mtime = now
+                info.mode = 0o755 if path.endswith(".sh") else 0o644
+                tar.addfile(info, io.BytesIO(data))
+
+
+class StdoutSink(Sink):
+    """Write every artifact on the standard output, preceded by its path."""
+
+    def __init__(self, stream=None) -> None:
+        """Write the artifacts on `stream` (default = current standard output)."""
+        self.stream = stream
+
+    def write(self, output: artifacts.Artifacts) -> None:
+        stream = self.stream or sys.stdout
+        for path, content in output.items():
+            stream.write(f"# ==> {path} <==\n")
+            stream.write(content)
+            if not content.endswith("\n"):
+                stream.write("\n")
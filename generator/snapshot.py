@@ -0,0 +1,113 @@
+"""
+Save a built architecture to a snapshot file, and load it to export the
+architecture again without parsing the configuration and building it.
+"""
+
+import os
+import sys
+import gzip
+import pickle
+import tempfile
+import threading
+import concurrent.futures
+
+import sinks
+import utils
+import constants
+import architecture
+
+# entities, networks and interfaces reference each other: (un)pickling a long chain
+# of entities recurses through all of them, which requires a large stack
+RECURSION_LIMIT = 1 << 20
+STACK_SIZE = 1 << 29
+
+
+def deep_call(function, *args):
+    """Call `function` in a thread with a large stack and a high recursion limit."""
+
+    limit = sys.getrecursionlimit()
+    stack_size = threading.stack_size(STACK_SIZE)
+    sys.setrecursionlimit(max(limit, RECURSION_LIMIT))
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(function, *args).result()
+    finally:
+        sys.setrecursionlimit(limit)
+        threading.stack_size(stack_size)
+
+
+def build_flags() -> dict[str, str]:
+    """Return the current flags used to build an architecture."""
+    return {env: os.environ.get(env, "") for env in constants.SNAPSHOT_FLAGS}
+
+
+def save(
+    path: str, base: architecture.Architecture, arch: architecture.Architecture
+) -> None:
+    """
+    Save the architecture to the snapshot at `path`.
+
+    :param base: Base architecture, independent of the flags (see `only_base`).
+    :param arch: Complete architecture derived from `base` with the current flags.
+    """
+
+    header = {
+        "format": constants.SNAPSHOT_FORMAT,
+        "version": constants.VERSION,
+        "flags": build_flags(),
+    }
+    data = deep_call(pickle.dumps, (base, arch), pickle.HIGHEST_PROTOCOL)
+
+    # written next to the destination then renamed: never a truncated snapshot
+    directory = os.path.dirname(path) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+            # the header is read first, without loading the classes of the architecture
+            pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.write(data)
+        os.chmod(tmp, sinks.default_mode())
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def load(path: str, derive=True) -> architecture.Architecture:
+    """
+    Load the architecture of the snapshot at `path`, for the current flags.
+    If the snapshot was saved with other flags, the complete architecture is
+    derived from its base architecture. Only load trusted snapshots.
+
+    :param derive: Derive the architecture if the snapshot was saved with other flags.
+    :raises RuntimeError: If the snapshot was saved by another version, or with
+    other flags and `derive` is False.
+    """
+
+    with gzip.open(path, "rb") as f:
+        try:
+            header = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as err:
+            raise RuntimeError(f"{path} is not a snapshot") from err
+
+        if not isinstance(header, dict) or "format" not in header:
+            raise RuntimeError(f"{path} is not a snapshot")
+        if (
+            header["format"] != constants.SNAPSHOT_FORMAT
+            or header["version"] != constants.VERSION
+        ):
+            raise RuntimeError(
+                f"Snapshot {path} was saved by version {header['version']}, "
+                f"current version is {constants.VERSION}"
+            )
+
+        base, arch = deep_call(pickle.load, f)
+
+    if header["flags"] == build_flags():
+        return arch
+    if not derive:
+        raise RuntimeError(f"Snapshot {path} was saved with other flags")
+
+    utils.print_info("Snapshot was saved with other flags: deriving architecture")
+    architecture.reset_counters()
+    return base.derive()
@@ -5,6 +5,7 @@ Represent a switch in MSTG.
 import utils
 import network
 import entities
+import artifacts
 import constants
 
 
@@ -33,8 +34,91 @@ class Switch(entities.Entity):
 
         return None
 
-    def export_compose(self, file) -> None:
-        """Export the switch in the given Docker Compose `file`."""
+    def netns(self) -> str | None:
+        # OVS only manages the ports of the namespace in which it runs
+        return "" if utils.is_using_netns() else None
+
+    def export_netns(self, output: artifacts.Artifacts, sysctls: list[str]) -> None:
+        """Write the commands creating the switch as an OVS bridge of the host."""
+
+        commands = [
+            constants.OVS_ADD_BRIDGE.format(self.name),
+            constants.LINUX_SET_LINK_UP.format(self.name),
+        ]
+        output.add_commands(self.name, commands)
+        with output.open(constants.COMMANDS_FILE, "a") as f:
+            f.write(f"\n# creating {self.name} #\n")
+            for cmd in commands:
+                f.write(f"{cmd}\n")
+        with output.open(constants.NETNS_CLEANUP_FILE, "a") as f:
+            f.write(constants.OVS_DELETE_BRIDGE.format(self.name) + "\n")
+
+    def ovs_ports(self) -> list[tuple[str, int | None]]:
+        """
+        Return the ports of the OVS bridge, which are the ends of the links of the
+        switch (see `Network.export_compose_l2`), with their VLAN tag if any.
+        """
+
+        ports = []
+        for net in self.attached_networks:
+            for iface in net.interfaces:
+                if iface.entity is None or iface.next_hop is None:
+                    continue
+                for local, remote in [
+                    (iface.entity, iface.next_hop),
+                    (iface.next_hop, iface.entity),
+                ]:
+                    port = (
+                        f"{local.name}_{remote.name}",
+                        net.get_entity_vlan(remote.name),
+                    )
+                    if local is self and port not in ports:
+                        ports.append(port)
+        return ports
+
+    def ovs_transaction(self) -> str:
+        """
+        Return the command creating the OVS bridge of the switch with all its ports
+        and their VLAN tags in a single transaction.
+        """
+
+        # the bridge may already be created by the container (see `export_compose`)
+        operations = [constants.OVS_MAY_ADD_BRIDGE.format(self.name)]
+        for ifname, vlan in self.ovs_ports():
+            if vlan is not None:
+                operations.append(
+                    constants.OVS_ADD_PORT_VLAN.format(self.name, ifname, vlan)
+                )
+            else:
+                operations.append(constants.OVS_ADD_PORT.format(self.name, ifname))
+        return constants.OVS_TRANSACTION.format(
+            constants.OVS_TRANSACTION_SEPARATOR.join(operations)
+        )
+
+    def export_ports(self, output: artifacts.Artifacts) -> None:
+        """
+        Write the OVS transaction adding the ports of the switch in the commands file
+        of `output`, after the blocks creating the links.
+        """
+
+        if len(self.ovs_ports()) == 0:
+            return
+
+        cmd = utils.generate_command(
+            self.ovs_transaction(), self.name, netns=self.netns()
+        )
+        output.add_commands(self.name, [cmd])
+        with output.open(constants.COMMANDS_FILE, "a") as f:
+            f.write(f"\n# configuring {self.name} #\n")
+            f.write(f"{cmd}\n")
+
+    def export_compose(self, services: dict, output: artifacts.Artifacts) -> None:
+        """Add the switch to the `services` of the Docker Compose document."""
+
+        self.export_ports(output)
+        # created as a bridge of the host by the commands file (see `export_netns`)
+        if self.netns() is not None:
+            return
 
         commands = []
         commands.append(constants.OVS_ENABLE_SERVICE)
@@ -42,13 +126,13 @@ class Switch(entities.Entity):
         commands.append(constants.LINUX_SET_LINK_UP.format(self.name))
         commands.append(constants.LAUNCH_BACKGROUND_PROCESS)
 
-        # write template
+        # fill template
         mappings = {
             "name": self.name,
             "dockerImage": "mstg_switch",
             "commands": utils.combine_commands(commands, separator="&&"),
         }
-        file.write(constants.SWITCH_TEMPLATE.substitute(mappings))
+        services.update(utils.fill_template(constants.SWITCH_TEMPLATE, mappings))
 
-    def export_k8s(self):
+    def export_k8s(self, output: artifacts.Artifacts):
         raise RuntimeError("Switches cannot be used with Kubernetes")
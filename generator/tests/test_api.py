@@ -0,0 +1,178 @@
+import io
+import json
+import os
+import tarfile
+import concurrent.futures
+import yaml
+import pytest
+
+import generator.api
+import generator.artifacts
+import generator.sinks
+import generator.compose_exporter
+
+
+def test_generate_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conf_file = os.path.join(os.path.dirname(__file__), "configurations/valid_1.yaml")
+    with open(conf_file, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+
+    options = generator.api.Options(ip=6, jaeger=True)
+    output = generator.api.generate(config, options)
+
+    assert os.listdir(tmp_path) == [], "Generation wrote on disk"
+    compose = yaml.safe_load(output.compose)
+    assert {"frontend", "db", "jaeger"} <= compose["services"].keys()
+    assert "frontend" in output.commands and len(output.commands["frontend"]) > 0
+    assert output.manifests == {}
+
+    # a path gives the same artifacts
+    assert generator.api.generate(conf_file, options).items() == output.items()
+
+
+def test_generate_invalid_options():
+    options = generator.api.Options(ip=4, ioam=True)
+    with pytest.raises(RuntimeError):
+        generator.api.generate("tests/configurations/valid_1.yaml", options)
+
+
+def test_sinks(tmp_path):
+    output = generator.api.generate("tests/configurations/valid_1.yaml")
+
+    generator.sinks.DirectorySink(str(tmp_path / "out")).write(output)
+    for path, content in output.items():
+        assert (tmp_path / "out" / path).read_text(encoding="utf-8") == content
+
+    generator.sinks.TarballSink(str(tmp_path / "out.tar.gz")).write(output)
+    with tarfile.open(tmp_path / "out.tar.gz") as tar:
+        assert sorted(tar.getnames()) == sorted(path for path, _ in output.items())
+
+    stream = io.StringIO()
+    generator.sinks.StdoutSink(stream).write(output)
+    assert "# ==> docker-compose.yaml <==" in stream.getvalue()
+
+
+def test_write_atomically(tmp_path):
+    script = tmp_path / "commands.sh"
+    script.write_text("old", encoding="utf-8")
+    script.chmod(0o755)
+    (tmp_path / "file").write_text("", encoding="utf-8")
+
+    # second file cannot be written: the first one must not be modified
+    with pytest.raises(OSError):
+        generator.sinks.write_atomically(
+            {str(script): "new", str(tmp_path / "file" / "x.yaml"): "new"}
+        )
+    assert script.read_text(encoding="utf-8") == "old"
+    assert sorted(os.listdir(tmp_path)) == ["commands.sh", "file"]
+
+    generator.sinks.write_atomically({str(script): "new"})
+    assert script.read_text(encoding="utf-8") == "new"
+    assert script.stat().st_mode & 0o777 == 0o755
+
+
+def test_compose_json():
+    conf_file = "tests/configurations/valid_5.yaml"
+    options = generator.api.Options(ip=6, jaeger=True, clt=True)
+    compose = yaml.safe_load(generator.api.generate(conf_file, options).compose)
+
+    options.compose_format = "json"
+    output = generator.api.generate(conf_file, options)
+    assert json.loads(output.compose) == compose
+    assert compose["services"]["jaeger"]["networks"]["network_telemetry"] == {
+        "ipv6_address": "::1:0:0:0:2"
+    }
+
+
+def test_compose_yaml():
+    document = {
+        "services": {
+            "s1": {
+                "command": 'sh -c "(ip -6 r a ::/0 via ::1) & wait"',
+                "privileged": True,
+                "cpus": 0.5,
+                "ports": [8080, "8080:8080"],
+                "networks": {"network_telemetry": None, "empty": {}},
+                "healthcheck": {"test": ["CMD", "true"], "interval": 1e-05},
+            }
+        },
+        "strings": [
+            "",
+            "true",
+            "on",
+            "null",
+            "1.5",
+            "0x10",
+            "a: b",
+            "a #b",
+            "x:",
+            "- x",
+            " x",
+            "::1",
+            "é",
+            "two\nlines",
+        ],
+        "nested": [[1, [2]], [], {"a": {"b": ["c"]}}],
+    }
+    text = generator.compose_exporter.to_yaml(document)
+    assert yaml.safe_load(text) == document
+    assert 'command: sh -c "(ip -6 r a ::/0 via ::1) & wait"\n' in text
+    # floats are not written as integers
+    assert type(yaml.safe_load(text)["services"]["s1"]["cpus"]) is float
+
+
+def test_directory_sink_changes(tmp_path):
+    output = generator.artifacts.Artifacts()
+    output.add_directory("k8s_configs")
+    for name in ["r1", "r2"]:
+        output.add_entity(name)
+        with output.open(f"k8s_configs/{name}_pod.yaml") as f:
+            f.write(f"name: {name}\n")
+    sink = generator.sinks.DirectorySink(str(tmp_path))
+    sink.write(output)
+    assert len(sink.written) == 2
+
+    # unmodified files are not written again
+    pod = tmp_path / "k8s_configs" / "r1_pod.yaml"
+    mtime = pod.stat().st_mtime_ns
+    (tmp_path / "k8s_configs" / "r2_service.yaml").write_text("", encoding="utf-8")
+    (tmp_path / "k8s_configs" / "r3_pod.yaml").write_text("", encoding="utf-8")
+    with output.open("k8s_configs/r2_pod.yaml") as f:
+        f.write("name: r2\nimage: router\n")
+    sink.write(output)
+    assert sink.written == [str(tmp_path / "k8s_configs" / "r2_pod.yaml")]
+    assert pod.stat().st_mtime_ns == mtime
+
+    # only the files of removed entities are removed
+    assert sink.removed == [str(tmp_path / "k8s_configs" / "r3_pod.yaml")]
+    assert sorted(os.listdir(tmp_path / "k8s_configs")) == [
+        "r1_pod.yaml",
+        "r2_pod.yaml",
+        "r2_service.yaml",
+    ]
+
+
+def test_generate_environment():
+    environment = dict(os.environ)
+    generator.api.generate(
+        "tests/configurations/valid_1.yaml", generator.api.Options(ip=4)
+    )
+    assert dict(os.environ) == environment
+
+    # concurrent generations do not see the options of each other
+    options = [generator.api.Options(ip=4), generator.api.Options(ip=6)] * 4
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        outputs = list(
+            pool.map(
+                lambda opts: generator.api.generate(
+                    "tests/configurations/valid_1.yaml", opts
+                ),
+                options,
+            )
+        )
+    for opts, output in zip(options, outputs):
+        assert (
+            output.items()
+            == generator.api.generate("tests/configurations/valid_1.yaml", opts).items()
+        )
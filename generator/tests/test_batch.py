@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+import subprocess
+
+
+def test_batch_with_failing_configuration(tmp_path):
+    output = tmp_path / "output"
+    p = subprocess.run(
+        [
+            sys.executable,
+            "batch.py",
+            "--output",
+            str(output),
+            "--jobs",
+            "2",
+            "tests/configurations/valid_[1-3].yaml",
+            "tests/configurations/invalid_0.yaml",
+            "--ip",
+            "6",
+        ],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=False,
+    )
+
+    # one invalid configuration must not abort the others
+    assert p.returncode == 1
+    assert "3/4 generation(s) succeeded" in p.stdout.decode("utf-8")
+
+    with open(output / "summary.json", "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    results = {os.path.basename(res["config"]): res for res in summary["results"]}
+    assert not results["invalid_0.yaml"]["success"]
+    assert "Names of entities must be unique" in results["invalid_0.yaml"]["error"]
+    for i in range(1, 4):
+        assert results[f"valid_{i}.yaml"]["success"]
+        assert os.path.exists(output / f"valid_{i}" / "docker-compose.yaml")
+        assert os.path.exists(output / f"valid_{i}" / "commands.sh")
@@ -0,0 +1,64 @@
+import json
+import pytest
+
+import generator.api
+import generator.generator
+
+CONFIG = "tests/configurations/valid_7.yaml"
+
+
+def test_batch_files():
+    options = generator.api.Options(ip=6, batch_files=True)
+    output = generator.api.generate(CONFIG, options)
+
+    # one invocation per tool and family, reading its batch file
+    commands = output.get("commands.sh")
+    assert (
+        "docker exec -i frontend ip -6 -force -batch - < ./batch_files/frontend.ip6"
+        in commands
+    )
+    assert (
+        "docker exec -i frontend tc -force -batch - < ./batch_files/frontend.tc"
+        in commands
+    )
+    assert "docker exec frontend sh -c 'ip " not in commands
+    assert "docker exec frontend sh -c 'tc " not in commands
+    # timers are still run by the timeline
+    assert "docker exec -d frontend sh /tmp/mstg_timeline.sh $start" in commands
+
+    assert output.get("batch_files/frontend.ip6").splitlines() == [
+        "r a 0:0:0:3::/64 via ::2:0:0:0:3",
+        "r d default",
+    ]
+    assert output.get("batch_files/frontend.ip").splitlines() == [
+        "link set dev eth0_frontend mtu 1300",
+        "link set dev eth0_frontend txqueuelen 1000",
+        "r d default",
+    ]
+    assert output.get("batch_files/frontend.tc").startswith(
+        "qdisc add dev eth0_frontend root netem rate 10mbit"
+    )
+
+    # a modified batch file modifies the block of commands of the entity
+    manifest = json.loads(output.get("manifest.json"))
+    options.batch_files = False
+    unbatched = json.loads(generator.api.generate(CONFIG, options).get("manifest.json"))
+    assert (
+        manifest["units"]["commands/frontend"]["hash"]
+        != unbatched["units"]["commands/frontend"]["hash"]
+    )
+
+
+def test_batch_files_netns():
+    options = generator.api.Options(ip=6, netns=True, batch_files=True)
+    output = generator.api.generate(CONFIG, options)
+    assert "ip netns exec r1 ip -6 -force -batch ./batch_files/r1.ip6" in (
+        output.get("commands.sh")
+    )
+
+
+@pytest.mark.parametrize("flag", ["--single-exec", "--watch", "--kubernetes"])
+def test_batch_files_arguments(capsys, flag):
+    with pytest.raises(SystemExit):
+        generator.generator.gen_config_files(["--ip", "6", "--batch-files", flag])
+    assert f"--batch-files cannot be used with {flag}" in capsys.readouterr().err
@@ -41,7 +41,7 @@ def test_clt_with_wrong_parameters(capsys):
     assert "CLT requires Jaeger!" in captured.out, "Unexpected output"
 
 
-def test_with_valid_configuration(capsys):
+def test_with_valid_configuration(capsys, tmp_path):
     ret = generator.generator.gen_config_files(
         [
             "--config",
@@ -51,6 +51,8 @@ def test_with_valid_configuration(capsys):
             "6",
             "--ioam",
             "--jaeger",
+            "--output-dir",
+            str(tmp_path),
         ]
     )
 
@@ -58,3 +60,22 @@ def test_with_valid_configuration(capsys):
 
     captured = capsys.readouterr()
     assert "Built architecture" in captured.out, "Unexepected output"
+
+
+def test_output_dir(tmp_path):
+    output = tmp_path / "out"
+    ret = generator.generator.gen_config_files(
+        [
+            "--config",
+            "tests/configurations/valid.yaml",
+            "--ip",
+            "6",
+            "--output-dir",
+            str(output),
+        ]
+    )
+
+    assert ret == os.EX_OK
+    for name in ["commands.sh", "docker-compose.yaml", "architecture.svg"]:
+        assert (output / name).is_file(), f"Missing {name} in output directory"
+    assert "# configuring " in (output / "commands.sh").read_text(encoding="utf-8")
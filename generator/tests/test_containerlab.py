@@ -0,0 +1,44 @@
+import json
+import yaml
+import pytest
+
+import generator.api
+import generator.generator
+
+
+def test_containerlab_topology():
+    options = generator.api.Options(ip=6, containerlab=True, jaeger=True)
+    output = generator.api.generate("tests/configurations/valid_10.yaml", options)
+    assert output.compose is None
+
+    topology = yaml.safe_load(output.containerlab)
+    assert topology["prefix"] == ""
+    nodes = topology["topology"]["nodes"]
+    assert nodes.keys() == {"jaeger", "frontend", "r1", "db"}
+    assert nodes["r1"]["image"] == "mstg_router"
+    assert nodes["db"]["env"]["SERVICE_NAME"] == "db"
+
+    # one veth pair per L3 network, eth0 being the management interface
+    links = topology["topology"]["links"]
+    assert [[end["node"] for end in link["endpoints"]] for link in links] == [
+        ["frontend", "r1"],
+        ["r1", "db"],
+    ]
+    assert links[1]["endpoints"][0]["interface"] == "eth2"
+
+    # addresses are configured before the routes and the impairments
+    commands = nodes["frontend"]["exec"]
+    assert commands[0].startswith("sh -c 'ip addr add ")
+    assert "sh -c 'ip link set dev eth1 mtu 1300'" in commands
+
+    manifest = json.loads(output.get("manifest.json"))
+    assert manifest["output"] == "containerlab"
+    assert "link/r1:eth2--db:eth1" in manifest["units"]
+
+
+def test_containerlab_with_kubernetes(capsys):
+    with pytest.raises(SystemExit):
+        generator.generator.gen_config_files(
+            ["--ip", "6", "--containerlab", "--kubernetes"]
+        )
+    assert "cannot be used with --kubernetes" in capsys.readouterr().err
@@ -0,0 +1,54 @@
+import os
+import yaml
+
+import generator.generator
+
+CONFIG = "tests/configurations/valid_10.yaml"
+
+
+def generate(output, config, *args) -> None:
+    path = output / "config.yaml"
+    output.mkdir(exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    ret = generator.generator.gen_config_files(
+        ["--ip", "6", "--config", str(path), "--output-dir", str(output), *args]
+    )
+    assert ret == os.EX_OK
+
+
+def test_live_update(tmp_path):
+    with open(CONFIG, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    path = str(tmp_path / "arch.snapshot")
+    generate(tmp_path / "running", config, "--snapshot", path)
+
+    connection = config["frontend"]["connections"][0]
+    connection["delay"] = "20us"
+    connection["mtu"] = 1400
+    del connection["buffer_size"]
+    generate(tmp_path / "update", config, "--live-update", path)
+
+    with open(tmp_path / "update" / "live_update.sh", "r", encoding="utf-8") as f:
+        script = f.read()
+    commands = [line for line in script.splitlines() if line.startswith("docker")]
+    assert len(commands) == 3
+    assert all(cmd.startswith("docker exec frontend ") for cmd in commands)
+    assert "tc qdisc change dev eth0_frontend root netem" in script
+    assert "delay 20us" in script
+    assert "ip link set dev eth0_frontend mtu 1400" in script
+    assert "ip link set dev eth0_frontend txqueuelen 1000" in script
+
+
+def test_live_update_recreate(tmp_path, capsys):
+    with open(CONFIG, "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    path = str(tmp_path / "arch.snapshot")
+    generate(tmp_path / "running", config, "--snapshot", path)
+
+    config["db"]["port"] = 10002
+    generate(tmp_path / "update", config, "--live-update", path)
+
+    with open(tmp_path / "update" / "live_update.sh", "r", encoding="utf-8") as f:
+        assert "docker" not in f.read()
+    assert "remove (cannot be updated live): db" in capsys.readouterr().out
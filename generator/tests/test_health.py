@@ -0,0 +1,57 @@
+import os
+import stat
+import yaml
+import subprocess
+
+import generator.api
+
+
+def test_healthchecks():
+    output = generator.api.generate("tests/configurations/valid_10.yaml")
+    services = yaml.safe_load(output.get("docker-compose.yaml"))["services"]
+
+    # the intermediaries are ready once their routes are installed
+    test = services["r1"]["healthcheck"]["test"]
+    assert test[0] == "CMD-SHELL"
+    assert test[1].split(" && ") == [
+        "ip -6 r show 0:0:0:3::/64 | grep -q .",
+        "ip -6 r show 0:0:0:2::/64 | grep -q .",
+    ]
+
+    # and the services once they answer on their entrypoint
+    test = services["db"]["healthcheck"]["test"][1]
+    assert test.endswith(" && wget -q -T 2 -O /dev/null http://localhost:10001/")
+
+    # external images are only checked for their routes
+    assert "wget" not in services["frontend"]["healthcheck"]["test"][1]
+
+
+def test_wait_ready(tmp_path):
+    output = generator.api.generate("tests/configurations/valid_10.yaml")
+    script = tmp_path / "wait_ready.sh"
+    script.write_text(output.get("wait_ready.sh"))
+
+    # fake docker: an entity is ready once its file exists
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    docker = bin_dir / "docker"
+    docker.write_text(f'#!/bin/sh\n[ -e "{tmp_path}/$2" ]\n')
+    docker.chmod(docker.stat().st_mode | stat.S_IEXEC)
+    env = {**os.environ, "PATH": f"{bin_dir}:{os.environ['PATH']}"}
+
+    (tmp_path / "frontend").touch()
+    (tmp_path / "r1").touch()
+    res = subprocess.run(
+        ["sh", str(script), "1"], capture_output=True, text=True, env=env
+    )
+    assert res.returncode == 1
+    assert res.stderr == "db is not ready after 1s\n"
+
+    # returns as soon as every entity is ready
+    proc = subprocess.Popen(
+        ["sh", str(script)], stdout=subprocess.PIPE, text=True, env=env
+    )
+    (tmp_path / "db").touch()
+    stdout, _ = proc.communicate(timeout=5)
+    assert proc.returncode == 0
+    assert stdout == "All entities are ready\n"
@@ -0,0 +1,74 @@
+import os
+import json
+import yaml
+import pytest
+
+import generator.generator
+
+CONFIG = "tests/configurations/valid_10.yaml"
+HOSTS = "192.0.2.1,192.0.2.2"
+
+
+def test_hosts(tmp_path):
+    ret = generator.generator.gen_config_files(
+        [
+            "--ip",
+            "6",
+            "--config",
+            CONFIG,
+            "--hosts",
+            HOSTS,
+            "--output-dir",
+            str(tmp_path),
+        ]
+    )
+    assert ret == os.EX_OK
+
+    # frontend -> r1 -> db: a single link crosses the hosts
+    with open(tmp_path / "partition.json", "r", encoding="utf-8") as f:
+        report = json.load(f)
+    assert [host["entities"] for host in report["hosts"]] == [
+        ["frontend"],
+        ["r1", "db"],
+    ]
+    assert report["links"] == 2
+    assert report["cross_host_links"] == 1
+
+    with open(tmp_path / "host_0" / "docker-compose.yaml", "r", encoding="utf-8") as f:
+        compose = yaml.safe_load(f)
+    assert compose["services"].keys() == {"frontend"}
+    assert "networks" not in compose
+
+    # each end of the crossing link is a VXLAN interface towards the other host
+    with open(tmp_path / "host_0" / "commands.sh", "r", encoding="utf-8") as f:
+        commands = f.read()
+    assert (
+        "\nlink add eth0_frontend type vxlan id 1 remote 192.0.2.2 dstport 4789\n"
+        in commands
+    )
+    assert "docker exec frontend sh -c 'ip addr add ::2:0:0:0:2/64" in commands
+    with open(tmp_path / "host_1" / "commands.sh", "r", encoding="utf-8") as f:
+        commands = f.read()
+    assert "\nlink add eth0_r1 type vxlan id 1 remote 192.0.2.1 " in commands
+    assert "docker exec db" in commands
+
+    # the link between r1 and db stays a Docker network
+    with open(tmp_path / "host_1" / "docker-compose.yaml", "r", encoding="utf-8") as f:
+        compose = yaml.safe_load(f)
+    assert compose["networks"].keys() == {"network_r1_db"}
+    assert compose["services"]["r1"]["depends_on"] == ["db"]
+
+
+@pytest.mark.parametrize(
+    "args,error",
+    [
+        (["--hosts", "192.0.2.1"], "at least 2 addresses"),
+        (["--hosts", "192.0.2.1,host"], "invalid address host"),
+        (["--hosts", "192.0.2.1,2001:db8::1"], "same IP version"),
+        (["--hosts", HOSTS, "--jaeger"], "cannot be used with --jaeger"),
+    ],
+)
+def test_hosts_arguments(capsys, args, error):
+    with pytest.raises(SystemExit):
+        generator.generator.gen_config_files(["--ip", "6", *args])
+    assert error in capsys.readouterr().err
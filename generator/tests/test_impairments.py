@@ -0,0 +1,35 @@
+import generator.api
+
+
+def frontend_commands(config: str) -> str:
+    output = generator.api.generate(f"tests/configurations/{config}.yaml")
+    return "\n".join(output.commands["frontend"])
+
+
+def test_impairments():
+    commands = frontend_commands("valid_7")
+
+    # the impairments of the connection are applied to its first interface
+    assert "ip link set dev eth0_frontend mtu 1300" in commands
+    assert "ip link set dev eth0_frontend txqueuelen 1000" in commands
+    assert (
+        "tc qdisc add dev eth0_frontend root netem rate 10mbit delay 10us 10us "
+        "loss 5% corrupt 3% duplicate 2% reorder 1%" in commands
+    )
+
+    # each timer modifies the impairment, then restores it after its duration
+    assert "at 10 'ip link set dev eth0_frontend txqueuelen 1500'" in commands
+    assert "at 30 'ip link set dev eth0_frontend txqueuelen 1000'" in commands
+    assert (
+        "at 5 'tc qdisc del dev eth0_frontend root && "
+        "tc qdisc add dev eth0_frontend root netem rate 10mbit delay 10us 10us "
+        "loss 100% " in commands
+    )
+
+
+def test_external_connections():
+    commands = frontend_commands("valid_10")
+
+    # the connections of external containers get their routes and impairments
+    assert "ip -6 r a 0:0:0:3::/64 via " in commands
+    assert "ip link set dev eth0_frontend mtu 1300" in commands
@@ -0,0 +1,138 @@
+import os
+import time
+import yaml
+import pytest
+import subprocess
+
+import generator.api
+import generator.sinks
+# the modules of the generator import each other without the package name
+import utils
+import constants
+import kubernetes
+
+
+@pytest.fixture
+def cluster(monkeypatch):
+    """Replace the queries to the Kubernetes cluster by a fake cluster."""
+
+    k8s = kubernetes.Kubernetes
+    monkeypatch.setattr(k8s, "check_kubectl", staticmethod(lambda: True))
+    monkeypatch.setattr(k8s, "check_meshnet_cni", staticmethod(lambda: True))
+    monkeypatch.setattr(k8s, "get_nb_nodes", staticmethod(lambda: 2))
+    monkeypatch.setattr(
+        k8s, "get_service_ip_range", staticmethod(lambda: "fd00:10:96::/112")
+    )
+    monkeypatch.setattr(
+        k8s, "get_pod_ip_range", staticmethod(lambda: "fd00:10:244::/56")
+    )
+
+
+def generate(layout: str):
+    options = generator.api.Options(ip=6, kubernetes=True, k8s_layout=layout)
+    return generator.api.generate("tests/configurations/valid_1.yaml", options)
+
+
+def test_bundle(cluster):
+    manifests = generate("files").manifests
+    bundle = generate("bundle").manifests
+    assert list(bundle) == ["bundle.yaml"]
+
+    documents = list(yaml.safe_load_all(bundle["bundle.yaml"]))
+    assert sorted(map(repr, documents)) == sorted(
+        repr(yaml.safe_load(m)) for m in manifests.values()
+    )
+
+    # topologies are created before the pods, and pods before the services
+    kinds = [doc["kind"] for doc in documents]
+    assert kinds == sorted(kinds, key=["Topology", "Pod", "Service"].index)
+
+
+def test_kustomization(cluster, tmp_path):
+    output = generate("kustomize")
+    kustomization = yaml.safe_load(output.manifests["kustomization.yaml"])
+    resources = kustomization["resources"]
+    assert sorted(resources) == sorted(set(output.manifests) - {"kustomization.yaml"})
+    assert resources[0].endswith("_meshnet.yaml")
+    assert resources[-1].endswith("_service.yaml")
+
+    # switching to a bundle removes the manifests of every entity
+    generator.sinks.DirectorySink(str(tmp_path)).write(output)
+    generator.sinks.DirectorySink(str(tmp_path)).write(generate("bundle"))
+    assert os.listdir(tmp_path / "k8s_configs") == ["bundle.yaml"]
+
+
+def test_topology_placement(cluster, monkeypatch):
+    nodes = ["node-1", "node-2"]
+    k8s = kubernetes.Kubernetes
+    monkeypatch.setattr(k8s, "get_schedulable_nodes", staticmethod(lambda: nodes))
+    options = generator.api.Options(ip=6, kubernetes=True, k8s_placement="topology")
+    output = generator.api.generate("tests/configurations/valid_10.yaml", options)
+
+    # frontend -> r1 -> db: r1 stays with db, on the node of a single link
+    placement = {}
+    for name in ["frontend", "r1", "db"]:
+        pod = yaml.safe_load(output.manifests[f"{name}_pod.yaml"])
+        affinity = pod["spec"]["affinity"]["nodeAffinity"]
+        terms = affinity["requiredDuringSchedulingIgnoredDuringExecution"]
+        expression = terms["nodeSelectorTerms"][0]["matchExpressions"][0]
+        placement[name] = expression["values"]
+    assert placement == {"frontend": ["node-1"], "r1": ["node-2"], "db": ["node-2"]}
+
+    # placed by the scheduler by default
+    options = generator.api.Options(ip=6, kubernetes=True)
+    output = generator.api.generate("tests/configurations/valid_10.yaml", options)
+    assert "affinity" not in yaml.safe_load(output.manifests["r1_pod.yaml"])["spec"]
+
+
+def test_wait_interfaces(cluster):
+    options = generator.api.Options(ip=6, kubernetes=True)
+    output = generator.api.generate("tests/configurations/valid_10.yaml", options)
+    pod = yaml.safe_load(output.manifests["r1_pod.yaml"])
+    cmd = pod["spec"]["containers"][0]["args"][2]
+
+    # the commands of r1 wait for its interfaces towards frontend and db
+    assert cmd.startswith(utils.wait_interfaces(["eth1", "eth2"]) + " (ip -6 r a ")
+    assert "sleep 20" not in cmd
+
+
+def test_wait_interfaces_timeout(monkeypatch, tmp_path):
+    monkeypatch.setattr(constants, "K8S_INTERFACE_READY", f"[ -e {tmp_path}/{{}} ]")
+    monkeypatch.setattr(constants, "K8S_INTERFACES_TIMEOUT", 1)
+    (tmp_path / "eth1").touch()
+
+    # the commands go on once the interfaces are created
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        ["sh", "-c", utils.wait_interfaces(["eth1", "eth2"]) + " echo ready"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    time.sleep(0.3)
+    (tmp_path / "eth2").touch()
+    stdout, stderr = proc.communicate()
+    assert stdout == "ready\n"
+    assert stderr == ""
+    assert 0.3 <= time.perf_counter() - start < 1
+
+    # or once the timeout is reached
+    res = subprocess.run(
+        ["sh", "-c", utils.wait_interfaces(["eth3"]) + " echo ready"],
+        capture_output=True,
+        text=True,
+    )
+    assert res.stdout == "ready\n"
+    assert res.stderr == "interfaces eth3 not ready after 1s\n"
+
+
+def test_schedulable_nodes(monkeypatch):
+    stdout = b"control-plane  NoSchedule\nworker-1  \nworker-2 true \nworker-3  \n"
+    monkeypatch.setattr(
+        kubernetes.subprocess,
+        "run",
+        lambda *args, **kwargs: kubernetes.subprocess.CompletedProcess(
+            args, 0, stdout=stdout
+        ),
+    )
+    assert kubernetes.Kubernetes.get_schedulable_nodes() == ["worker-1", "worker-3"]
@@ -0,0 +1,48 @@
+import json
+import yaml
+
+import generator.api
+import generator.manifest
+
+
+def generate(config) -> dict:
+    options = generator.api.Options(ip=6, jaeger=True)
+    output = generator.api.generate(config, options)
+    return json.loads(output.get("manifest.json"))
+
+
+def test_manifest_units():
+    manifest = generate("tests/configurations/valid_5.yaml")
+    assert manifest["output"] == "compose"
+    assert manifest["targets"] == ["checkout", "db", "frontend", "jaeger", "r1", "r2"]
+
+    units = manifest["units"]
+    assert {"service/db", "network/network_telemetry", "commands/r1"} <= units.keys()
+    assert units["service/db"]["targets"] == ["db"]
+    assert "frontend" in units["network/network_telemetry"]["targets"]
+
+
+def test_compare():
+    with open("tests/configurations/valid_5.yaml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    old = generate(config)
+    assert generator.manifest.compare(old, generate(config)) == {
+        "units": [],
+        "create": [],
+        "recreate": [],
+        "remove": [],
+    }
+
+    config["db"]["port"] = 10003
+    del config["checkout"]["endpoints"][0]["connections"]
+    config["shipping"] = {
+        "type": "service",
+        "addr": "shipping",
+        "port": 10004,
+        "endpoints": [{"entrypoint": "/", "respsize": 64}],
+    }
+    diff = generator.manifest.compare(old, generate(config))
+    assert diff["create"] == ["shipping"]
+    assert diff["remove"] == []
+    assert "db" in diff["recreate"] and "checkout" in diff["recreate"]
+    assert "service/db" in diff["units"]
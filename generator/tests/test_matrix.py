@@ -0,0 +1,52 @@
+import os
+import json
+
+import generator.generator
+
+
+def test_matrix(tmp_path):
+    ret = generator.generator.gen_config_files(
+        [
+            "--config",
+            "tests/configurations/valid_5.yaml",
+            "--matrix",
+            str(tmp_path),
+            "--variants",
+            "ipv4,ipv6_jaeger,clt",
+        ]
+    )
+    assert ret == os.EX_OK
+
+    with open(tmp_path / "summary.json", "r", encoding="utf-8") as f:
+        summary = json.load(f)
+    assert [res["variant"] for res in summary["results"]] == [
+        "ipv4",
+        "ipv6_jaeger",
+        "clt",
+    ]
+    for variant in ["ipv4", "ipv6_jaeger", "clt"]:
+        assert os.path.exists(tmp_path / variant / "docker-compose.yaml")
+
+    with open(tmp_path / "clt" / "docker-compose.yaml", "r", encoding="utf-8") as f:
+        assert "mstg_service_clt" in f.read()
+    with open(tmp_path / "ipv4" / "docker-compose.yaml", "r", encoding="utf-8") as f:
+        assert "ipv4_address" in f.read()
+
+
+def test_matrix_unknown_variant(capsys, tmp_path):
+    try:
+        generator.generator.gen_config_files(
+            [
+                "--config",
+                "tests/configurations/valid_5.yaml",
+                "--matrix",
+                str(tmp_path),
+                "--variants",
+                "ipv5",
+            ]
+        )
+    except SystemExit:
+        pass
+
+    captured = capsys.readouterr()
+    assert "unknown variant ipv5" in captured.err, "Unexpected output"
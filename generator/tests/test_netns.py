@@ -0,0 +1,35 @@
+import yaml
+
+import generator.api
+
+CONFIG = "tests/configurations/valid_11.yaml"
+
+
+def test_netns():
+    options = generator.api.Options(ip=6, netns=True)
+    output = generator.api.generate(CONFIG, options)
+
+    # only the services are containers, without docker networks towards r1 and fw1
+    compose = yaml.safe_load(output.compose)
+    assert compose["services"].keys() == {"frontend", "db"}
+    assert "networks" not in compose
+    assert "depends_on" not in compose["services"]["db"]
+
+    # namespaces are created before their links, then configured
+    commands = output.get("commands.sh")
+    assert commands.index("ip netns add fw1") < commands.index("link add eth1_fw1")
+    assert "\nlink set eth1_fw1 netns fw1\n" in commands
+    assert "ip netns exec fw1 sh -c 'ip6tables -P FORWARD DROP'" in commands
+    assert "docker exec fw1" not in commands
+    assert "ip netns del fw1" in output.get("netns_cleanup.sh")
+
+    # the PIDs of the containers are looked up once, before every link
+    assert commands.count("docker inspect") == 1
+    assert "docker inspect -f '{{.Name}} {{.State.Pid}}' frontend db" in commands
+    assert commands.index("docker inspect") < commands.index("ip -force -batch -")
+    assert "\nlink set eth0_db netns $pid_db\n" in commands
+
+    # the same topology with containers
+    output = generator.api.generate(CONFIG, generator.api.Options(ip=6))
+    assert "fw1" in yaml.safe_load(output.compose)["services"]
+    assert output.get("netns_cleanup.sh") is None
@@ -0,0 +1,74 @@
+import json
+
+import generator.api
+import generator.runner
+
+
+def test_phases():
+    options = generator.api.Options(ip=6, phases=True)
+    output = generator.api.generate("tests/configurations/valid_7.yaml", options)
+    phases = generator.runner.split_phases(output.get("commands.sh"))
+    assert [name for name, _ in phases] == ["routes", "impairments", "timers"]
+
+    # the links are impaired once every route is configured
+    routes = dict(phases[0][1])
+    assert routes.keys() == {"configuring r1", "configuring frontend", "configuring db"}
+    assert "mtu 1300" not in routes["configuring frontend"]
+    impairments = dict(phases[1][1])
+    assert impairments.keys() == {"impairing frontend"}
+    assert "docker exec frontend sh -c 'ip link set dev eth0_frontend mtu 1300'" in (
+        impairments["impairing frontend"]
+    )
+    assert "< ./timelines/frontend.sh" in impairments["impairing frontend"]
+    assert dict(phases[2][1]).keys() == {"starting the timelines"}
+
+    # the impairments are still commands of the entity
+    assert any("mtu 1300" in cmd for cmd in output.commands["frontend"])
+
+
+def test_runner(tmp_path):
+    commands = tmp_path / "commands.sh"
+    commands.write_text(
+        "#!/bin/sh\n\n"
+        "# phase links #\n\n"
+        "# configuring network_a_b\n\n"
+        f"sleep 0.2 && echo a >> {tmp_path}/order\n\n"
+        "# configuring network_b_c\n\n"
+        f"echo b >> {tmp_path}/order\n\n"
+        "# phase routes #\n\n"
+        "# configuring c #\n"
+        f"echo c >> {tmp_path}/order\n"
+        "false\n"
+    )
+    log = tmp_path / "timings.json"
+    ret = generator.runner.run_commands(
+        [str(commands), "--jobs", "2", "--log", str(log)]
+    )
+    assert ret == 1
+
+    # the blocks of a phase run in parallel, and the next phase waits for them
+    assert (tmp_path / "order").read_text().split() == ["b", "a", "c"]
+    with open(log, "r", encoding="utf-8") as f:
+        timings = json.load(f)
+    assert [phase["name"] for phase in timings["phases"]] == ["links", "routes"]
+    links = timings["phases"][0]["blocks"]
+    assert [block["block"] for block in links] == [
+        "configuring network_a_b",
+        "configuring network_b_c",
+    ]
+    assert links[0]["time"] >= 0.2
+    assert not timings["phases"][1]["blocks"][0]["success"]
+
+
+def test_phases_pids():
+    options = generator.api.Options(ip=6, netns=True, phases=True)
+    output = generator.api.generate("tests/configurations/valid_10.yaml", options)
+    phases = dict(generator.runner.split_phases(output.get("commands.sh")))
+    assert list(phases) == ["namespaces", "links", "routes", "impairments"]
+
+    # each block runs in its own shell, with the PIDs of its own containers
+    links = dict(phases["links"])
+    assert "docker inspect -f '{{.Name}} {{.State.Pid}}' db" in (
+        links["configuring network_r1_db"]
+    )
+    assert "pid_frontend" not in links["configuring network_r1_db"]
@@ -0,0 +1,38 @@
+import subprocess
+
+import generator.api
+
+CONFIG = "tests/configurations/valid_10.yaml"
+
+
+def test_single_exec():
+    output = generator.api.generate(CONFIG, generator.api.Options(single_exec=True))
+    commands = output.get("commands.sh")
+
+    # one exec per container, reading its commands from a here-document
+    assert commands.count("docker exec") == 3
+    assert "docker exec -i r1 sh -s <<'MSTG_EOF'\nset -e\n" in commands
+    assert (
+        "ip -6 r d default || { status=$?; "
+        "echo 'r1: command failed: ip -6 r d default' >&2; exit $status; }"
+    ) in commands
+
+    # the same commands as with an exec per command
+    single = generator.api.generate(CONFIG, generator.api.Options())
+    for line in single.get("commands.sh").splitlines():
+        if line.startswith("docker exec frontend sh -c '"):
+            assert line.removeprefix("docker exec frontend sh -c '")[:-1] in commands
+
+
+def test_single_exec_failure():
+    output = generator.api.generate(CONFIG, generator.api.Options(single_exec=True))
+    block = output.get("commands.sh").split("# configuring db #\n")[1]
+
+    # run the script of db locally: the first command fails
+    script = block.replace("docker exec -i db sh -s", "sh -s", 1)
+    script = script.replace("ip -6 r a", "false", 1)
+    result = subprocess.run(["sh", "-c", script], capture_output=True, text=True)
+    assert result.returncode == 1
+    assert (
+        result.stderr == "db: command failed: ip -6 r a 0:0:0:2::/64 via ::3:0:0:0:2\n"
+    )
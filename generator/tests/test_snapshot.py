@@ -0,0 +1,51 @@
+import os
+import gzip
+import pickle
+import pytest
+
+import generator.generator
+import generator.snapshot
+
+CONFIG = "tests/configurations/valid_5.yaml"
+
+
+def generate(output, *args) -> dict[str, str]:
+    ret = generator.generator.gen_config_files(
+        ["--ip", "6", "--output-dir", str(output), *args]
+    )
+    assert ret == os.EX_OK
+
+    files = {}
+    for name in ["commands.sh", "docker-compose.yaml", "manifest.json"]:
+        with open(output / name, "r", encoding="utf-8") as f:
+            files[name] = f.read()
+    return files
+
+
+def test_export_from_snapshot(tmp_path):
+    path = str(tmp_path / "arch.snapshot")
+    saved = generate(tmp_path / "saved", "--config", CONFIG, "--snapshot", path)
+    assert saved == generate(tmp_path / "direct", "--config", CONFIG)
+
+    # same flags: the architecture is exported as is
+    assert generate(tmp_path / "loaded", "--from-snapshot", path) == saved
+
+    # other flags: the architecture is derived from the base of the snapshot
+    flags = ["--jaeger", "--clt", "--https"]
+    assert generate(tmp_path / "derived", "--from-snapshot", path, *flags) == generate(
+        tmp_path / "other", "--config", CONFIG, *flags
+    )
+
+
+def test_snapshot_version(tmp_path):
+    path = str(tmp_path / "arch.snapshot")
+    generate(tmp_path, "--config", CONFIG, "--snapshot", path)
+
+    with gzip.open(path, "rb") as f:
+        header = pickle.load(f)
+    header["version"] = "0.0.0"
+    with gzip.open(path, "wb") as f:
+        pickle.dump(header, f)
+
+    with pytest.raises(RuntimeError, match="version 0.0.0"):
+        generator.snapshot.load(path)
@@ -0,0 +1,32 @@
+import yaml
+
+import generator.api
+
+# the modules of the generator import each other without the package name
+import utils
+
+
+def test_switch_transaction(monkeypatch):
+    monkeypatch.setattr(utils, "check_ovs_kernel_module", lambda: True)
+    options = generator.api.Options(ip=6)
+    output = generator.api.generate("tests/configurations/valid_13.yaml", options)
+
+    # the bridge, its ports and their VLAN tags in a single transaction, once the
+    # links are created
+    commands = output.get("commands.sh")
+    transaction = (
+        "docker exec s1 sh -c 'ovs-vsctl --may-exist add-br s1"
+        " -- add-port s1 s1_frontend tag=10 -- add-port s1 s1_db tag=10'"
+    )
+    assert transaction in commands
+    assert commands.count("ovs-vsctl") == 1
+    assert commands.index("ip link set db_s1 up") < commands.index(transaction)
+
+    # the same transaction is run by containerlab
+    options.containerlab = True
+    output = generator.api.generate("tests/configurations/valid_12.yaml", options)
+    node = yaml.safe_load(output.containerlab)["topology"]["nodes"]["s1"]
+    assert node["exec"] == [
+        "sh -c 'ovs-vsctl --may-exist add-br s1 -- add-port s1 s1_frontend"
+        " -- add-port s1 s1_db'"
+    ]
@@ -0,0 +1,58 @@
+import subprocess
+
+import generator.api
+
+# the modules of the generator import each other without the package name
+import constants
+
+
+def test_timeline():
+    output = generator.api.generate("tests/configurations/valid_7.yaml")
+
+    # the timers are run by a single scheduler per entity, sorted by their offset
+    timeline = output.get("timelines/frontend.sh")
+    events = [line for line in timeline.splitlines() if line.startswith("at ")]
+    assert [event.split()[1] for event in events] == ["5", "10", "30", "35"]
+    assert events[1] == "at 10 'ip link set dev eth0_frontend txqueuelen 1500'"
+    assert events[0].startswith(
+        "at 5 'tc qdisc del dev eth0_frontend root && tc qdisc add dev eth0_frontend"
+    )
+
+    # copied into the container, then started with a start shared by every entity
+    commands = output.get("commands.sh")
+    assert "sleep 10" not in commands
+    copy = "docker exec -i frontend sh -c 'cat > /tmp/mstg_timeline.sh' < ./timelines/frontend.sh"
+    start = "docker exec -d frontend sh /tmp/mstg_timeline.sh $start"
+    assert commands.index(copy) < commands.index("start=$(($(date +%s) + 1))")
+    assert commands.index("start=$(($(date +%s) + 1))") < commands.index(start)
+
+    # Kubernetes and containerlab keep a command in background per timer
+    options = generator.api.Options(ip=6, containerlab=True)
+    output = generator.api.generate("tests/configurations/valid_7.yaml", options)
+    assert "sleep 10 && ip link set dev eth1 txqueuelen 1500" in (output.containerlab)
+
+
+def test_timeline_schedule(tmp_path):
+    log = tmp_path / "timeline.log"
+    script = "\n".join(
+        [
+            "start=$1",
+            f"log={log}",
+            constants.TIMELINE_FUNCTION,
+            constants.TIMELINE_EVENT.format(0.2, "'echo first'"),
+            constants.TIMELINE_EVENT.format(0.4, "'exit 3'"),
+        ]
+    )
+    start = subprocess.run(
+        ["date", "+%s.%N"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+    subprocess.run(["sh", "-c", script, "sh", start], check=True)
+
+    # each event is logged with its time, offset, and exit status
+    lines = [line.split(" ", 3) for line in log.read_text().splitlines()]
+    assert [line[1:] for line in lines] == [
+        ["0.2", "0", "echo first"],
+        ["0.4", "3", "exit 3"],
+    ]
+    for time, offset, _, _ in lines:
+        assert float(time) - float(start) >= float(offset)
@@ -0,0 +1,76 @@
+import copy
+
+import yaml
+import pytest
+
+import generator.api
+
+with open("tests/configurations/valid_7.yaml", "r", encoding="utf-8") as f:
+    CONFIG = yaml.safe_load(f)
+
+
+def with_trace(trace) -> dict:
+    """Return the configuration with the `trace` on the connection of frontend."""
+
+    config = copy.deepcopy(CONFIG)
+    connection = config["frontend"]["endpoints"][0]["connections"][0]
+    del connection["timers"]
+    connection["trace"] = trace
+    return config
+
+
+def test_trace(tmp_path):
+    trace = tmp_path / "wan.csv"
+    trace.write_text(
+        "time,delay,loss,rate\n"
+        "0,10us,5%,\n"  # same as the connection: nothing to change
+        "0.1,20ms,,\n"
+        "0.2,20ms,1%,\n"
+        "0.3,,1%,\n"  # no change
+        "0.4,,,1mbit\n"
+    )
+    output = generator.api.generate(with_trace({"file": str(trace), "start": 5}))
+
+    # each change replaces the netem qdisc, with the values set until then
+    timeline = output.get("timelines/frontend.sh")
+    events = [line for line in timeline.splitlines() if line.startswith("at ")]
+    assert [event.split()[1] for event in events] == ["5.1", "5.2", "5.4"]
+    assert events[0] == (
+        "at 5.1 'tc qdisc replace dev eth0_frontend root netem rate 10mbit "
+        "delay 20ms 10us loss 5% corrupt 3% duplicate 2% reorder 1%'"
+    )
+    assert "rate 1mbit delay 20ms 10us loss 1% " in events[2]
+
+    # downsampled to a change per step
+    output = generator.api.generate(with_trace({"file": str(trace), "step": 0.25}))
+    timeline = output.get("timelines/frontend.sh")
+    events = [line for line in timeline.splitlines() if line.startswith("at ")]
+    assert [event.split()[1] for event in events] == ["0.2", "0.4"]
+    assert "rate 10mbit delay 20ms 10us loss 1% " in events[0]
+    assert "rate 1mbit delay 20ms 10us loss 1% " in events[1]
+
+
+@pytest.mark.parametrize(
+    "content,error",
+    [
+        ("time,delay\n0,10\n", "invalid delay '10'"),
+        ("time,loss\n0,5%\n1,101%\n", "Sample 2 of trace"),
+        ("time,delay\n1,10ms\n0.5,20ms\n", "must be after the previous one"),
+        ("delay\n10ms\n", "has no time column"),
+        ("time,latency\n0,10ms\n", "unexpected column latency"),
+    ],
+)
+def test_trace_errors(tmp_path, content, error):
+    trace = tmp_path / "wan.csv"
+    trace.write_text(content)
+    with pytest.raises(RuntimeError, match=error):
+        generator.api.generate(with_trace({"file": str(trace)}))
+
+
+@pytest.mark.parametrize(
+    "trace",
+    [{"start": 1}, {"file": "wan.json"}, {"file": "wan.csv", "step": "1s"}],
+)
+def test_trace_config(trace):
+    with pytest.raises(RuntimeError, match="Invalid configuration"):
+        generator.api.generate(with_trace(trace))
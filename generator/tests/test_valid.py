@@ -8,7 +8,7 @@ def is_github_actions() -> bool:
     return os.getenv("GITHUB_ACTIONS") == "true"
 
 
-def test_with_valid_configuration(capsys):
+def test_with_valid_configuration(capsys, tmp_path):
     for i in range(1, 14):
         # will skip switch in GitHub actions because environment does not have OVS kernel module
         if i in [12, 13] and is_github_actions():
@@ -23,6 +23,8 @@ def test_with_valid_configuration(capsys):
                 "6",
                 "--ioam",
                 "--jaeger",
+                "--output-dir",
+                str(tmp_path),
             ]
         )
 
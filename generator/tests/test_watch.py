@@ -0,0 +1,49 @@
+import os
+import yaml
+
+import generator.generator
+import generator.watcher
+import generator.architecture
+import generator.config_parser
+
+
+def test_config_diff():
+    config = generator.config_parser.parse_config("tests/configurations/valid_1.yaml")
+    modified = yaml.safe_load(yaml.safe_dump(config))
+
+    diff = generator.config_parser.ConfigDiff(config, modified)
+    assert diff.is_empty()
+
+    modified["frontend"]["endpoints"][0]["connections"][0]["delay"] = "10ms"
+    diff = generator.config_parser.ConfigDiff(config, modified)
+    assert diff.connections == {"frontend": ["db"]}
+    assert diff.modified == [] and diff.added == [] and diff.removed == []
+
+
+def test_regenerate_modified_entity(capsys, tmp_path):
+    conf_file = str(tmp_path / "config.yaml")
+    with open("tests/configurations/valid_1.yaml", "r", encoding="utf-8") as f:
+        config = yaml.safe_load(f)
+    with open(conf_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+
+    ret = generator.generator.gen_config_files(
+        ["--config", conf_file, "--ip", "6", "--output-dir", str(tmp_path)]
+    )
+    assert ret == os.EX_OK
+
+    config = generator.config_parser.parse_config(conf_file)
+    generator.architecture.reset_counters()
+    arch = generator.architecture.Architecture(conf_file, config)
+    watcher = generator.watcher.Watcher(conf_file, config, arch)
+
+    modified = yaml.safe_load(yaml.safe_dump(config))
+    modified["db"]["port"] = 10002
+    with open(conf_file, "w", encoding="utf-8") as f:
+        yaml.safe_dump(modified, f)
+
+    capsys.readouterr()
+    watcher.regenerate()
+    captured = capsys.readouterr()
+    assert "modified entity db" in captured.out, "Unexpected output"
+    assert "Containers to recreate: db" in captured.out, "Unexpected output"
@@ -0,0 +1,129 @@
+"""
+Replay a trace of the netem impairments of a connection (e.g. the delay, loss and
+rate measured on a real link every 100 ms). The samples of a CSV or Parquet file are
+checked like the impairments of the configuration, and compiled into the schedule of
+the impairments of the interface.
+"""
+
+import os
+import re
+import csv
+import math
+
+import constants
+import config_parser
+
+
+def read_samples(path: str) -> list[dict]:
+    """
+    Read the samples of the trace at `path`, a CSV file with a header or a Parquet
+    file, with a `time` column and a column per impairment.
+    Missing values (empty cells or nulls) are not part of the samples.
+    """
+
+    if not os.path.isfile(path):
+        raise RuntimeError(f"Cannot find trace {path}")
+
+    if os.path.splitext(path)[1] == ".parquet":
+        try:
+            from pyarrow import parquet
+        except ImportError as err:
+            raise RuntimeError(
+                f"Reading the Parquet trace {path} requires pyarrow (pip install pyarrow)"
+            ) from err
+        table = parquet.read_table(path)
+        rows = table.to_pylist()
+        columns = table.column_names
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            rows = list(reader)
+            columns = reader.fieldnames or []
+
+    if constants.TRACE_TIME_COLUMN not in columns:
+        raise RuntimeError(f"Trace {path} has no {constants.TRACE_TIME_COLUMN} column")
+    for column in columns:
+        if (
+            column != constants.TRACE_TIME_COLUMN
+            and column not in constants.TRACE_IMPAIRMENTS
+        ):
+            raise RuntimeError(
+                f"Trace {path} has an unexpected column {column}, expected "
+                f"{constants.TRACE_TIME_COLUMN} and {', '.join(constants.TRACE_IMPAIRMENTS)}"
+            )
+
+    return [
+        {
+            column: str(value).strip()
+            for column, value in row.items()
+            if value is not None and str(value).strip() != ""
+        }
+        for row in rows
+    ]
+
+
+def check_samples(path: str, samples: list[dict]) -> list[tuple[float, dict]]:
+    """
+    Check the `samples` of the trace at `path`: increasing times in seconds, and
+    values valid for `tc` (see `TC_*_REGEX`). Return the samples indexed by their time.
+    """
+
+    checked = []
+    previous = -math.inf
+    for i, sample in enumerate(samples):
+        time = sample.pop(constants.TRACE_TIME_COLUMN, "")
+        if re.search(constants.TIMER_TIME_REGEX, time) is None:
+            raise RuntimeError(
+                f"Sample {i + 1} of trace {path} must have a time as an integer/float "
+                f"amount of seconds, not '{time}'"
+            )
+        if float(time) <= previous:
+            raise RuntimeError(
+                f"Sample {i + 1} of trace {path} must be after the previous one"
+            )
+        previous = float(time)
+
+        for name, value in sample.items():
+            if not config_parser.check_single_impairment(name, value):
+                raise RuntimeError(
+                    f"Sample {i + 1} of trace {path} has an invalid {name} '{value}'"
+                )
+        checked.append((float(time), sample))
+
+    return checked
+
+
+def playback(path: str, connection, step: float = 0) -> list[tuple[float, dict]]:
+    """
+    Compile the trace at `path` into the schedule of the impairments of the
+    `connection`: the impairments set by each change, and its offset in seconds.
+    A sample only sets the impairments it specifies, the others keep their previous
+    value, starting from the ones of the connection. Samples which do not change
+    the impairments are dropped.
+    With a `step` (in seconds), the trace is downsampled to at most one change per
+    step: the last sample of each step, with the values set until then.
+    """
+
+    samples = check_samples(path, read_samples(path))
+
+    # impairments set by the connection, then by the samples
+    current = {
+        name: connection[name]
+        for name in constants.TRACE_IMPAIRMENTS
+        if name in connection
+    }
+    applied = current
+    events = []
+    for i, (time, sample) in enumerate(samples):
+        current = {**current, **sample}
+        if (
+            step > 0
+            and i + 1 < len(samples)
+            and math.floor(samples[i + 1][0] / step) == math.floor(time / step)
+        ):
+            continue
+        if current != applied:
+            events.append((time, {**connection, **current}))
+            applied = current
+
+    return events
@@ -5,11 +5,13 @@ Utilities for MSTG.
 import os
 import re
 import sys
+import shlex
 import argparse
 import bitarray
 import ipaddress
 import subprocess
 import bitarray.util
+from string import Template
 
 import constants
 import kubernetes
@@ -34,7 +36,60 @@ def check_arguments(args) -> str:
         help="Generate Kubernetes configuration files",
     )
     parser.add_argument(
-        "--ip", required=True, choices=[4, 6], type=int, help="IP version"
+        "--containerlab",
+        action="store_true",
+        help="Generate a containerlab topology linking the containers with veth pairs",
+    )
+    parser.add_argument(
+        "--netns",
+        action="store_true",
+        help=(
+            "Create the routers and firewalls as network namespaces, and the switches "
+            "as OVS bridges of the host, instead of containers (Docker Compose only)"
+        ),
+    )
+    parser.add_argument(
+        "--hosts",
+        metavar="ADDRESSES",
+        help=(
+            "Comma-separated addresses of the Docker hosts across which the "
+            "architecture is partitioned, linked by VXLAN (Docker Compose only)"
+        ),
+    )
+    parser.add_argument(
+        "--single-exec",
+        action="store_true",
+        help=(
+            "Configure each container with a single exec running all its commands "
+            "(Docker Compose only)"
+        ),
+    )
+    parser.add_argument(
+        "--phases",
+        action="store_true",
+        help=(
+            "Group the commands file in phases whose blocks can be run in parallel "
+            "by runner.py (Docker Compose only)"
+        ),
+    )
+    parser.add_argument(
+        "--batch-files",
+        action="store_true",
+        help=(
+            "Write the commands of ip and tc of each entity in batch files, run by a "
+            "single invocation of each tool (Docker Compose only)"
+        ),
+    )
+    parser.add_argument(
+        "--ip",
+        # variants of the matrix set their own IP version
+        required=not any(
+            arg.startswith("--matrix")
+            for arg in (sys.argv[1:] if args is None else args)
+        ),
+        choices=[4, 6],
+        type=int,
+        help="IP version",
     )
     parser.add_argument(
         "--https", action="store_true", help="Use HTTPS for communication"
@@ -42,6 +97,62 @@ def check_arguments(args) -> str:
     parser.add_argument("--jaeger", action="store_true", help="Enable Jaeger")
     parser.add_argument("--ioam", action="store_true", help="Enable only IOAM (no CLT)")
     parser.add_argument("--clt", action="store_true", help="Enable CLT")
+    parser.add_argument(
+        "--matrix",
+        metavar="OUTPUT_DIR",
+        help="Generate every variant of flags in a directory per variant inside OUTPUT_DIR",
+    )
+    parser.add_argument(
+        "--variants",
+        help=(
+            "Comma-separated list of variants to generate with --matrix "
+            f"(default = all Docker Compose variants, among {', '.join(constants.MATRIX_VARIANTS)})"
+        ),
+    )
+    parser.add_argument(
+        "--compose-format",
+        choices=constants.COMPOSE_FORMATS,
+        default="yaml",
+        help="Format of the Docker Compose file (default = yaml)",
+    )
+    parser.add_argument(
+        "--k8s-layout",
+        choices=constants.K8S_LAYOUTS,
+        default="files",
+        help="Layout of the Kubernetes manifests (default = files)",
+    )
+    parser.add_argument(
+        "--k8s-placement",
+        choices=constants.K8S_PLACEMENTS,
+        default="scheduler",
+        help=(
+            "Placement of the pods: by the scheduler, or on nodes keeping the "
+            "connected entities together (default = scheduler)"
+        ),
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=".",
+        help="Directory in which the artifacts are generated (default = current directory)",
+    )
+    parser.add_argument(
+        "--snapshot",
+        help="Save the built architecture to a snapshot file",
+    )
+    parser.add_argument(
+        "--from-snapshot",
+        help="Export the architecture of a snapshot file instead of building it",
+    )
+    parser.add_argument(
+        "--live-update",
+        metavar="SNAPSHOT",
+        help="Generate a script updating the running topology saved to a snapshot",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Watch the config file and regenerate the modified artifacts",
+    )
     # debug flags
     parser.add_argument(
         "--time",
@@ -52,6 +163,74 @@ def check_arguments(args) -> str:
 
     args = parser.parse_args(args)
 
+    if args.debug:
+        print_info("Generating with debug mode")
+        os.environ[constants.DEBUG_VAR_ENV] = "True"
+    else:
+        os.environ[constants.DEBUG_VAR_ENV] = "False"
+
+    os.environ[constants.OUTPUT_DIR_ENV] = args.output_dir
+    os.environ[constants.COMPOSE_FORMAT_ENV] = args.compose_format
+    os.environ[constants.K8S_LAYOUT_ENV] = args.k8s_layout
+    os.environ[constants.K8S_PLACEMENT_ENV] = args.k8s_placement
+    os.environ[constants.SNAPSHOT_ENV] = args.snapshot or ""
+    os.environ[constants.FROM_SNAPSHOT_ENV] = args.from_snapshot or ""
+    os.environ[constants.LIVE_UPDATE_ENV] = args.live_update or ""
+
+    if args.from_snapshot is not None:
+        if args.matrix is not None or args.watch:
+            parser.error("--from-snapshot cannot be used with --matrix or --watch")
+        if args.snapshot is not None:
+            parser.error("--from-snapshot cannot be used with --snapshot")
+    if args.live_update is not None and (args.matrix is not None or args.watch):
+        parser.error("--live-update cannot be used with --matrix or --watch")
+
+    if args.containerlab:
+        if args.kubernetes:
+            parser.error("--containerlab cannot be used with --kubernetes")
+        if args.matrix is not None or args.watch:
+            parser.error("--containerlab cannot be used with --matrix or --watch")
+
+    if args.netns:
+        if args.kubernetes or args.containerlab:
+            parser.error("--netns cannot be used with --kubernetes or --containerlab")
+        if args.matrix is not None or args.watch:
+            parser.error("--netns cannot be used with --matrix or --watch")
+    os.environ[constants.NETNS_ENV] = "True" if args.netns else "False"
+
+    if args.single_exec and (args.kubernetes or args.containerlab):
+        # the commands of a pod are already combined in its command
+        parser.error("--single-exec cannot be used with --kubernetes or --containerlab")
+    os.environ[constants.SINGLE_EXEC_ENV] = "True" if args.single_exec else "False"
+
+    if args.phases and (args.kubernetes or args.containerlab):
+        parser.error("--phases cannot be used with --kubernetes or --containerlab")
+    os.environ[constants.PHASES_ENV] = "True" if args.phases else "False"
+
+    if args.batch_files:
+        if args.kubernetes or args.containerlab:
+            parser.error(
+                "--batch-files cannot be used with --kubernetes or --containerlab"
+            )
+        if args.single_exec:
+            parser.error("--batch-files cannot be used with --single-exec")
+        # the blocks of the commands file do not show the content of the batch files
+        if args.watch:
+            parser.error("--batch-files cannot be used with --watch")
+    os.environ[constants.BATCH_FILES_ENV] = "True" if args.batch_files else "False"
+
+    if args.hosts is not None:
+        check_hosts_arguments(parser, args)
+    os.environ[constants.HOSTS_ENV] = args.hosts or ""
+
+    if args.matrix is not None:
+        check_matrix_arguments(parser, args)
+        return args.config
+    os.environ[constants.MATRIX_ENV] = ""
+
+    if args.variants is not None:
+        parser.error("--variants requires --matrix")
+
     if args.ip == 4:
         print_info("Generating architecture with IPv4")
         os.environ[constants.IP_VERSION_ENV] = "4"
@@ -88,11 +267,13 @@ def check_arguments(args) -> str:
         print_info("Generating architecture without CLT")
         os.environ[constants.CLT_ENABLE_ENV] = "0"
 
-    if args.debug:
-        print_info("Generating with debug mode")
-        os.environ[constants.DEBUG_VAR_ENV] = "True"
+    if args.watch:
+        if args.k8s_layout == "bundle":
+            parser.error("--watch cannot be used with --k8s-layout bundle")
+        print_info("Watching the configuration file for modifications")
+        os.environ[constants.WATCH_ENV] = "True"
     else:
-        os.environ[constants.DEBUG_VAR_ENV] = "False"
+        os.environ[constants.WATCH_ENV] = "False"
 
     if args.kubernetes:
         print_info("Generating configurations for Kubernetes:")
@@ -108,9 +289,14 @@ def check_arguments(args) -> str:
         )
         if not kubernetes.Kubernetes.check_meshnet_cni():
             raise RuntimeError("Meshnet CNI is not properly installed on the cluster.")
+    elif args.containerlab:
+        print_info("Generating topology for containerlab")
+        os.environ[constants.OUTPUT_FORMAT_ENV] = constants.CLAB_OUT_ENV
     else:
         print_info("Generating configuration for Docker Compose")
         os.environ[constants.OUTPUT_FORMAT_ENV] = constants.COMPOSE_OUT_ENV
+        if args.hosts is not None:
+            print_info(f"\t- Partitioned across the hosts {args.hosts}")
 
     if args.https:
         print_info("Generating architecture with HTTPS")
@@ -122,35 +308,296 @@ def check_arguments(args) -> str:
     return args.config
 
 
+def check_hosts_arguments(parser: argparse.ArgumentParser, args) -> None:
+    """Check the arguments when partitioning the architecture across hosts."""
+
+    if args.kubernetes or args.containerlab or args.netns:
+        parser.error(
+            "--hosts cannot be used with --kubernetes, --containerlab or --netns"
+        )
+    if args.matrix is not None or args.watch or args.live_update is not None:
+        parser.error("--hosts cannot be used with --matrix, --watch or --live-update")
+    # the collectors run on a single host, unreachable from the other ones
+    if args.jaeger or args.clt:
+        parser.error("--hosts cannot be used with --jaeger or --clt")
+
+    addresses = [address.strip() for address in args.hosts.split(",")]
+    if len(addresses) < 2:
+        parser.error("--hosts requires at least 2 addresses")
+    versions = set()
+    for address in addresses:
+        try:
+            versions.add(ipaddress.ip_address(address).version)
+        except ValueError:
+            parser.error(f"--hosts: invalid address {address}")
+    # the VXLAN packets are sent between the addresses of the hosts
+    if len(versions) > 1:
+        parser.error("--hosts: the addresses must have the same IP version")
+    if len(set(addresses)) != len(addresses):
+        parser.error("--hosts: duplicate addresses")
+    args.hosts = ",".join(addresses)
+
+
+def check_matrix_arguments(parser: argparse.ArgumentParser, args) -> None:
+    """
+    Check the arguments when generating a matrix of variants.
+    The flags of the base architecture are set. Each variant sets its own flags.
+    """
+
+    if args.watch:
+        parser.error("--watch cannot be used with --matrix")
+    if args.snapshot is not None:
+        parser.error("--snapshot cannot be used with --matrix")
+
+    if args.variants is None:
+        variants = [
+            name
+            for name, flags in constants.MATRIX_VARIANTS.items()
+            if "--kubernetes" not in flags
+        ]
+    else:
+        variants = [name.strip() for name in args.variants.split(",")]
+        for name in variants:
+            if name not in constants.MATRIX_VARIANTS:
+                parser.error(f"unknown variant {name}")
+
+    print_info(f"Generating variants {', '.join(variants)} in {args.matrix}")
+    os.environ[constants.MATRIX_ENV] = args.matrix
+    os.environ[constants.MATRIX_VARIANTS_ENV] = ",".join(variants)
+
+    # flags used to build the base architecture, shared by all variants
+    os.environ[constants.WATCH_ENV] = "False"
+    os.environ[constants.IP_VERSION_ENV] = "6"
+    os.environ[constants.JAEGER_ENABLE_ENV] = "False"
+    os.environ[constants.IOAM_ENABLE_ENV] = "0"
+    os.environ[constants.CLT_ENABLE_ENV] = "0"
+    os.environ[constants.HTTP_VER_ENV] = "http"
+    os.environ[constants.OUTPUT_FORMAT_ENV] = constants.COMPOSE_OUT_ENV
+
+
+# structured templates, compiled to functions building their filled copy, indexed by
+# their id (the templates are constants, kept alive by this dictionary)
+fillers: dict[int, tuple] = {}
+
+
+def template_to_format(template: str) -> str:
+    """Convert the string `template` with ${placeholders} to a format string."""
+
+    parts = []
+    end = 0
+    for match in Template.pattern.finditer(template):
+        parts.append(
+            template[end : match.start()].replace("{", "{{").replace("}", "}}")
+        )
+        if match["escaped"] is not None:
+            parts.append("$")
+        elif match["invalid"] is not None:
+            raise ValueError(f"Invalid placeholder in template {template}")
+        else:
+            parts.append(f"{{{match['named'] or match['braced']}}}")
+        end = match.end()
+    parts.append(template[end:].replace("{", "{{").replace("}", "}}"))
+    return "".join(parts)
+
+
+def compile_template(template, values: list) -> str:
+    """
+    Return a Python expression building a copy of the structured `template`, in which
+    the ${placeholders} are substituted by the `mappings` variable. The expression
+    refers to the format strings of the placeholders and to the scalars other than
+    strings by their index in `values`.
+    """
+
+    if isinstance(template, dict):
+        items = ", ".join(
+            f"{compile_template(key, values)}: {compile_template(value, values)}"
+            for key, value in template.items()
+        )
+        return f"{{{items}}}"
+    if isinstance(template, list):
+        items = ", ".join(compile_template(value, values) for value in template)
+        return f"[{items}]"
+    if isinstance(template, str) and "$" in template:
+        values.append(template_to_format(template).format_map)
+        return f"values[{len(values) - 1}](mappings)"
+    if isinstance(template, str):
+        return repr(template)
+    values.append(template)
+    return f"values[{len(values) - 1}]"
+
+
+def fill_template(template, mappings: dict):
+    """
+    Return a copy of the structured `template` (dicts, lists and strings) in which
+    the ${placeholders} of keys and values are substituted by `mappings`.
+    The template is compiled once to a function building the copy, which is about
+    twice faster than walking the template.
+    """
+
+    filler = fillers.get(id(template))
+    if filler is None:
+        values: list = []
+        expression = compile_template(template, values)
+        function = eval(f"lambda mappings: {expression}", {"values": values})
+        filler = fillers[id(template)] = (function, template)
+    return filler[0](mappings)
+
+
 def get_interface_name(iface: int, name: str) -> str:
     """Get the name of an interface."""
-    if output_is_k8s():
+    # eth0 is the default interface of the pods or containerlab nodes
+    if not output_is_compose():
         return f"eth{iface}"
 
     return f"eth{iface}_{name}"
 
 
-def generate_command(cmd: str, entity: str, background=False):
+def generate_command(cmd: str, entity: str, background=False, netns=None):
     """
     Generate command to execute `cmd`.
 
     :param cmd: Command to execute.
     :param entity: Entity in which to execute.
     :param background: Execute command in background.
+    :param netns: Network namespace of the entity ("" for the host), None if the
+    entity is a container (see `Entity.netns`).
     """
 
+    if netns == "":
+        return constants.HOST_CMD_BACKGROUND.format(cmd) if background else cmd
+    if netns is not None and background:
+        return constants.NETNS_CMD_BACKGROUND.format(netns, cmd)
+    if netns is not None:
+        return constants.NETNS_CMD.format(netns, cmd)
     if output_is_compose() and background:
         return constants.DOCKER_CMD_BACKGROUND.format(entity, cmd)
     if output_is_compose():
         return constants.DOCKER_CMD.format(entity, cmd)
+    if output_is_containerlab() and background:
+        return constants.CLAB_BACKGROUND_CMD.format(cmd)
     return cmd
 
 
+def generate_script(cmds: list[str], entity: str, netns=None) -> list[str]:
+    """
+    Generate the lines executing the commands `cmds` in a single script, which
+    stops at the first failing command and reports it.
+
+    :param entity: Entity in which to execute.
+    :param netns: Network namespace of the entity, None if the entity is a container
+    (see `Entity.netns`).
+    """
+
+    if netns is not None:
+        lines = [constants.NETNS_SCRIPT_CMD.format(netns, constants.SCRIPT_END)]
+    else:
+        lines = [constants.DOCKER_SCRIPT_CMD.format(entity, constants.SCRIPT_END)]
+    lines.append("set -e")
+    for cmd in cmds:
+        error = shlex.quote(f"{entity}: command failed: {cmd}")
+        lines.append(constants.SCRIPT_CHECKED_CMD.format(cmd, error))
+    lines.append(constants.SCRIPT_END)
+    return lines
+
+
+def batch_tool(cmd: str) -> str | None:
+    """
+    Return the tool running `cmd`, with its options (e.g. "ip -6"), if `cmd` can be
+    run from a batch file of this tool, None otherwise.
+    """
+
+    words = cmd.split()
+    if len(words) == 0 or words[0] not in constants.BATCH_TOOLS:
+        return None
+    # a line of a batch file is not interpreted by a shell
+    if any(char in cmd for char in "&|;<>$`'\""):
+        return None
+
+    i = 1
+    while i < len(words) and words[i].startswith("-"):
+        i += 1
+    return " ".join(words[:i])
+
+
+def generate_batch_command(tool: str, path: str, entity: str, netns=None) -> str:
+    """
+    Generate the command running the batch file at `path` with `tool` (see
+    `batch_tool`) in the entity.
+
+    :param entity: Entity in which to execute.
+    :param netns: Network namespace of the entity ("" for the host), None if the
+    entity is a container (see `Entity.netns`).
+    """
+
+    if netns == "":
+        return constants.HOST_BATCH_CMD.format(tool, path)
+    if netns is not None:
+        return constants.NETNS_BATCH_CMD.format(netns, tool, path)
+    return constants.DOCKER_BATCH_CMD.format(entity, tool, path)
+
+
+def pid_variable(name: str) -> str:
+    """Return the shell variable holding the PID of the container `name`."""
+
+    # escaped to be a valid and unique name of variable (e.g. "a-b" -> "pid_a_2db")
+    return "pid_" + "".join(c if c.isalnum() else f"_{ord(c):02x}" for c in name)
+
+
+def lookup_pids(names: list[str]) -> list[str]:
+    """
+    Generate the lines storing the PID of each container of `names` in its variable
+    (see `pid_variable`), looked up by a single `docker inspect`.
+    """
+
+    lines = [constants.PID_LOOKUP_START]
+    for name in names:
+        lines.append(constants.PID_LOOKUP_CASE.format(name, pid_variable(name)))
+    lines.append(constants.PID_LOOKUP_END.format(constants.SCRIPT_END))
+    lines.append(f"$({constants.DOCKER_GET_PIDS.format(' '.join(names))})")
+    lines.append(constants.SCRIPT_END)
+    return lines
+
+
+def batch_ip_commands(cmds: list[str]) -> list[str]:
+    """
+    Group the commands of `ip` run on the host among `cmds` in a single `ip -batch`,
+    run before the other commands (e.g. run inside the containers once the
+    interfaces are moved into them), which keep their order.
+    """
+
+    host_ip = [
+        cmd for cmd in cmds if cmd.startswith("ip ") and not cmd.startswith("ip netns ")
+    ]
+    if len(host_ip) < 2:
+        return cmds
+
+    lines = [constants.IP_BATCH_CMD.format(constants.SCRIPT_END)]
+    lines.extend(cmd.removeprefix("ip ") for cmd in host_ip)
+    lines.append(constants.SCRIPT_END)
+    return lines + [cmd for cmd in cmds if cmd not in host_ip]
+
+
 def export_single_command(cmd: str):
     """Export a given single command `cmd`."""
 
-    # sleep to be sure that interfaces had time to be configured properly by meshnet cni
-    return f"({cmd})" if output_is_compose() else f"(sleep 20 && {cmd})"
+    return f"({cmd})"
+
+
+def wait_interfaces(ifnames: list[str]) -> str:
+    """
+    Return the command waiting for the interfaces `ifnames` to be created (e.g. by
+    meshnet cni), which gives up after `K8S_INTERFACES_TIMEOUT` seconds.
+    """
+
+    ready = " && ".join(constants.K8S_INTERFACE_READY.format(i) for i in ifnames)
+    polls = round(constants.K8S_INTERFACES_TIMEOUT / constants.K8S_INTERFACES_POLL)
+    return constants.K8S_WAIT_INTERFACES.format(
+        ready,
+        polls,
+        constants.K8S_INTERFACES_POLL,
+        " ".join(ifnames),
+        constants.K8S_INTERFACES_TIMEOUT,
+    )
 
 
 def combine_commands(cmds: list[str], separator="&") -> str:
@@ -173,11 +620,73 @@ def output_is_k8s() -> bool:
     return os.environ[constants.OUTPUT_FORMAT_ENV] == constants.K8S_OUT_ENV
 
 
+def output_is_containerlab() -> bool:
+    """True if output is a containerlab topology."""
+    return os.environ[constants.OUTPUT_FORMAT_ENV] == constants.CLAB_OUT_ENV
+
+
+def compose_is_json() -> bool:
+    """True if the Docker Compose file is written in JSON."""
+    return os.environ.get(constants.COMPOSE_FORMAT_ENV) == "json"
+
+
+def k8s_layout() -> str:
+    """Layout of the Kubernetes manifests."""
+    return os.environ.get(constants.K8S_LAYOUT_ENV, "files")
+
+
+def k8s_placement() -> str:
+    """Placement of the Kubernetes pods."""
+    return os.environ.get(constants.K8S_PLACEMENT_ENV, "scheduler")
+
+
+def snapshot_output() -> str:
+    """Path of the snapshot in which the architecture is saved, "" if none."""
+    return os.environ.get(constants.SNAPSHOT_ENV, "")
+
+
+def snapshot_input() -> str:
+    """Path of the snapshot from which the architecture is loaded, "" if none."""
+    return os.environ.get(constants.FROM_SNAPSHOT_ENV, "")
+
+
+def live_update_input() -> str:
+    """Path of the snapshot of the running topology to update, "" if none."""
+    return os.environ.get(constants.LIVE_UPDATE_ENV, "")
+
+
 def debug_mode_is_on() -> bool:
     """True if debug mode is on."""
     return os.environ[constants.DEBUG_VAR_ENV] == "True"
 
 
+def is_watching() -> bool:
+    """True if watching the config file for modifications."""
+    return os.environ[constants.WATCH_ENV] == "True"
+
+
+def is_generating_matrix() -> bool:
+    """True if generating a matrix of variants."""
+    return os.environ[constants.MATRIX_ENV] != ""
+
+
+def matrix_output() -> str:
+    """Directory in which the variants of the matrix are generated."""
+    return os.environ[constants.MATRIX_ENV]
+
+
+def matrix_variants() -> list[str]:
+    """Names of the variants of the matrix to generate."""
+    return os.environ[constants.MATRIX_VARIANTS_ENV].split(",")
+
+
+def output_path(path: str) -> str:
+    """Return the location of the artifact `path` inside the output directory."""
+    return os.path.normpath(
+        os.path.join(os.environ.get(constants.OUTPUT_DIR_ENV, "."), path)
+    )
+
+
 def is_measuring_time() -> bool:
     """True if we are measuring the time."""
     return "--time" in sys.argv
@@ -193,6 +702,31 @@ def is_using_clt() -> bool:
     return os.environ[constants.CLT_ENABLE_ENV] == "1"
 
 
+def is_using_netns() -> bool:
+    """True if the intermediaries are network namespaces instead of containers."""
+    return os.environ.get(constants.NETNS_ENV) == "True"
+
+
+def is_using_single_exec() -> bool:
+    """True if the commands of each entity are run by a single exec."""
+    return os.environ.get(constants.SINGLE_EXEC_ENV) == "True"
+
+
+def is_using_phases() -> bool:
+    """True if the commands file is grouped in phases run in parallel."""
+    return os.environ.get(constants.PHASES_ENV) == "True"
+
+
+def is_using_batch_files() -> bool:
+    """True if the commands of ip and tc of each entity are run from batch files."""
+    return os.environ.get(constants.BATCH_FILES_ENV) == "True"
+
+
+def hosts() -> list[str]:
+    """Addresses of the hosts across which the architecture is partitioned."""
+    return [host for host in os.environ.get(constants.HOSTS_ENV, "").split(",") if host]
+
+
 def is_using_jaeger() -> bool:
     """True if the architecture includes Jaeger."""
     return os.environ[constants.JAEGER_ENABLE_ENV] == "True"
@@ -415,6 +949,25 @@ def check_ovs_kernel_module() -> bool:
     return res.returncode == 0
 
 
+def print_summary(results: list[dict], key: str) -> None:
+    """
+    Print the summary of many generations.
+    Each result gives its `success`, `time`, and `error`, and is named by its `key`.
+    """
+
+    print("\nSummary:")
+    for res in results:
+        status = "OK  " if res["success"] else "FAIL"
+        line = f"  {status} {res['time']:8.3f}s  {res[key]}"
+        if res["success"]:
+            print_success(line)
+        else:
+            print_error(f"{line}\n\t{res['error']}")
+
+    nb_success = sum(1 for res in results if res["success"])
+    print(f"\n{nb_success}/{len(results)} generation(s) succeeded.")
+
+
 def print_success(text: str):
     """Print a success text."""
     print(f"\033[92m{text}\033[0m")
@@ -0,0 +1,243 @@
+"""
+Watch the configuration file and regenerate only the modified artifacts.
+"""
+
+import os
+import time
+import yaml
+
+import sinks
+import utils
+import network
+import constants
+import k8s_exporter
+import architecture
+import config_parser
+import compose_exporter
+
+
+def read_artifacts() -> dict[str, str]:
+    """Read the artifacts currently on disk, indexed by their path."""
+
+    paths = [
+        utils.output_path(constants.COMMANDS_FILE),
+        utils.output_path(constants.MANIFEST_FILE),
+    ]
+    folder = utils.output_path(constants.K8S_EXPORT_FOLDER)
+    if utils.output_is_compose():
+        paths.append(utils.output_path(constants.COMPOSE_FILE))
+    elif os.path.isdir(folder):
+        paths.extend(
+            os.path.join(folder, f)
+            for f in sorted(os.listdir(folder))
+            if f.endswith(".yaml")
+        )
+
+    return {path: constants.read_file(path) for path in paths if os.path.exists(path)}
+
+
+def render_artifacts(arch: architecture.Architecture) -> dict[str, str]:
+    """
+    Export the architecture `arch` in memory and return the generated
+    artifacts, indexed by the path at which they must be written.
+    """
+
+    if utils.output_is_compose():
+        exporter = compose_exporter.ComposeExporter(arch, constants.COMPOSE_FILE)
+    else:
+        exporter = k8s_exporter.K8SExporter(arch)
+
+    return {
+        utils.output_path(path): content for path, content in exporter.export().items()
+    }
+
+
+def split_commands(content: str) -> dict[str, list[str]]:
+    """
+    Split the content of a commands file into blocks, indexed by the name of the
+    configured entity or network. Commands outside of a block are indexed by "".
+    With `--phases`, the impairments of an entity are part of its block.
+    """
+
+    blocks: dict[str, list[str]] = {"": []}
+    current = ""
+    for line in content.splitlines():
+        if line.startswith(("# configuring ", "# impairing ")):
+            current = line.split(" ", 2)[2].strip(" #")
+            blocks.setdefault(current, [])
+        elif line.startswith("# "):
+            # other headers (e.g. starting the timelines) are not blocks of entities
+            current = ""
+        elif line != "" and not line.startswith("#"):
+            blocks[current].append(line)
+
+    # commands of an entity are stored in a set: ignore their order
+    return {name: sorted(cmds) for name, cmds in blocks.items()}
+
+
+def changed_keys(old: dict, new: dict) -> set:
+    """Return keys which were added, removed, or modified between `old` and `new`."""
+    return {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)}
+
+
+class Watcher:
+    """Watch the configuration file and regenerate the modified artifacts."""
+
+    def __init__(self, conf_file: str, config, arch: architecture.Architecture):
+        """
+        Watch the given configuration file.
+
+        :param conf_file: Path towards config file.
+        :param config: Currently loaded YAML configuration.
+        :param arch: Architecture built from the current configuration.
+        """
+        self.conf_file = conf_file
+        self.config = config
+        self.arch = arch
+        self.mtime = os.stat(conf_file).st_mtime_ns
+        self.artifacts = read_artifacts()
+
+    def run(self) -> None:
+        """Check the configuration file for modifications until interrupted."""
+        while True:
+            time.sleep(constants.WATCH_INTERVAL)
+
+            try:
+                mtime = os.stat(self.conf_file).st_mtime_ns
+            except OSError:
+                # some editors remove the file before writing it again
+                continue
+
+            if mtime != self.mtime:
+                self.mtime = mtime
+                self.regenerate()
+
+    def regenerate(self) -> None:
+        """Rebuild the architecture and rewrite the artifacts that changed."""
+
+        print("\nConfiguration file was modified. Regenerating...")
+
+        try:
+            config = config_parser.parse_config(self.conf_file)
+        except RuntimeError as err:
+            utils.print_error(f"{err}. Keeping previous configuration.")
+            return
+
+        diff = config_parser.ConfigDiff(self.config, config)
+        if diff.is_empty():
+            utils.print_info("No modification in the configuration")
+            return
+        utils.print_info("Modifications:\n\t- " + diff.string("\n\t- "))
+
+        architecture.reset_counters()
+        try:
+            arch = architecture.Architecture(self.conf_file, config)
+            artifacts = render_artifacts(arch)
+        except RuntimeError as err:
+            utils.print_error(f"{err}. Keeping previous configuration.")
+            return
+
+        if (
+            arch.graph.nodes != self.arch.graph.nodes
+            or arch.graph.edges != self.arch.graph.edges
+        ):
+            arch.export_graph(utils.output_path(constants.ARCHITECTURE_GRAPH_FILE))
+
+        self.write_artifacts(artifacts)
+        self.report(arch, artifacts)
+
+        self.config = config
+        self.arch = arch
+        self.artifacts = artifacts
+        utils.print_success("Regenerated modified artifacts.")
+
+    def write_artifacts(self, artifacts: dict[str, str]) -> None:
+        """Write the modified `artifacts` and remove the ones that are not generated anymore."""
+
+        modified = {
+            path: content
+            for path, content in artifacts.items()
+            if self.artifacts.get(path) != content
+        }
+        for path in modified:
+            utils.print_info(f"Writing {path}...")
+        sinks.write_atomically(modified)
+
+        for path in self.artifacts.keys() - artifacts.keys():
+            utils.print_info(f"Removing {path}...")
+            if os.path.exists(path):
+                os.remove(path)
+
+    def report(
+        self, arch: architecture.Architecture, artifacts: dict[str, str]
+    ) -> None:
+        """Report the containers or pods that need to be recreated."""
+
+        # entities whose block of commands changed
+        commands_file = utils.output_path(constants.COMMANDS_FILE)
+        old_cmds = split_commands(self.artifacts.get(commands_file, ""))
+        new_cmds = split_commands(artifacts.get(commands_file, ""))
+        entities = set()
+        # the timers of an entity are in its timeline, outside of the commands file
+        timelines = utils.output_path(constants.TIMELINES_FOLDER)
+        for path in changed_keys(self.artifacts, artifacts):
+            if os.path.dirname(path) == timelines:
+                entities.add(os.path.splitext(os.path.basename(path))[0])
+        for name in changed_keys(old_cmds, new_cmds) - {""}:
+            net = next(
+                (n for n in arch.networks + self.arch.networks if n.name == name), None
+            )
+            if net is not None and net.type == network.NetworkType.L2_NET:
+                entities.update(iface.entity.name for iface in net.interfaces)
+            else:
+                entities.add(name)
+
+        if utils.output_is_compose():
+            compose_file = utils.output_path(constants.COMPOSE_FILE)
+            old = yaml.safe_load(self.artifacts.get(compose_file, "")) or {}
+            new = yaml.safe_load(artifacts[compose_file]) or {}
+            old_services = old.get("services") or {}
+            new_services = new.get("services") or {}
+
+            entities.update(changed_keys(old_services, new_services))
+            networks = changed_keys(
+                old.get("networks") or {}, new.get("networks") or {}
+            )
+            for name, service in new_services.items():
+                if networks & set(service.get("networks") or []):
+                    entities.add(name)
+
+            created = sorted(new_services.keys() - old_services.keys())
+            removed = sorted(old_services.keys() - new_services.keys())
+            recreated = sorted(entities & old_services.keys() & new_services.keys())
+            kind = "Containers"
+        else:
+            old_files = {os.path.basename(p): c for p, c in self.artifacts.items()}
+            new_files = {os.path.basename(p): c for p, c in artifacts.items()}
+            old_pods, new_pods = set(), set()
+            for files, pods in ((old_files, old_pods), (new_files, new_pods)):
+                pods.update(
+                    f.removesuffix("_pod.yaml")
+                    for f in files
+                    if f.endswith("_pod.yaml")
+                )
+
+            for f in changed_keys(old_files, new_files):
+                if f.endswith("_pod.yaml") or f.endswith("_meshnet.yaml"):
+                    entities.add(
+                        f.removesuffix("_pod.yaml").removesuffix("_meshnet.yaml")
+                    )
+
+            created = sorted(f"{e}-pod" for e in new_pods - old_pods)
+            removed = sorted(f"{e}-pod" for e in old_pods - new_pods)
+            recreated = sorted(f"{e}-pod" for e in entities & old_pods & new_pods)
+            kind = "Pods"
+
+        if not (created or removed or recreated):
+            utils.print_info(f"{kind} do not need to be recreated")
+        if created:
+            utils.print_info(f"{kind} to create: {', '.join(created)}")
+        if removed:
+            utils.print_info(f"{kind} to remove: {', '.join(removed)}")
+        if recreated:
+            utils.print_info(f"{kind} to recreate: {', '.join(recreated)}")
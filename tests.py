@@ -179,8 +179,10 @@ if __name__ == "__main__":
         )
         check_subprocess(p, "Could not start")
 
-        print("Waiting for startup before executing curl...")
-        time.sleep(3 if output == OUTPUT_COMPOSE else 25)
+        # with Docker Compose, `make start` waits until every entity is ready
+        if output == OUTPUT_K8S:
+            print("Waiting for startup before executing curl...")
+            time.sleep(25)
 
         print("Requesting...")
         req = requesting(output)